@@ -18,55 +18,1309 @@
 - TAR (.tar)
 - GZIP (.gz, .tgz)
 - BZIP2 (.bz2, .tbz2)
+- XZ (.xz, .tar.xz, .txz)
+- ZSTD (.zst, .tar.zst)，需要安装 zstandard
+- LZ4 (.lz4, .tar.lz4)，需要安装 lz4
+
+格式识别：
+- 只读取压缩文件扩展名（白名单）的文件头，按魔数识别实际格式（结果按路径缓存）；
+  内部是ZIP/gzip结构的文档和程序包（.docx、.dotx、.xlsb、.svgz 等）不会被解压和删除
+- --sniff-extensionless 额外识别没有扩展名的文件（如下载时丢失扩展名的压缩包）
+- .tar.gz/.tar.bz2/.tar.xz 直接以流式 tarfile 单次解压，不再生成中间 .tar 文件
 
 优化特性：
-- 多线程解压：并行处理多个压缩文件
+- 多线程解压：并行处理多个压缩文件，限制同时提交的任务数，内存占用不随压缩文件数量增长
+- 线程安全统计：每个工作线程独立计数（无锁），批次结束时合并；实时输出吞吐量（个/秒、MB/秒）
 - 智能路径处理：避免文件名冲突
 - 内存优化：流式解压大文件
 - 进度显示：实时显示处理进度
 - 错误恢复：单个文件失败不影响整体流程
+- 成员索引：--list 仅读取中央目录/文件头输出成员清单（JSONL），不解压
+- 选择性解压：--include/--exclude 通配符只解压匹配的成员
+- 磁盘空间准入：按文件头记录的解压大小在临时目录和目标目录所在文件系统上预留空间，
+  放不下的压缩文件等待其他任务完成后再开始；解压成功后立即删除源压缩文件释放空间
+- 压缩炸弹防护：解压过程中流式检查总大小、压缩比、成员数量和嵌套深度，超限立即中止该压缩文件；
+  压缩比默认不限制，指定 --max-ratio 时也只在解压超过1GB后检查（日志、稀疏镜像等正常文件压缩比也很高）
+- TAR 中的链接和设备文件不解压，逐个输出警告，并保留原压缩文件
+- 流水线模式：--pipeline 将读取、解压、写出拆分为独立线程，通过有界队列衔接，
+  bz2/xz 在进程池中解压；结束时输出各阶段利用率，用于判断瓶颈在磁盘还是CPU
+- 内容去重：--dedup skip/hardlink 在写出成员时计算内容哈希并与输出目录中的已有文件比较，
+  内容相同的成员不再写出（或改为硬链接到已有文件）
+- 输出布局：--layout flat/per-archive/mirror；同名文件自动改名为 "名称 (n).扩展名"，
+  名称由内存中的目录索引分配，不会互相覆盖，也不需要反复探测文件是否存在
+- 外部解压程序：第一次遇到 7z/RAR 时探测本机的 7z/bsdtar，7z/RAR 优先交给外部程序解压（7z 按线程数分配 -mmt，
+  bsdtar 把压缩包转换为 tar 流逐个成员写出），找不到时使用 py7zr/rarfile；--backend python 只使用 Python 库。
+  安装了 rarfile 时 RAR 不交给 bsdtar；加密的压缩文件不交给 bsdtar；外部程序出错时改用 Python 库重新解压
+- 加密压缩包：--passwords-file 提供候选密码，只用最小的一个成员验证密码（多个候选并行验证），
+  验证成功的密码按压缩文件系列缓存，同系列的后续压缩文件优先尝试
+- 断点续传：--journal 持久化记录每个压缩文件的处理状态，崩溃后重启从中断处继续
+- 批量模式：--batch-file 在一个进程中处理列表中的所有目标文件夹（"-" 表示从标准输入逐行读取），
+  共用线程池、格式识别缓存、密码缓存和日志，每个目标完成后输出一行 JSON 结果记录
+- 延迟导入：rarfile/py7zr/zstandard/lz4 以及 asyncio、multiprocessing 在第一次用到时才导入，
+  命令行冷启动时间不受可选库影响；导入模块和创建 ArchiveExtractor 不会配置日志或输出任何内容
+
+作为库使用：
+- iter_members(path) 依次产出成员数据流，不写入磁盘
+- extract(path, dest) 解压单个压缩文件，返回 ExtractionResult
+- extract_async(path, dest) 在线程池中解压，可在一个事件循环中同时等待大量解压任务
 
 使用示例：
 python archive_extractor.py /path/to/folder
 python archive_extractor.py /path/to/folder --dry-run
 python archive_extractor.py /path/to/folder --threads 4
+python archive_extractor.py /path/to/folder --list members.jsonl
+python archive_extractor.py /path/to/folder --include "*.pdf" --exclude "__MACOSX/*"
+python archive_extractor.py /path/to/folder --journal extract_journal.jsonl
+python archive_extractor.py --batch-file targets.txt --results results.jsonl
 """
 
 import os
+import re
 import sys
+import importlib
+import importlib.util
 import argparse
 import logging
 import shutil
 import tempfile
+import json
+import fnmatch
+import hashlib
+import threading
+import queue
+from collections import deque
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from typing import List, Set, Dict, Tuple
+from typing import List, Set, Dict, Tuple, Optional, TextIO, BinaryIO, Iterator, Iterable, Callable
+from dataclasses import dataclass, field
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, wait, FIRST_COMPLETED
+import time
 import zipfile
 import tarfile
+import io
 import gzip
 import bz2
+import lzma
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class _LazyModule:
+    """
+    可选库的延迟导入代理：启动时只检查库是否已安装，第一次访问属性（即第一次处理该格式）时才导入
+    
+    py7zr 等库导入时会连带加载多个压缩库，按需导入可显著缩短命令行的冷启动时间
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+
+def _is_installed(name: str) -> bool:
+    """检查库是否已安装（不执行导入）"""
+    return importlib.util.find_spec(name) is not None
+
+
+rarfile = _LazyModule('rarfile')
+py7zr = _LazyModule('py7zr')
+zstandard = _LazyModule('zstandard')
+lz4_frame = _LazyModule('lz4.frame')
+
+RAR_SUPPORT = _is_installed('rarfile')
+SEVENZIP_SUPPORT = _is_installed('py7zr')
+ZSTD_SUPPORT = _is_installed('zstandard')
+LZ4_SUPPORT = _is_installed('lz4')
+
+# 未安装的可选库：{格式: 库名}，遇到对应格式的文件时在日志中提示安装
+MISSING_BACKENDS: Dict[str, str] = {}
+if not RAR_SUPPORT:
+    MISSING_BACKENDS['rar'] = 'rarfile'
+if not SEVENZIP_SUPPORT:
+    MISSING_BACKENDS['7z'] = 'py7zr'
+if not ZSTD_SUPPORT:
+    MISSING_BACKENDS['zst'] = MISSING_BACKENDS['tar.zst'] = 'zstandard'
+if not LZ4_SUPPORT:
+    MISSING_BACKENDS['lz4'] = MISSING_BACKENDS['tar.lz4'] = 'lz4'
+
+
+# 文件头魔数：(偏移, 魔数, 格式)
+ARCHIVE_SIGNATURES = [
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'PK\x05\x06', 'zip'),  # 空ZIP
+    (0, b'PK\x07\x08', 'zip'),  # 分卷ZIP
+    (0, b'Rar!\x1a\x07', 'rar'),
+    (0, b'7z\xbc\xaf\x27\x1c', '7z'),
+    (0, b'\x1f\x8b\x08', 'gz'),
+    (0, b'\xfd7zXZ\x00', 'xz'),
+    (0, b'\x28\xb5\x2f\xfd', 'zst'),
+    (0, b'\x04\x22\x4d\x18', 'lz4'),
+    (4, b'1AY&SY', 'bz2'),       # "BZh1"-"BZh9" 之后紧跟块魔数
+    (257, b'ustar', 'tar'),
+]
+
+# 识别格式需要读取的文件头字节数（TAR 的 ustar 魔数位于偏移257）
+SNIFF_SIZE = 262
+
+# 单文件压缩格式的常见扩展名，解压后去掉扩展名作为输出文件名
+SINGLE_FILE_SUFFIXES = {
+    'gz': {'.gz', '.gzip', '.z'},
+    'bz2': {'.bz2', '.bzip2'},
+    'xz': {'.xz', '.lzma'},
+    'zst': {'.zst', '.zstd'},
+    'lz4': {'.lz4'},
+}
+
+# 读取文件头识别格式的扩展名（白名单）。其他扩展名的文件即使内部是ZIP/gzip结构
+# （Office/OpenDocument 文档、程序包、.svgz 等）也不当作压缩包，避免解压后删除
+ARCHIVE_EXTENSIONS = {
+    '.zip', '.rar', '.7z', '.tar', '.tgz', '.tbz', '.tbz2', '.tb2', '.txz', '.tzst', '.tlz4',
+}.union(*SINGLE_FILE_SUFFIXES.values())
+
+# 流式解压的读写块大小
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 解压状态日志的抽样哈希：只读取压缩文件开头和结尾各这么多字节，不读取整个文件
+JOURNAL_SAMPLE_SIZE = 64 * 1024
+
+# 实时吞吐量报告的最短间隔（秒）
+PROGRESS_INTERVAL = 5.0
+
+# 压缩比检查的起始阈值：解压数据量未超过该值时不检查压缩比
+# （日志、稀疏镜像、全零数据等正常文件的压缩比也可能很高）
+RATIO_CHECK_MIN_BYTES = 1024 * 1024 * 1024
+
+
+class ExtractionLimitExceeded(Exception):
+    """解压超出安全限制（疑似压缩炸弹）"""
+
+
+class ExtractionGuard:
+    """
+    单个压缩文件的解压限制
+    
+    在流式写出成员数据时逐块累计检查，超过限制立即抛出 ExtractionLimitExceeded，
+    不必等到整个压缩文件解压完成
+    """
+    
+    def __init__(self, archive_path: str, compressed_size: int, max_total_bytes: int = 0,
+                 max_ratio: float = 0, max_members: int = 0):
+        """
+        Args:
+            archive_path: 压缩文件路径（用于错误信息）
+            compressed_size: 压缩文件大小
+            max_total_bytes: 解压后总大小上限（0表示不限制）
+            max_ratio: 解压后总大小与压缩文件大小之比的上限（0表示不限制）
+            max_members: 成员数量上限（0表示不限制）
+        """
+        self.archive_path = archive_path
+        self.compressed_size = max(compressed_size, 1)
+        self.max_total_bytes = max_total_bytes
+        self.max_ratio = max_ratio
+        self.max_members = max_members
+        self.total_bytes = 0
+        self.members = 0
+    
+    def check_declared(self, member_count: int, declared_bytes: int):
+        """开始解压前按文件头声明的成员数量和大小检查（声明值可能被伪造，解压时仍会逐块检查）"""
+        if self.max_members and member_count > self.max_members:
+            raise ExtractionLimitExceeded(f"成员数量 {member_count} 超过上限 {self.max_members}")
+        if self.max_total_bytes and declared_bytes > self.max_total_bytes:
+            raise ExtractionLimitExceeded(
+                f"声明的解压大小 {declared_bytes} 字节超过上限 {self.max_total_bytes} 字节")
+        self._check_ratio(declared_bytes)
+    
+    def add_member(self):
+        """开始写出一个成员"""
+        self.members += 1
+        if self.max_members and self.members > self.max_members:
+            raise ExtractionLimitExceeded(f"成员数量超过上限 {self.max_members}")
+    
+    def add_bytes(self, size: int):
+        """即将写出 size 字节的解压数据"""
+        self.total_bytes += size
+        if self.max_total_bytes and self.total_bytes > self.max_total_bytes:
+            raise ExtractionLimitExceeded(f"解压大小超过上限 {self.max_total_bytes} 字节")
+        self._check_ratio(self.total_bytes)
+    
+    def _check_ratio(self, total_bytes: int):
+        if self.max_ratio and total_bytes > RATIO_CHECK_MIN_BYTES:
+            ratio = total_bytes / self.compressed_size
+            if ratio > self.max_ratio:
+                raise ExtractionLimitExceeded(f"压缩比 {ratio:.0f}:1 超过上限 {self.max_ratio:.0f}:1")
+
+
+# 文件头记录了解压大小的格式；其余格式按压缩文件大小乘以膨胀系数估算
+HEADER_SIZED_FORMATS = {'zip', 'rar', '7z', 'gz', 'zst', 'lz4'}
+ESTIMATED_EXPANSION_RATIO = 5
+# 文件头的解压大小只是下限的格式：gzip 的 ISIZE 是原始大小对 2^32 取模的值，超过4GB的文件会偏小
+LOWER_BOUND_SIZED_FORMATS = {'gz'}
+
+# 流水线模式：预读到内存的压缩文件大小上限、各阶段线程数、每个写出线程的队列长度（数据块数）
+PIPELINE_PREFETCH_BYTES = 16 * 1024 * 1024
+PIPELINE_READERS = 2
+PIPELINE_WRITERS = 2
+PIPELINE_WRITE_QUEUE_CHUNKS = 64
+PIPELINE_WRITE_BUFFER = 4 * 1024 * 1024
+
+# CPU密集、交给进程池整体解压的格式，以及子进程单次解压结果的大小上限（超过则改为线程内流式解压）
+PIPELINE_PROCESS_FORMATS = {'bz2', 'xz', 'tar.bz2', 'tar.xz'}
+PIPELINE_PROCESS_MAX_OUTPUT = 64 * 1024 * 1024
+
+# 内容去重：off 不去重，skip 跳过重复成员，hardlink 重复成员硬链接到已有文件
+DEDUP_MODES = ('off', 'skip', 'hardlink')
+# 按文件开头多少字节查找可能重复的已有文件
+DEDUP_PREFIX_BYTES = 64 * 1024
+
+# 支持密码的格式，以及并行验证候选密码的线程数
+PASSWORD_FORMATS = {'zip', 'rar', '7z'}
+PASSWORD_WORKERS = 4
+
+# 输出布局：flat 解压到目标文件夹根目录，per-archive 每个压缩文件一个子文件夹，
+# mirror 解压到压缩文件所在的文件夹
+LAYOUTS = ('flat', 'per-archive', 'mirror')
+
+# 命令行默认的日志文件
+DEFAULT_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive_extractor.log")
+
+# 批量模式同时处理的目标文件夹数量
+BATCH_JOBS = 4
+
+# 解压后端：auto 优先使用本机的 7z/bsdtar 程序，找不到时使用 Python 库；python 只使用 Python 库
+BACKENDS = ('auto', 'python')
+# 依次查找的 7-Zip 程序名
+SEVENZIP_PROGRAMS = ('7z', '7zz', '7za')
+# 外部程序出错时在日志中保留的错误输出行数
+EXTERNAL_ERROR_LINES = 5
+
+
+def _decompress_in_process(fmt: str, data: bytes, max_output: int) -> Optional[bytes]:
+    """
+    在子进程中整体解压 bz2/xz 数据（不受GIL限制），支持多个压缩流首尾相接
+    
+    Args:
+        fmt: 格式名称（bz2、xz、tar.bz2、tar.xz）
+        data: 压缩数据
+        max_output: 解压结果的大小上限
+        
+    Returns:
+        解压后的数据，超过 max_output 时返回None
+    """
+    outputs = []
+    total = 0
+    first_stream = True
+    while data:
+        decompressor = bz2.BZ2Decompressor() if fmt.endswith('bz2') else lzma.LZMADecompressor()
+        try:
+            chunk = decompressor.decompress(data, max_length=max_output - total + 1)
+        except (OSError, lzma.LZMAError):
+            if first_stream:
+                raise
+            break  # 与 bz2.decompress/lzma.decompress 一致，忽略末尾的填充数据
+        total += len(chunk)
+        if total > max_output:
+            return None
+        if not decompressor.eof:
+            raise EOFError("压缩数据不完整")
+        outputs.append(chunk)
+        data = decompressor.unused_data
+        first_stream = False
+    return b''.join(outputs)
+
+
+class DiskSpaceBudget:
+    """
+    磁盘空间预算：按文件系统（设备号）记录已预留但尚未写入的空间
+    
+    多个线程同时解压时，每个任务开始前按预计解压大小预留空间，
+    只有剩余空间扣除已预留部分后仍然足够时才允许开始
+    """
+    
+    def __init__(self, min_free_bytes: int = 0):
+        """
+        Args:
+            min_free_bytes: 每个文件系统始终保留的最小剩余空间
+        """
+        self.min_free_bytes = min_free_bytes
+        self._reserved: Dict[int, int] = {}
+        self._lock = threading.Lock()
+    
+    def try_reserve(self, needs: Dict[str, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        尝试预留空间
+        
+        Args:
+            needs: {目录路径: 需要的字节数}，位于同一文件系统的目录会合并计算
+            
+        Returns:
+            预留凭据（用于 release），空间不足时返回None
+        """
+        by_device: Dict[int, Tuple[str, int]] = {}
+        for path, size in needs.items():
+            device = os.stat(path).st_dev
+            known_path, known_size = by_device.get(device, (path, 0))
+            by_device[device] = (known_path, known_size + size)
+        
+        with self._lock:
+            for device, (path, size) in by_device.items():
+                free = shutil.disk_usage(path).free - self._reserved.get(device, 0)
+                if free - size < self.min_free_bytes:
+                    return None
+            
+            token = [(device, size) for device, (_, size) in by_device.items()]
+            for device, size in token:
+                self._reserved[device] = self._reserved.get(device, 0) + size
+            return token
+    
+    def release(self, token: List[Tuple[int, int]]):
+        """释放预留的空间（任务结束后，实际写入的数据已反映在剩余空间中）"""
+        with self._lock:
+            for device, size in token:
+                self._reserved[device] -= size
+    
+    @property
+    def reserved_bytes(self) -> int:
+        """当前预留的总字节数"""
+        with self._lock:
+            return sum(self._reserved.values())
+
+
+def _open_zstd(file_path):
+    """
+    打开ZSTD流式解压读取器（参数可以是路径或已打开的文件对象）
+    
+    zstd 格式的解码本身是单线程的（多线程只用于压缩），zstandard 库也没有多线程解压接口，
+    并行度来自多个压缩包同时解压
+    """
+    source = open(file_path, 'rb') if isinstance(file_path, str) else file_path
+    return zstandard.ZstdDecompressor().stream_reader(
+        source, read_size=COPY_CHUNK_SIZE, read_across_frames=True, closefd=True)
+
+
+def _open_lz4(file_path):
+    """打开LZ4帧格式流式解压读取器"""
+    return lz4_frame.open(file_path, 'rb')
+
+
+# 单文件压缩格式的流式解压打开函数
+STREAM_OPENERS = {
+    'gz': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+if ZSTD_SUPPORT:
+    STREAM_OPENERS['zst'] = _open_zstd
+
+if LZ4_SUPPORT:
+    STREAM_OPENERS['lz4'] = _open_lz4
+
+# TAR 系列格式对应的 tarfile 流模式，以及 tarfile 不直接支持、需要先经 STREAM_OPENERS 解压的外层
+TAR_STREAM_MODES = {
+    'tar': ('r|', None),
+    'tar.gz': ('r|gz', None),
+    'tar.bz2': ('r|bz2', None),
+    'tar.xz': ('r|xz', None),
+    'tar.zst': ('r|', 'zst'),
+    'tar.lz4': ('r|', 'lz4'),
+}
+
+
+class ExtractionJournal:
+    """
+    解压状态日志（JSONL，追加写入）
+    
+    每个压缩文件依次记录 started → extracted → moved → deleted 状态，并附带文件大小、
+    修改时间和抽样哈希（文件开头和结尾各 JOURNAL_SAMPLE_SIZE 字节）。重启后按 (路径, 大小, 修改时间)
+    查找上次的状态，再用抽样哈希排除修改时间被保留的同名新文件，已完成的压缩文件无需完整读取即可跳过。
+    """
+    
+    STATES = ('started', 'extracted', 'moved', 'deleted')
+    
+    def __init__(self, journal_path: str):
+        """
+        打开（或创建）解压状态日志
+        
+        Args:
+            journal_path: 日志文件路径
+        """
+        self.journal_path = os.path.abspath(journal_path)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+    
+    def _load(self):
+        """读取已有日志，同一压缩文件以最后一条记录为准"""
+        if not os.path.exists(self.journal_path):
+            return
+        
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程崩溃时最后一行可能只写了一半
+                    continue
+                self.entries[record['archive']] = record
+    
+    def lookup(self, archive_path: str, signature: Tuple[int, int],
+               sample_hash: Callable[[], str] = None) -> Optional[str]:
+        """
+        查询压缩文件上次记录的状态
+        
+        Args:
+            archive_path: 压缩文件路径
+            signature: (文件大小, 修改时间纳秒)，不一致说明是同名的新文件
+            sample_hash: 计算当前文件抽样哈希的函数（可选），只在大小和修改时间一致时调用
+            
+        Returns:
+            上次记录的状态，没有记录或文件已变化时返回None
+        """
+        record = self.entries.get(archive_path)
+        if record is None or (record['size'], record['mtime_ns']) != tuple(signature):
+            return None
+        if sample_hash is not None and record.get('sample') and record['sample'] != sample_hash():
+            return None
+        return record['state']
+    
+    def sample_hash(self, archive_path: str) -> Optional[str]:
+        """返回已记录的抽样哈希"""
+        record = self.entries.get(archive_path)
+        return record.get('sample') if record else None
+    
+    def record(self, archive_path: str, state: str, signature: Tuple[int, int],
+               sample_hash: Optional[str] = None):
+        """
+        追加一条状态记录，每条记录写入后立即刷新到操作系统
+        
+        Args:
+            archive_path: 压缩文件路径
+            state: 状态，取值见 STATES
+            signature: (文件大小, 修改时间纳秒)
+            sample_hash: 压缩文件的抽样哈希，省略时沿用之前的记录
+        """
+        with self._lock:
+            if sample_hash is None:
+                sample_hash = self.sample_hash(archive_path)
+            record = {
+                'archive': archive_path,
+                'state': state,
+                'size': signature[0],
+                'mtime_ns': signature[1],
+                'sample': sample_hash,
+                'time': datetime.now().isoformat(timespec='seconds'),
+            }
+            self.entries[archive_path] = record
+            if self._file is None or self._file.closed:
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+    
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.close()
 
-try:
-    import rarfile
-    RAR_SUPPORT = True
-except ImportError:
-    RAR_SUPPORT = False
-    print("警告: 未安装rarfile库，将无法处理RAR文件")
-    print("安装命令: pip install rarfile")
 
-try:
-    import py7zr
-    SEVENZIP_SUPPORT = True
-except ImportError:
-    SEVENZIP_SUPPORT = False
-    print("警告: 未安装py7zr库，将无法处理7z文件")
-    print("安装命令: pip install py7zr")
+def configure_logging(log_file: str, stream: TextIO = None):
+    """
+    命令行使用的日志配置：同时写入日志文件和控制台
+    
+    作为库使用时不会调用，日志输出由调用方自行配置
+    
+    Args:
+        log_file: 日志文件路径
+        stream: 控制台输出流（默认标准输出）
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(stream or sys.stdout)
+        ]
+    )
+
+
+@dataclass
+class ExtractionResult:
+    """单个压缩文件的解压结果"""
+    archive: str
+    success: bool
+    files_extracted: int = 0
+    bytes_extracted: int = 0
+    output_files: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+@dataclass
+class ArchiveMember:
+    """iter_members 产出的成员；stream 只在迭代到下一个成员之前有效"""
+    name: str
+    stream: BinaryIO
+    mtime: Optional[float] = None
+    mode: Optional[int] = None
+    
+    def read(self) -> bytes:
+        return self.stream.read()
+
+
+class GuardedStream:
+    """读取时累计解压数据量的成员数据流，超出解压限制时抛出 ExtractionLimitExceeded"""
+    
+    def __init__(self, stream, guard: 'ExtractionGuard'):
+        self.stream = stream
+        self.guard = guard
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            # 分块读取，压缩炸弹在占满内存之前就会被中止
+            return b''.join(iter(lambda: self.read(COPY_CHUNK_SIZE), b''))
+        data = self.stream.read(size)
+        self.guard.add_bytes(len(data))
+        return data
+    
+    def close(self):
+        self.stream.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def load_passwords(file_path: str) -> List[str]:
+    """
+    读取候选密码文件（UTF-8，每行一个密码，忽略空行；密码前后的空格保留）
+    
+    Args:
+        file_path: 密码文件路径
+        
+    Returns:
+        去重后的密码列表（保持文件中的顺序）
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        passwords = [line.rstrip('\r\n') for line in f]
+    return list(dict.fromkeys(password for password in passwords if password))
+
+
+@dataclass
+class ExternalTool:
+    """本机的外部解压程序"""
+    name: str           # '7z' 或 'bsdtar'
+    path: str
+    formats: Set[str]
+    
+    @property
+    def streams(self) -> bool:
+        """bsdtar 可以把压缩包转换为 tar 流逐个成员输出；7z 程序只能整体解压到目录"""
+        return self.name == 'bsdtar'
+
+
+_external_tools: Optional[Dict[str, ExternalTool]] = None
+_external_tools_lock = threading.Lock()
+
+
+def _sevenzip_formats(path: str) -> Set[str]:
+    """按 `7z i` 列出的格式判断 7-Zip 程序能否解压 RAR（7za 等精简版不带 RAR 解码器）"""
+    import subprocess
+    formats = {'7z'}
+    try:
+        completed = subprocess.run([path, 'i'], stdin=subprocess.DEVNULL, capture_output=True, timeout=10)
+        if re.search(rb'\bRar\b', completed.stdout):
+            formats.add('rar')
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"探测 7-Zip 支持的格式失败: {path} - {str(e)}")
+    return formats
+
+
+def external_programs_available() -> bool:
+    """PATH 中是否有 bsdtar 或 7-Zip 程序（只查找文件，不启动进程）"""
+    return any(shutil.which(name) for name in ('bsdtar',) + SEVENZIP_PROGRAMS)
+
+
+def probe_external_tools() -> Dict[str, ExternalTool]:
+    """
+    探测本机可用的外部解压程序（每个进程只探测一次，第一次解压或读取 7z/RAR 压缩文件时才探测）
+    
+    bsdtar（libarchive）可以读取 7z 和 RAR；同一格式两者都有时优先使用 7-Zip（LZMA2 多线程解压）。
+    libarchive 的 RAR 支持不完整（RAR5 的部分特性、固实和加密压缩包），安装了 rarfile 时 RAR 不交给 bsdtar
+    
+    Returns:
+        {格式: 外部程序}
+    """
+    global _external_tools
+    with _external_tools_lock:
+        if _external_tools is None:
+            tools: Dict[str, ExternalTool] = {}
+            bsdtar = shutil.which('bsdtar')
+            if bsdtar:
+                tool = ExternalTool('bsdtar', bsdtar, {'7z'} if RAR_SUPPORT else {'7z', 'rar'})
+                tools.update((fmt, tool) for fmt in tool.formats)
+            for name in SEVENZIP_PROGRAMS:
+                path = shutil.which(name)
+                if path:
+                    tool = ExternalTool('7z', path, _sevenzip_formats(path))
+                    tools.update((fmt, tool) for fmt in tool.formats)
+                    break
+            _external_tools = tools
+        return _external_tools
+
+
+def _external_error(tool: ExternalTool, returncode: int, output: bytes) -> str:
+    """外部程序出错时的错误信息：退出码加上错误输出的最后几行"""
+    lines = [line.strip() for line in output.decode('utf-8', errors='replace').splitlines() if line.strip()]
+    return f"{tool.name} 退出码 {returncode}: {' | '.join(lines[-EXTERNAL_ERROR_LINES:])}"
+
+
+class NameAllocator:
+    """
+    输出路径分配器：在内存中维护目录索引，同名时分配 "名称 (n).扩展名" 形式的唯一名称
+    
+    每个目录只在第一次用到时列出一次已有条目；每个名称记住下一个可用序号，
+    数十万个同名文件（如 readme.txt）的分配也是 O(1) 的，不需要反复调用 os.path.exists 探测。
+    名称按 os.path.normcase 比较，Windows 上不区分大小写
+    """
+    
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._entries: Dict[str, Set[str]] = {}
+        self._next_index: Dict[Tuple[str, str], int] = {}
+        self._registered_dirs: Set[str] = set()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def split_name(name: str) -> Tuple[str, str]:
+        """拆分主名和扩展名，.tar.gz 等双扩展名保持完整"""
+        stem, ext = os.path.splitext(name)
+        if stem.lower().endswith('.tar'):
+            stem, ext = stem[:-4], stem[-4:] + ext
+        return stem, ext
+    
+    def _load(self, directory: str) -> Set[str]:
+        """目录的已用名称（调用方持有锁）"""
+        entries = self._entries.get(directory)
+        if entries is None:
+            try:
+                entries = {os.path.normcase(name) for name in os.listdir(directory)}
+            except OSError:
+                entries = set()  # 目录尚未创建
+            self._entries[directory] = entries
+        return entries
+    
+    def _register_dir(self, directory: str):
+        """登记即将创建的各级目录，避免之后有文件分配到同名路径（调用方持有锁）"""
+        while directory not in self._registered_dirs and directory != self.root:
+            parent, name = os.path.split(directory)
+            if not name or parent == directory:
+                break
+            self._load(parent).add(os.path.normcase(name))
+            self._registered_dirs.add(directory)
+            directory = parent
+    
+    def allocate(self, path: str) -> str:
+        """
+        分配不与已有文件及已分配路径冲突的路径
+        
+        Args:
+            path: 期望的输出路径
+            
+        Returns:
+            可用的路径（未冲突时即 path 本身）
+        """
+        directory, name = os.path.split(path)
+        key = os.path.normcase(name)
+        with self._lock:
+            self._register_dir(directory)
+            entries = self._load(directory)
+            if key not in entries:
+                entries.add(key)
+                return path
+            
+            stem, ext = self.split_name(name)
+            index = self._next_index.get((directory, key), 1)
+            while True:
+                candidate = f"{stem} ({index}){ext}"
+                index += 1
+                if os.path.normcase(candidate) not in entries:
+                    break
+            self._next_index[(directory, key)] = index
+            entries.add(os.path.normcase(candidate))
+        return os.path.join(directory, candidate)
+    
+    def release(self, path: str):
+        """文件被删除后释放名称"""
+        directory, name = os.path.split(path)
+        with self._lock:
+            entries = self._entries.get(directory)
+            if entries is not None:
+                entries.discard(os.path.normcase(name))
+
+
+class ContentIndex:
+    """
+    输出目录的内容索引（进程内各线程共享），用于解压时去重
+    
+    - 按 (大小, SHA-256) 记录本次运行写入目标目录的文件
+    - 按文件开头 DEDUP_PREFIX_BYTES 字节的摘要记录候选文件（包括运行前输出目录中已有的文件），
+      成员写出时先与候选文件逐字节比较，完全相同就不必写出
+    
+    压缩文件来自不可信来源，使用 SHA-256 而不是 MD5，避免构造的碰撞导致文件被误判为重复
+    """
+    
+    def __init__(self):
+        self._by_digest: Dict[Tuple[int, str], str] = {}
+        self._by_prefix: Dict[str, str] = {}
+        self._keys: Dict[str, Tuple[Optional[Tuple[int, str]], str]] = {}  # {路径: (内容键, 开头摘要)}
+        self._lock = threading.Lock()
+        # 按内容哈希分片的锁：同一内容的查找、移动和登记依次进行
+        self._placing = [threading.Lock() for _ in range(64)]
+        self.seeded = False
+    
+    @staticmethod
+    def prefix_key(prefix: bytes) -> str:
+        """文件开头 DEDUP_PREFIX_BYTES 字节的摘要"""
+        return hashlib.sha256(prefix[:DEDUP_PREFIX_BYTES]).hexdigest()
+    
+    @staticmethod
+    def describe(file_path: str) -> Tuple[int, str, str]:
+        """读取文件，返回 (大小, SHA-256, 开头摘要)"""
+        digest = hashlib.sha256()
+        size = 0
+        prefix = b''
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+                if len(prefix) < DEDUP_PREFIX_BYTES:
+                    prefix += chunk[:DEDUP_PREFIX_BYTES - len(prefix)]
+                digest.update(chunk)
+                size += len(chunk)
+        return size, digest.hexdigest(), ContentIndex.prefix_key(prefix)
+    
+    def seed(self, root: str, exclude: Set[str]) -> int:
+        """
+        索引输出目录中已有的文件（只读取开头部分，完整内容在写出成员时逐字节比较）
+        
+        Args:
+            root: 输出目录
+            exclude: 不加入索引的文件（待解压的压缩文件）
+            
+        Returns:
+            加入索引的文件数量
+        """
+        count = 0
+        for current, dirs, files in os.walk(root):
+            for file in files:
+                file_path = os.path.join(current, file)
+                if file_path in exclude:
+                    continue
+                try:
+                    with open(file_path, 'rb') as f:
+                        prefix = f.read(DEDUP_PREFIX_BYTES)
+                except OSError:
+                    continue
+                if prefix:
+                    with self._lock:
+                        self._by_prefix.setdefault(self.prefix_key(prefix), file_path)
+                        self._keys.setdefault(file_path, (None, self.prefix_key(prefix)))
+                    count += 1
+        self.seeded = True
+        return count
+    
+    def add(self, file_path: str, size: int, digest: str, prefix_key: str):
+        """记录已写入目标目录的文件"""
+        if not size:
+            return
+        with self._lock:
+            self._by_digest.setdefault((size, digest), file_path)
+            self._by_prefix.setdefault(prefix_key, file_path)
+            self._keys[file_path] = ((size, digest), prefix_key)
+    
+    def placing(self, digest: str) -> threading.Lock:
+        """
+        内容相同的成员移动到目标目录时使用的锁
+        
+        并发解压的两个压缩文件包含相同内容时，保证后移动的一个能查到先移动的一个，不会都写出
+        """
+        return self._placing[int(digest[:8], 16) % len(self._placing)]
+    
+    def lookup(self, size: int, digest: str) -> Optional[str]:
+        """查找内容相同的已有文件"""
+        if not size:
+            return None
+        with self._lock:
+            return self._by_digest.get((size, digest))
+    
+    def open_candidate(self, prefix_key: str):
+        """
+        打开开头内容相同的候选文件
+        
+        Returns:
+            (路径, 文件对象)，没有候选文件时返回None
+        """
+        with self._lock:
+            file_path = self._by_prefix.get(prefix_key)
+        if file_path is None:
+            return None
+        try:
+            return file_path, open(file_path, 'rb')
+        except OSError:
+            self.forget(file_path)
+            return None
+    
+    def forget(self, file_path: str):
+        """文件即将被覆盖或删除时移出索引"""
+        with self._lock:
+            key, prefix_key = self._keys.pop(file_path, (None, None))
+            if key is not None and self._by_digest.get(key) == file_path:
+                del self._by_digest[key]
+            if prefix_key is not None and self._by_prefix.get(prefix_key) == file_path:
+                del self._by_prefix[prefix_key]
+
+
+class MemberOutput:
+    """
+    成员输出文件：写出的同时计算内容哈希
+    
+    启用去重时先缓存开头 DEDUP_PREFIX_BYTES 字节，找到开头相同的已有文件后逐块比较，
+    只要内容一致就不写磁盘；出现差异时把已比较过的相同部分从候选文件复制过来再继续写出。
+    目标目录中的文件只会被整体替换（移动/链接），不会被原地修改，打开的候选文件内容保持不变
+    """
+    
+    def __init__(self, output_path: str, index: Optional[ContentIndex] = None, buffering: int = -1):
+        self.output_path = output_path
+        self.index = index
+        self.buffering = buffering
+        self.size = 0
+        self.digest = None
+        self.prefix_key = None
+        self.duplicate_of = None
+        self._hasher = hashlib.sha256() if index is not None else None
+        self._pending = [] if index is not None else None  # 尚未确定是否需要写出的开头数据
+        self._pending_size = 0
+        self._candidate = None
+        self._matched = 0
+        self._out = None
+        if index is None:
+            self._open()
+    
+    def _open(self):
+        self._out = open(self.output_path, 'wb', buffering=self.buffering)
+    
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self._hasher is None:
+            self._out.write(chunk)
+            return
+        
+        self._hasher.update(chunk)
+        if self._pending is not None:
+            self._pending.append(chunk)
+            self._pending_size += len(chunk)
+            if self._pending_size >= DEDUP_PREFIX_BYTES:
+                self._resolve_prefix()
+            return
+        self._compare_or_write(chunk)
+    
+    def _resolve_prefix(self):
+        data = b''.join(self._pending)
+        self._pending = None
+        if not data:
+            self._open()  # 空文件不参与去重
+            return
+        self.prefix_key = ContentIndex.prefix_key(data)
+        self._candidate = self.index.open_candidate(self.prefix_key)
+        if self._candidate is None:
+            self._open()
+        self._compare_or_write(data)
+    
+    def _compare_or_write(self, data: bytes):
+        if self._candidate is not None:
+            if self._candidate[1].read(len(data)) == data:
+                self._matched += len(data)
+                return
+            self._spill()
+        self._out.write(data)
+    
+    def _spill(self):
+        """与候选文件出现差异：把已比较过的相同部分从候选文件复制到输出文件"""
+        candidate_ref = self._candidate[1]
+        self._candidate = None
+        self._open()
+        with candidate_ref:
+            candidate_ref.seek(0)
+            remaining = self._matched
+            while remaining:
+                chunk = candidate_ref.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise OSError(f"候选文件在比较过程中被截断: {candidate_ref.name}")
+                self._out.write(chunk)
+                remaining -= len(chunk)
+    
+    def close(self):
+        if self._pending is not None:
+            self._resolve_prefix()
+        if self._candidate is not None:
+            candidate_path, candidate_ref = self._candidate
+            if candidate_ref.read(1):
+                self._spill()  # 候选文件更长
+            else:
+                candidate_ref.close()
+                self._candidate = None
+                self.duplicate_of = candidate_path
+        if self._out is not None:
+            self._out.close()
+        if self._hasher is not None:
+            self.digest = self._hasher.hexdigest()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._candidate is not None:
+                self._candidate[1].close()
+            if self._out is not None:
+                self._out.close()
+        return False
+
+
+class PipelineStage:
+    """流水线中的一个阶段：线程数和累计忙碌时间（不含在队列上等待的时间）"""
+    
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def timer(self):
+        """累计代码块的执行时间"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.busy_seconds += elapsed
+    
+    def utilisation(self, wall_seconds: float) -> float:
+        """利用率：忙碌时间 / (运行时间 × 线程数)"""
+        return min(1.0, self.busy_seconds / max(wall_seconds * self.workers, 1e-6))
+
+
+class ExtractionPipeline:
+    """
+    流水线解压：读取、解压、写出三个阶段由各自的线程执行，阶段之间用有界队列衔接
+    
+    - 读取线程：检查解压日志和格式，把不超过 PIPELINE_PREFETCH_BYTES 的压缩文件整体读入内存
+    - 解压线程：逐成员解压并按块发往写出线程；bz2/xz 在进程池中解压
+    - 写出线程：以大缓冲区写出成员，压缩文件写完后移动到目标目录并删除源文件
+    
+    同一个压缩文件的数据总是发往同一个写出线程，保证按顺序写出。
+    submit 返回的 Future 在压缩文件处理完成后设置结果，可直接用 concurrent.futures.wait 等待
+    """
+    
+    def __init__(self, extractor: 'ArchiveExtractor', readers: int = PIPELINE_READERS,
+                 writers: int = PIPELINE_WRITERS):
+        self.extractor = extractor
+        self.read_stage = PipelineStage('读取', readers)
+        self.decode_stage = PipelineStage('解压', extractor.max_threads)
+        self.write_stage = PipelineStage('写出', writers)
+        
+        # 在途的压缩文件数量由调用方限制，读取队列无需设置上限
+        self.read_queue = queue.Queue()
+        self.decode_queue = queue.Queue(maxsize=extractor.max_threads * 2)
+        self.write_queues = [queue.Queue(maxsize=PIPELINE_WRITE_QUEUE_CHUNKS) for _ in range(writers)]
+        
+        self._threads: List[threading.Thread] = []
+        self._next_writer = 0
+        self._process_pool = None
+        self._pool_lock = threading.Lock()
+        self._start_time = 0.0
+    
+    @property
+    def stages(self) -> List[PipelineStage]:
+        return [self.read_stage, self.decode_stage, self.write_stage]
+    
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        for stage, target in ((self.read_stage, self._read_worker),
+                              (self.decode_stage, self._decode_worker)):
+            for _ in range(stage.workers):
+                self._start_thread(target)
+        for index in range(self.write_stage.workers):
+            self._start_thread(self._write_worker, index)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 按阶段顺序结束线程，保证上游已发出的数据全部被下游处理
+        readers = self._threads[:self.read_stage.workers]
+        decoders = self._threads[self.read_stage.workers:-self.write_stage.workers]
+        writers = self._threads[-self.write_stage.workers:]
+        for threads, queues in ((readers, [self.read_queue] * len(readers)),
+                                (decoders, [self.decode_queue] * len(decoders)),
+                                (writers, self.write_queues)):
+            for work_queue in queues:
+                work_queue.put(None)
+            for thread in threads:
+                thread.join()
+        
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+        self.report()
+        return False
+    
+    def _start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+    
+    def submit(self, archive_path: str, space_token=None) -> Future:
+        """
+        提交一个压缩文件
+        
+        Args:
+            archive_path: 压缩文件路径
+            space_token: 磁盘空间预留凭据，处理完成后释放
+            
+        Returns:
+            结果为 (成功与否, 解压的文件数量) 的 Future
+        """
+        future = Future()
+        writer = self._next_writer
+        self._next_writer = (self._next_writer + 1) % len(self.write_queues)
+        self.read_queue.put({'archive': archive_path, 'token': space_token, 'writer': writer,
+                             'future': future})
+        return future
+    
+    def report(self) -> Dict[str, float]:
+        """输出各阶段利用率，利用率最高的阶段就是当前机器上的瓶颈"""
+        wall = time.perf_counter() - self._start_time
+        utilisation = {stage.name: stage.utilisation(wall) for stage in self.stages}
+        self.extractor.stage_utilisation = utilisation
+        summary = ', '.join(f"{stage.name} {utilisation[stage.name]:.0%}（{stage.workers} 线程）"
+                            for stage in self.stages)
+        bottleneck = max(self.stages, key=lambda stage: utilisation[stage.name])
+        self.extractor.log(f"流水线各阶段利用率: {summary}，瓶颈: {bottleneck.name}")
+        return utilisation
+    
+    def _finish(self, task: Dict, success: bool, files_extracted: int):
+        """统计结果、删除源文件、释放预留空间，并设置 Future 的结果"""
+        extractor = self.extractor
+        try:
+            extractor._complete_archive(task['archive'], success, files_extracted)
+            task['future'].set_result((success, files_extracted))
+        except Exception as e:
+            task['future'].set_exception(e)
+        finally:
+            if task['token'] is not None:
+                extractor.disk_budget.release(task['token'])
+    
+    def _get_process_pool(self):
+        with self._pool_lock:
+            if self._process_pool is None:
+                # 导入 ProcessPoolExecutor 会加载 multiprocessing，只在真正需要时导入
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # 进程池在读取/解压/写出线程已经运行时才创建，fork 会复制其他线程持有的锁而可能死锁，
+                # 因此使用 spawn 启动子进程
+                self._process_pool = ProcessPoolExecutor(max_workers=self.extractor.max_threads,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+            return self._process_pool
+    
+    def _read_worker(self):
+        """读取阶段：解压前检查，并把小压缩文件整体读入内存"""
+        extractor = self.extractor
+        while True:
+            task = self.read_queue.get()
+            if task is None:
+                return
+            archive_path = task['archive']
+            try:
+                with self.read_stage.timer():
+                    result, job = extractor._begin_extraction(archive_path)
+                    data = None
+                    if (job is not None and job['fmt'] not in ('rar', '7z')
+                            and os.path.getsize(archive_path) <= PIPELINE_PREFETCH_BYTES):
+                        with open(archive_path, 'rb') as archive_ref:
+                            data = archive_ref.read()
+            except Exception as e:
+                extractor.log(f"读取压缩文件失败: {archive_path} - {str(e)}", "ERROR")
+                self._finish(task, False, 0)
+                continue
+            
+            if job is None:
+                self._finish(task, *result)
+                continue
+            task['job'] = job
+            self.decode_queue.put((task, data))
+    
+    def _decode_worker(self):
+        """解压阶段：逐成员解压，数据块发往该压缩文件对应的写出线程"""
+        extractor = self.extractor
+        while True:
+            item = self.decode_queue.get()
+            if item is None:
+                return
+            task, data = item
+            job = task['job']
+            write_queue = self.write_queues[task['writer']]
+            task['temp_dir'] = tempfile.mkdtemp(prefix='archive_extractor_')
+            try:
+                if job['fmt'] in ('rar', '7z'):
+                    # 这两种格式依赖第三方库整体解压，直接在解压线程内写出
+                    with self.decode_stage.timer():
+                        success = extractor.format_handlers[job['fmt']](job['archive'], task['temp_dir'])
+                else:
+                    self._decode_members(task, data, write_queue)
+                    success = True
+            except Exception as e:
+                success = extractor._extract_failed(job['fmt'].upper(), job['archive'], e)
+            write_queue.put(('done', task, success))
+    
+    def _decode_members(self, task: Dict, data: Optional[bytes], write_queue: queue.Queue):
+        extractor = self.extractor
+        archive_path = task['archive']
+        fmt = task['job']['fmt']
+        guard = extractor._new_guard(archive_path)
+        members = None
+        
+        if data is not None and fmt in PIPELINE_PROCESS_FORMATS:
+            with self.decode_stage.timer():
+                try:
+                    raw = self._get_process_pool().submit(
+                        _decompress_in_process, fmt, data, PIPELINE_PROCESS_MAX_OUTPUT).result()
+                except Exception as e:
+                    extractor.log(f"进程池解压失败，改为线程内解压: {archive_path} - {str(e)}", "DEBUG")
+                    raw = None
+            if raw is not None:
+                if fmt.startswith('tar.'):
+                    fmt, data = 'tar', raw
+                else:
+                    output_name = extractor._decompressed_name(archive_path, fmt)
+                    selected = extractor.is_member_selected(output_name)
+                    members = iter([(output_name, io.BytesIO(raw), None, None)] if selected else [])
+        
+        if members is None:
+            members = extractor._iter_member_streams(archive_path, fmt, guard, data)
+        
+        while True:
+            with self.decode_stage.timer():
+                member = next(members, None)
+            if member is None:
+                return
+            name, stream, mtime, mode = member
+            with stream:
+                guard.add_member()
+                write_queue.put(('open', task, name))
+                while True:
+                    with self.decode_stage.timer():
+                        chunk = stream.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    guard.add_bytes(len(chunk))
+                    write_queue.put(('data', task, chunk))
+                write_queue.put(('close', task, (mtime, mode)))
+    
+    def _write_worker(self, index: int):
+        """写出阶段：写出成员文件；压缩文件全部写完后移动到目标目录、删除源文件"""
+        extractor = self.extractor
+        write_queue = self.write_queues[index]
+        open_files = {}  # {压缩文件: (输出路径, 文件对象)}
+        failed = set()
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            kind, task, payload = item
+            archive_path = task['archive']
+            
+            with self.write_stage.timer():
+                if kind == 'done':
+                    self._write_done(task, payload and archive_path not in failed,
+                                     open_files.pop(archive_path, (None, None))[1])
+                    failed.discard(archive_path)
+                    continue
+                if archive_path in failed:
+                    continue
+                
+                try:
+                    if kind == 'open':
+                        output_path = extractor._safe_member_path(task['temp_dir'], payload)
+                        out_ref = None
+                        if output_path is None:
+                            extractor.log(f"跳过路径无效的成员: {payload}", "WARNING")
+                        else:
+                            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                            out_ref = MemberOutput(output_path, extractor.content_index,
+                                                   PIPELINE_WRITE_BUFFER)
+                        open_files[archive_path] = (output_path, out_ref)
+                    elif kind == 'data':
+                        out_ref = open_files[archive_path][1]
+                        if out_ref is not None:
+                            out_ref.write(payload)
+                    elif kind == 'close':
+                        output_path, out_ref = open_files.pop(archive_path)
+                        if out_ref is not None:
+                            out_ref.close()
+                            extractor._record_member_output(task['temp_dir'], out_ref)
+                            mtime, mode = payload
+                            if out_ref.duplicate_of is None:
+                                if mode is not None:
+                                    os.chmod(output_path, mode & 0o777)
+                                if mtime is not None:
+                                    os.utime(output_path, (mtime, mtime))
+                except Exception as e:
+                    extractor.log(f"写出解压文件失败: {archive_path} - {str(e)}", "ERROR")
+                    failed.add(archive_path)
+                    out_ref = open_files.pop(archive_path, (None, None))[1]
+                    if out_ref is not None:
+                        out_ref.close()
+    
+    def _write_done(self, task: Dict, success: bool, out_ref):
+        """压缩文件的全部成员已写出（或解压失败）：移动结果、清理临时目录"""
+        if out_ref is not None:
+            out_ref.close()
+        files_extracted = 0
+        try:
+            if success:
+                success, files_extracted = self.extractor._finish_extraction(task['job'], task['temp_dir'])
+        except Exception as e:
+            self.extractor.log(f"解压过程中发生错误: {task['archive']} - {str(e)}", "ERROR")
+            success = False
+        finally:
+            self.extractor._take_member_outputs(task['temp_dir'])
+            shutil.rmtree(task['temp_dir'], ignore_errors=True)
+        self._finish(task, success, files_extracted)
 
 
 class ArchiveExtractor:
     def __init__(self, target_path: str, log_file: str = None, dry_run: bool = False, 
-                 max_threads: int = None, delete_after_extract: bool = True):
+                 max_threads: int = None, delete_after_extract: bool = True,
+                 include_patterns: List[str] = None, exclude_patterns: List[str] = None,
+                 journal_file: str = None, check_disk_space: bool = True,
+                 min_free_mb: int = 64, max_total_mb: int = 0, max_ratio: float = 0,
+                 max_members: int = 100000, max_nesting_depth: int = 8, pipeline: bool = False,
+                 dedup: str = 'off', layout: str = 'flat', passwords: List[str] = None,
+                 backend: str = 'auto', executor: ThreadPoolExecutor = None,
+                 sniff_extensionless: bool = False):
         """
         初始化压缩文件解压工具
         
@@ -76,31 +1330,125 @@ class ArchiveExtractor:
             dry_run: 预览模式，不实际执行解压和删除操作
             max_threads: 最大线程数（默认使用CPU核心数）
             delete_after_extract: 解压后删除压缩文件
+            include_patterns: 只解压匹配这些通配符的成员（匹配完整路径或文件名）
+            exclude_patterns: 跳过匹配这些通配符的成员
+            journal_file: 解压状态日志路径（可选），用于崩溃后断点续传
+            check_disk_space: 开始解压前按预计解压大小检查并预留磁盘空间
+            min_free_mb: 临时目录和目标目录所在文件系统始终保留的剩余空间（MB）
+            max_total_mb: 单个压缩文件解压后的总大小上限（MB，0表示不限制）
+            max_ratio: 单个压缩文件的解压比上限（默认0表示不限制，解压超过1GB后才检查）
+            max_members: 单个压缩文件的成员数量上限（0表示不限制）
+            max_nesting_depth: 压缩文件嵌套深度上限（0表示不限制）
+            pipeline: 使用读取/解压/写出分阶段的流水线模式
+            dedup: 内容去重方式（off/skip/hardlink），内容与输出目录中已有文件相同的成员跳过或硬链接
+            layout: 输出布局（flat/per-archive/mirror）
+            passwords: 加密压缩文件的候选密码列表
+            backend: 解压后端（auto 优先使用本机的 7z/bsdtar 程序，python 只使用 Python 库）
+            executor: 共用的线程池（批量模式下多个目标共用，由调用方关闭），默认每批创建一个
+            sniff_extensionless: 没有扩展名的文件也读取文件头识别格式（默认只识别压缩文件扩展名）
         """
+        if dedup not in DEDUP_MODES:
+            raise ValueError(f"不支持的去重方式: {dedup}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"不支持的输出布局: {layout}")
+        if backend not in BACKENDS:
+            raise ValueError(f"不支持的解压后端: {backend}")
+
         self.target_path = os.path.abspath(target_path)
         self.dry_run = dry_run
         self.delete_after_extract = delete_after_extract
         self.max_threads = max_threads or min(8, os.cpu_count() or 4)
-        self.log_file = log_file or os.path.join(os.path.dirname(__file__), "archive_extractor.log")
-        
-        # 支持的压缩文件扩展名
-        self.supported_extensions = {
-            '.zip': self._extract_zip,
-            '.tar': self._extract_tar,
-            '.gz': self._extract_gzip,
-            '.tgz': self._extract_targz,
-            '.bz2': self._extract_bzip2,
-            '.tbz2': self._extract_tarbz2,
+        self.log_file = log_file or DEFAULT_LOG_FILE
+        self.include_patterns = list(include_patterns or [])
+        self.exclude_patterns = list(exclude_patterns or [])
+        self.has_member_filters = bool(self.include_patterns or self.exclude_patterns)
+        self.sniff_extensionless = sniff_extensionless
+        # 选择性解压只写出部分成员，删除源文件会永久丢失未选中的成员，因此始终保留源文件
+        if self.has_member_filters:
+            self.delete_after_extract = False
+        self.pipeline = pipeline
+        self.executor = executor
+        # 最近一次流水线批次各阶段的利用率 {阶段名称: 0~1}
+        self.stage_utilisation: Dict[str, float] = {}
+        
+        # 内容去重索引，以及各解压目录中已写出成员的哈希 {解压目录: {相对路径: MemberOutput}}
+        self.dedup = dedup
+        self.content_index = ContentIndex() if dedup != 'off' else None
+        self._member_outputs: Dict[str, Dict[str, MemberOutput]] = {}
+        self._member_outputs_lock = threading.Lock()
+        
+        # 输出布局和同名文件的路径分配
+        self.layout = layout
+        self.names = NameAllocator(self.target_path)
+        
+        # 候选密码、按压缩文件系列缓存的成功密码，以及正在解压的压缩文件使用的密码
+        self.passwords = list(passwords or [])
+        self._family_passwords: Dict[Tuple[str, str], str] = {}
+        self._archive_passwords: Dict[str, str] = {}
+        self._password_lock = threading.Lock()
+        
+        # 含有未解压成员（链接、设备文件）的压缩文件：解压成功后也保留源文件
+        self._incomplete_archives: Set[str] = set()
+        self._incomplete_lock = threading.Lock()
+        
+        # 外部解压程序 {格式: 外部程序}，第一次用到时才探测（`7z i` 需要启动进程，只解压 zip/tar 时不探测）；
+        # 多个压缩文件同时解压时平分CPU核心，每个 7z 进程的线程数相应减少
+        self.backend = backend
+        self._external_tools: Optional[Dict[str, ExternalTool]] = None if backend == 'auto' else {}
+        self._external_lock = threading.Lock()
+        may_use_external = backend == 'auto' and external_programs_available()
+        self.external_threads = max(1, (os.cpu_count() or 1) // self.max_threads)
+        
+        # 支持的压缩格式（由文件头识别）及对应的解压函数
+        self.format_handlers = {
+            'zip': self._extract_zip,
+            'tar': self._extract_tar,
+            'tar.gz': self._extract_targz,
+            'gz': self._extract_gzip,
+            'tar.bz2': self._extract_tarbz2,
+            'bz2': self._extract_bzip2,
+            'tar.xz': self._extract_tarxz,
         }
         
-        if RAR_SUPPORT:
-            self.supported_extensions['.rar'] = self._extract_rar
+        if RAR_SUPPORT or may_use_external:
+            self.format_handlers['rar'] = self._extract_rar
+        
+        if SEVENZIP_SUPPORT or may_use_external:
+            self.format_handlers['7z'] = self._extract_7z
         
-        if SEVENZIP_SUPPORT:
-            self.supported_extensions['.7z'] = self._extract_7z
+        self.format_handlers['xz'] = self._extract_xz
         
-        # 设置日志
-        self.setup_logging()
+        if ZSTD_SUPPORT:
+            self.format_handlers['tar.zst'] = self._extract_tarzst
+            self.format_handlers['zst'] = self._extract_zstd
+        
+        if LZ4_SUPPORT:
+            self.format_handlers['tar.lz4'] = self._extract_tarlz4
+            self.format_handlers['lz4'] = self._extract_lz4
+        
+        # 成员清单读取函数（只读取中央目录/文件头，不解压数据）
+        self.member_listers = {
+            'zip': self._list_zip,
+            'tar': self._list_tar,
+            'tar.gz': self._list_tar,
+            'gz': self._list_gzip,
+            'tar.bz2': self._list_tar,
+            'bz2': self._list_bzip2,
+            'tar.xz': self._list_tar,
+            'xz': self._list_single_file,
+            'tar.zst': self._list_tar,
+            'zst': self._list_zstd,
+            'tar.lz4': self._list_tar,
+            'lz4': self._list_lz4,
+            'rar': self._list_rar,
+            '7z': self._list_7z,
+        }
+        
+        # 格式识别缓存：{路径: ((文件大小, 修改时间), 格式)}
+        self._format_cache: Dict[str, Tuple[Tuple[int, int], Optional[str]]] = {}
+        
+        # 日志只写入模块 logger，由命令行入口（setup_logging）或库调用方配置输出
+        self.logger = logger
         
         # 统计信息
         self.stats = {
@@ -109,36 +1457,154 @@ class ArchiveExtractor:
             'files_extracted': 0,
             'archives_deleted': 0,
             'space_freed': 0,
+            'bytes_extracted': 0,
+            'archives_deferred': 0,
+            'archives_skipped_no_space': 0,
+            'archives_rejected': 0,
+            'password_failures': 0,
+            'duplicates_skipped': 0,
+            'duplicates_linked': 0,
+            'duplicate_bytes': 0,
             'errors_encountered': 0
         }
         
         # 用于跟踪已处理的文件，避免重复处理
         self.processed_files: Set[str] = set()
+        self._processed_lock = threading.Lock()
+        # 因磁盘空间不足跳过的压缩文件：只记录一次，后续轮次不再尝试
+        self.skipped_no_space: Set[str] = set()
+        
+        # 每个线程独立的计数器（线程内累加无需加锁），批次结束时合并到 self.stats
+        self._local = threading.local()
+        self._worker_counters: List[Tuple[threading.Thread, Dict[str, int]]] = []
+        self._counters_lock = threading.Lock()
+        
+        # 压缩炸弹防护限制
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.max_ratio = max_ratio
+        self.max_members = max_members
+        self.max_nesting_depth = max_nesting_depth
+        # 解压出的嵌套压缩文件的深度 {路径: 深度}，原始压缩文件深度为0
+        self._archive_depths: Dict[str, int] = {}
+        
+        # 磁盘空间预算（临时目录和目标目录）
+        self.temp_root = tempfile.gettempdir()
+        self.disk_budget = DiskSpaceBudget(min_free_mb * 1024 * 1024) if check_disk_space else None
+        
+        # 持久化的解压状态日志（预览模式不记录）
+        self.journal = ExtractionJournal(journal_file) if journal_file and not dry_run else None
     
     def setup_logging(self):
-        """设置日志配置"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S',
-            handlers=[
-                logging.FileHandler(self.log_file, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        """设置日志配置（命令行使用：写入 self.log_file 和控制台）"""
+        configure_logging(self.log_file)
+    
+    def share_state(self, other: 'ArchiveExtractor'):
+        """
+        与另一个解压工具共用缓存和资源（批量模式）
+        
+        共用格式识别缓存、按系列缓存的密码、磁盘空间预算和解压状态日志，
+        同一进程处理多个目标文件夹时不必为每个目标重新建立
+        """
+        self._format_cache = other._format_cache
+        self._family_passwords = other._family_passwords
+        self._password_lock = other._password_lock
+        self.disk_budget = other.disk_budget
+        self.journal = other.journal
     
     def log(self, message: str, level: str = "INFO"):
-        """记录日志"""
+        """记录日志；ERROR 级别的消息同时作为当前线程最近一次的错误（用于 ExtractionResult.error）"""
         if level == "INFO":
             self.logger.info(message)
         elif level == "WARNING":
             self.logger.warning(message)
         elif level == "ERROR":
+            self._local.last_error = message
             self.logger.error(message)
         elif level == "DEBUG":
             self.logger.debug(message)
     
+    @staticmethod
+    def _sniff_format(file_path: str) -> Optional[str]:
+        """
+        根据文件头魔数识别压缩格式
+        
+        对 gz/bz2/xz/zst/lz4 额外解压开头的一个TAR块，判断是否为 tar.gz/tar.xz 等，
+        以便直接交给流式 tarfile 单次解压
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            格式名称，无法识别时返回None
+        """
+        with open(file_path, 'rb') as f:
+            header = f.read(SNIFF_SIZE)
+        
+        fmt = None
+        for offset, magic, name in ARCHIVE_SIGNATURES:
+            if header[offset:offset + len(magic)] == magic:
+                fmt = name
+                break
+        
+        if fmt == 'bz2' and not header.startswith(b'BZh'):
+            fmt = None
+        
+        opener = STREAM_OPENERS.get(fmt)
+        if opener is not None:
+            try:
+                with opener(file_path) as stream:
+                    payload = stream.read(SNIFF_SIZE)
+                if payload[257:262] == b'ustar':
+                    fmt = 'tar.' + fmt
+            except Exception:
+                # 数据损坏时仍按单文件格式处理，由解压步骤报告错误
+                pass
+        
+        return fmt
+    
+    def is_candidate(self, file_path: str) -> bool:
+        """
+        按扩展名判断是否需要读取文件头：扩展名在压缩文件白名单中，
+        或开启 sniff_extensionless 时没有扩展名（不读取文件内容）
+        """
+        suffix = Path(file_path).suffix.lower()
+        if suffix in ARCHIVE_EXTENSIONS:
+            return True
+        return self.sniff_extensionless and not suffix
+    
+    def detect_archive_format(self, file_path: str) -> Optional[str]:
+        """
+        识别文件的压缩格式（结果按路径缓存，文件大小或修改时间变化后重新识别）
+        
+        只识别 is_candidate 通过的文件，扩展名决定是否读取文件头，文件头决定实际格式
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            格式名称（如 'zip'、'tar.gz'），不是压缩文件时返回None
+        """
+        if not self.is_candidate(file_path):
+            return None
+        
+        try:
+            stat = os.stat(file_path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            cached = self._format_cache.get(file_path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            
+            fmt = self._sniff_format(file_path) if stat.st_size > 0 else None
+            # 没有 ustar 魔数的老式 V7 TAR 只能依靠扩展名识别
+            if fmt is None and Path(file_path).suffix.lower() == '.tar':
+                fmt = 'tar'
+        except OSError as e:
+            self.log(f"读取文件头失败: {file_path} - {str(e)}", "DEBUG")
+            return None
+        
+        self._format_cache[file_path] = (signature, fmt)
+        return fmt
+    
     def is_archive_file(self, file_path: str) -> bool:
         """
         检查文件是否为支持的压缩文件
@@ -149,8 +1615,15 @@ class ArchiveExtractor:
         Returns:
             bool: 是否为压缩文件
         """
-        ext = Path(file_path).suffix.lower()
-        return ext in self.supported_extensions
+        return self.detect_archive_format(file_path) in self.format_handlers
+    
+    @staticmethod
+    def _decompressed_name(archive_path: str, fmt: str) -> str:
+        """单文件压缩格式解压后的文件名：去掉压缩扩展名，没有扩展名时追加 .out"""
+        path = Path(archive_path)
+        if path.suffix.lower() in SINGLE_FILE_SUFFIXES.get(fmt, ()):
+            return path.stem
+        return path.name + '.out'
     
     def scan_archive_files(self) -> List[str]:
         """
@@ -161,14 +1634,24 @@ class ArchiveExtractor:
         """
         self.log("开始扫描压缩文件...")
         archive_files = []
+        missing_formats = set()
         
         try:
             for root, dirs, files in os.walk(self.target_path):
                 for file in files:
                     file_path = os.path.join(root, file)
-                    if self.is_archive_file(file_path):
+                    # 先按扩展名筛选，其余文件不打开
+                    if not self.is_candidate(file_path):
+                        continue
+                    fmt = self.detect_archive_format(file_path)
+                    if fmt in self.format_handlers:
                         archive_files.append(file_path)
                         self.stats['total_archives_found'] += 1
+                    elif fmt in MISSING_BACKENDS:
+                        missing_formats.add(fmt)
+            
+            for fmt in sorted(missing_formats):
+                self.log(self._unsupported_message(None, fmt), "WARNING")
             
             self.log(f"扫描完成，共发现 {self.stats['total_archives_found']} 个压缩文件")
             return archive_files
@@ -177,161 +1660,1055 @@ class ArchiveExtractor:
             self.log(f"扫描压缩文件时发生错误: {str(e)}", "ERROR")
             return []
     
-    def _extract_zip(self, archive_path: str, extract_to: str) -> bool:
-        """解压ZIP文件"""
+    @property
+    def external_tools(self) -> Dict[str, ExternalTool]:
+        """外部解压程序 {格式: 外部程序}（第一次访问时探测并记录日志）"""
+        with self._external_lock:
+            if self._external_tools is None:
+                self._external_tools = probe_external_tools()
+                if self._external_tools:
+                    self.log("外部解压程序: " + ", ".join(f"{fmt}={tool.path}"
+                                                      for fmt, tool in sorted(self._external_tools.items())))
+            return self._external_tools
+    
+    @external_tools.setter
+    def external_tools(self, tools: Dict[str, ExternalTool]):
+        self._external_tools = tools
+    
+    @staticmethod
+    def _unsupported_message(archive_path: Optional[str], fmt: Optional[str]) -> str:
+        """不支持的格式的提示信息；格式已识别但缺少可选库时给出安装命令"""
+        package = MISSING_BACKENDS.get(fmt)
+        if package is None:
+            return f"不支持的压缩格式: {archive_path}"
+        target = archive_path or f"{fmt} 格式的文件"
+        return f"未安装{package}库，无法处理: {target}（安装命令: pip install {package}）"
+    
+    def _count(self, key: str, amount: int = 1):
+        """累加当前线程的计数器（每个线程只写自己的字典，无需加锁）"""
+        counters = getattr(self._local, 'counters', None)
+        if counters is None:
+            counters = self._local.counters = {}
+            with self._counters_lock:
+                self._worker_counters.append((threading.current_thread(), counters))
+        counters[key] = counters.get(key, 0) + amount
+    
+    def _pending_count(self, key: str) -> int:
+        """读取各线程尚未合并的计数之和（用于实时进度）"""
+        with self._counters_lock:
+            return sum(counters.get(key, 0) for _, counters in self._worker_counters)
+    
+    def merge_worker_stats(self):
+        """
+        将各线程的计数器合并到 self.stats 并清零
+        
+        已结束的线程（线程池关闭后）不会再计数，合并后去掉它们的计数器，列表不随线程池的创建次数增长
+        """
+        with self._counters_lock:
+            for thread, counters in self._worker_counters:
+                for key in list(counters):
+                    self.stats[key] = self.stats.get(key, 0) + counters[key]
+                    counters[key] = 0
+            self._worker_counters = [(thread, counters) for thread, counters in self._worker_counters
+                                     if thread.is_alive()]
+    
+    def is_member_selected(self, member_name: str) -> bool:
+        """
+        检查压缩包成员是否满足 --include/--exclude 过滤条件
+        
+        通配符同时匹配成员的完整路径和文件名，例如 "*.pdf" 和 "docs/*" 均可使用
+        
+        Args:
+            member_name: 压缩包内的成员路径
+            
+        Returns:
+            bool: 是否需要解压该成员
+        """
+        if not self.has_member_filters:
+            return True
+        
+        name = member_name.replace('\\', '/').rstrip('/')
+        base_name = name.rsplit('/', 1)[-1]
+        
+        def matches(patterns: List[str]) -> bool:
+            return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(base_name, p) for p in patterns)
+        
+        if self.include_patterns and not matches(self.include_patterns):
+            return False
+        if self.exclude_patterns and matches(self.exclude_patterns):
+            return False
+        return True
+    
+    @staticmethod
+    def _member_record(name: str, size: Optional[int], compressed_size: Optional[int],
+                       crc: Optional[int]) -> Dict:
+        """构造成员清单记录，CRC 以8位十六进制字符串表示"""
+        return {
+            'name': name,
+            'size': size,
+            'compressed_size': compressed_size,
+            'crc': f"{crc:08x}" if crc is not None else None,
+        }
+    
+    def _list_zip(self, archive_path: str) -> List[Dict]:
+        """读取ZIP中央目录"""
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            return [self._member_record(info.filename, info.file_size, info.compress_size, info.CRC)
+                    for info in zip_ref.infolist() if not info.is_dir()]
+    
+    def _list_tar(self, archive_path: str) -> List[Dict]:
+        """读取TAR文件头（TAR没有中央目录，也不记录压缩大小和CRC）"""
+        compression = self.detect_archive_format(archive_path).rpartition('.')[2]
+        if compression in ('zst', 'lz4'):
+            with STREAM_OPENERS[compression](archive_path) as stream:
+                with tarfile.open(fileobj=stream, mode='r|') as tar_ref:
+                    return [self._member_record(member.name, member.size, None, None)
+                            for member in tar_ref if member.isfile()]
+        with tarfile.open(archive_path, 'r|*') as tar_ref:
+            return [self._member_record(member.name, member.size, None, None)
+                    for member in tar_ref if member.isfile()]
+    
+    def _list_gzip(self, archive_path: str) -> List[Dict]:
+        """读取GZIP尾部的CRC32和原始大小（ISIZE，模 2^32），无需解压"""
+        compressed_size = os.path.getsize(archive_path)
+        size = crc = None
+        if compressed_size >= 18:
+            with open(archive_path, 'rb') as f:
+                f.seek(-8, os.SEEK_END)
+                trailer = f.read(8)
+            crc = int.from_bytes(trailer[:4], 'little')
+            size = int.from_bytes(trailer[4:], 'little')
+        return [self._member_record(self._decompressed_name(archive_path, 'gz'), size, compressed_size, crc)]
+    
+    def _list_single_file(self, archive_path: str, size: Optional[int] = None) -> List[Dict]:
+        """单文件压缩格式（BZIP2/XZ等）的文件头没有可直接读取的原始大小时，只输出压缩大小"""
+        fmt = self.detect_archive_format(archive_path)
+        return [self._member_record(self._decompressed_name(archive_path, fmt), size,
+                                    os.path.getsize(archive_path), None)]
+    
+    def _list_bzip2(self, archive_path: str) -> List[Dict]:
+        """BZIP2没有记录原始大小的文件头，只输出压缩大小"""
+        return self._list_single_file(archive_path)
+    
+    def _list_zstd(self, archive_path: str) -> List[Dict]:
+        """读取ZSTD帧头中的原始大小（压缩时未写入则为空）"""
+        with open(archive_path, 'rb') as f:
+            header = f.read(18)
+        content_size = zstandard.frame_content_size(header)
+        return self._list_single_file(archive_path, content_size if content_size >= 0 else None)
+    
+    def _list_lz4(self, archive_path: str) -> List[Dict]:
+        """读取LZ4帧头中的原始大小（压缩时未写入则为空）"""
+        with open(archive_path, 'rb') as f:
+            header = f.read(19)
+        content_size = lz4_frame.get_frame_info(header).get('content_size') or None
+        return self._list_single_file(archive_path, content_size)
+    
+    def _list_rar(self, archive_path: str) -> List[Dict]:
+        """读取RAR文件头"""
+        if not RAR_SUPPORT:
+            if 'rar' not in self.external_tools:
+                self.log(self._unsupported_message(archive_path, 'rar'), "WARNING")
+                return []
+            return self._list_external(archive_path, self.external_tools['rar'])
+        with rarfile.RarFile(archive_path, 'r') as rar_ref:
+            return [self._member_record(info.filename, info.file_size, info.compress_size, info.CRC)
+                    for info in rar_ref.infolist() if not info.isdir()]
+    
+    def _list_7z(self, archive_path: str) -> List[Dict]:
+        """读取7z文件头（固实压缩包的单个成员没有独立的压缩大小）"""
+        if not SEVENZIP_SUPPORT:
+            if '7z' not in self.external_tools:
+                self.log(self._unsupported_message(archive_path, '7z'), "WARNING")
+                return []
+            return self._list_external(archive_path, self.external_tools['7z'])
+        with py7zr.SevenZipFile(archive_path, 'r') as sevenz_ref:
+            return [self._member_record(info.filename, info.uncompressed, info.compressed, info.crc32)
+                    for info in sevenz_ref.list() if not info.is_directory]
+    
+    def _list_external(self, archive_path: str, tool: ExternalTool, password: str = None) -> List[Dict]:
+        """用外部程序读取成员清单（7z 使用 -slt 技术信息格式，bsdtar 使用 -tv 长格式）"""
+        if password is None:
+            password = self._archive_passwords.get(archive_path) or ''
+        records = []
+        if tool.name == '7z':
+            output = self._run_external([tool.path, 'l', '-slt', '-sccUTF-8', '-p' + password, archive_path], tool)
+            # 分隔线之前是压缩包本身的信息，之后每个成员一段，段之间以空行分隔
+            _, _, body = output.partition('\n----------\n')
+            for block in body.split('\n\n'):
+                fields = dict(line.split(' = ', 1) for line in block.splitlines() if ' = ' in line)
+                if 'Path' not in fields or fields.get('Folder') == '+' or fields.get('Attributes', '').startswith('D'):
+                    continue
+                records.append(self._member_record(
+                    fields['Path'],
+                    int(fields['Size']) if fields.get('Size') else None,
+                    int(fields['Packed Size']) if fields.get('Packed Size') else None,
+                    int(fields['CRC'], 16) if fields.get('CRC') else None))
+        else:
+            command = [tool.path, '-tvf', archive_path]
+            if password:
+                command[1:1] = ['--passphrase', password]
+            for line in self._run_external(command, tool).splitlines():
+                match = re.match(r'(\S+)\s+\d+\s+\S+\s+\S+\s+(\d+)\s+\S+\s+\d+\s+\S+\s(.+)$', line)
+                if match and not match.group(1).startswith('d'):
+                    records.append(self._member_record(match.group(3), int(match.group(2)), None, None))
+        return records
+    
+    @staticmethod
+    def _run_external(command: List[str], tool: ExternalTool) -> str:
+        """运行外部程序并返回标准输出；退出码非0时抛出 RuntimeError"""
+        import subprocess
+        completed = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True)
+        if completed.returncode != 0:
+            raise RuntimeError(_external_error(tool, completed.returncode, completed.stderr or completed.stdout))
+        return completed.stdout.decode('utf-8', errors='replace').replace('\r\n', '\n')
+    
+    def list_archive_members(self, archive_path: str) -> List[Dict]:
+        """
+        列出单个压缩文件的成员信息（不解压）
+        
+        Args:
+            archive_path: 压缩文件路径
+            
+        Returns:
+            成员记录列表，每条包含 name/size/compressed_size/crc，已应用 include/exclude 过滤
+        """
+        fmt = self.detect_archive_format(archive_path)
+        lister = self.member_listers.get(fmt)
+        if lister is None or fmt not in self.format_handlers:
+            self.log(self._unsupported_message(archive_path, fmt), "WARNING")
+            return []
+        
+        return [record for record in lister(archive_path) if self.is_member_selected(record['name'])]
+    
+    def list_archives(self, output: TextIO) -> int:
+        """
+        扫描目标文件夹并以JSONL格式输出所有压缩文件的成员清单
+        
+        Args:
+            output: 输出流，每行一个成员记录
+            
+        Returns:
+            输出的成员记录数量
+        """
+        archive_files = self.scan_archive_files()
+        
+        def safe_list(archive_path: str) -> List[Dict]:
+            try:
+                return self.list_archive_members(archive_path)
+            except Exception as e:
+                self.log(f"读取压缩文件清单失败: {archive_path} - {str(e)}", "ERROR")
+                self._count('errors_encountered')
+                return []
+        
+        records_written = 0
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            # map 保持扫描顺序，便于对比多次输出
+            for archive_path, records in zip(archive_files, executor.map(safe_list, archive_files)):
+                for record in records:
+                    output.write(json.dumps({'archive': archive_path, **record}, ensure_ascii=False) + '\n')
+                    records_written += 1
+        
+        output.flush()
+        self.merge_worker_stats()
+        self.log(f"清单输出完成，共 {len(archive_files)} 个压缩文件，{records_written} 个成员")
+        return records_written
+    
+    def _new_guard(self, archive_path: str) -> ExtractionGuard:
+        """为压缩文件创建解压限制检查器"""
+        return ExtractionGuard(archive_path, os.path.getsize(archive_path), self.max_total_bytes,
+                               self.max_ratio, self.max_members)
+    
+    def _extract_failed(self, label: str, archive_path: str, error: Exception) -> bool:
+        """记录解压失败；超出安全限制的压缩文件单独统计"""
+        if isinstance(error, ExtractionLimitExceeded):
+            self._count('archives_rejected')
+            self.log(f"疑似压缩炸弹，已中止解压{label}文件: {archive_path} - {str(error)}", "ERROR")
+        else:
+            self.log(f"解压{label}文件失败: {archive_path} - {str(error)}", "ERROR")
+        return False
+    
+    @staticmethod
+    def _safe_member_path(extract_to: str, member_name: str) -> Optional[str]:
+        """
+        计算成员的输出路径，去掉绝对路径、盘符和 '..'，防止写到解压目录之外
+        
+        Returns:
+            输出路径，成员名称中没有可用的路径部分时返回None
+        """
+        name = member_name.replace('\\', '/')
+        parts = [part for part in name.split('/') if part not in ('', '.', '..')]
+        if parts and len(parts[0]) == 2 and parts[0][1] == ':':
+            parts = parts[1:]
+        if not parts:
+            return None
+        return os.path.join(extract_to, *parts)
+    
+    def _write_member(self, source, extract_to: str, member_name: str, guard: ExtractionGuard,
+                      mtime: Optional[float] = None, mode: Optional[int] = None):
+        """
+        将成员数据流按块写出到解压目录，每块写出前检查解压限制
+        
+        Args:
+            source: 成员数据流（写完后关闭）
+            extract_to: 解压目录
+            member_name: 成员路径
+            guard: 解压限制检查器
+            mtime: 成员的修改时间（可选）
+            mode: 成员的权限位（可选）
+        """
+        with source:
+            output_path = self._safe_member_path(extract_to, member_name)
+            if output_path is None:
+                self.log(f"跳过路径无效的成员: {member_name}", "WARNING")
+                return
+            
+            guard.add_member()
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with MemberOutput(output_path, self.content_index) as out_ref:
+                while True:
+                    chunk = source.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    guard.add_bytes(len(chunk))
+                    out_ref.write(chunk)
+        
+        self._record_member_output(extract_to, out_ref)
+        if out_ref.duplicate_of is not None:
+            return
+        if mode is not None:
+            os.chmod(output_path, mode & 0o777)
+        if mtime is not None:
+            os.utime(output_path, (mtime, mtime))
+    
+    def _record_member_output(self, extract_to: str, output: MemberOutput):
+        """记录成员的内容哈希（启用去重时），移动到目标目录时使用"""
+        if self.content_index is None:
+            return
+        relative_path = os.path.relpath(output.output_path, extract_to)
+        with self._member_outputs_lock:
+            self._member_outputs.setdefault(extract_to, {})[relative_path] = output
+    
+    def _take_member_outputs(self, extract_to: str) -> Dict[str, MemberOutput]:
+        """取出并清除解压目录对应的成员哈希记录"""
+        with self._member_outputs_lock:
+            return self._member_outputs.pop(extract_to, {})
+    
+    def _place_duplicate(self, existing_path: str, target_path: str, size: int) -> bool:
+        """
+        处理内容重复的成员：skip 模式不写出，hardlink 模式在分配的路径上硬链接到已有文件
+        
+        Args:
+            existing_path: 内容相同的已有文件
+            target_path: 成员按输出布局对应的路径（尚未分配）
+            size: 成员大小
+            
+        Returns:
+            是否在输出目录中创建了该文件
+        """
+        self._count('duplicate_bytes', size)
+        if self.dedup == 'skip':
+            self._count('duplicates_skipped')
+            self.log(f"跳过重复文件: {target_path}（与 {existing_path} 内容相同）", "DEBUG")
+            return False
+        
+        self._count('duplicates_linked')
+        target_path = self.names.allocate(target_path)
+        if self.dry_run:
+            self.log(f"[预览] 将硬链接重复文件: {target_path} -> {existing_path}")
+            return True
+        
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        try:
+            os.link(existing_path, target_path)
+        except OSError as e:
+            # 跨文件系统或文件系统不支持硬链接时退回复制
+            self.log(f"无法创建硬链接，改为复制: {target_path} - {str(e)}", "DEBUG")
+            shutil.copy2(existing_path, target_path)
+        self.log(f"已链接重复文件: {target_path} -> {existing_path}")
+        self._note_output(target_path)
+        return True
+    
+    def _skip_member(self, archive_path: str, member_name: str):
+        """
+        记录不解压的链接或设备文件成员：逐个输出警告，该压缩文件解压成功后也保留源文件，成员不会丢失
+        """
+        self.log(f"跳过非普通文件成员（链接或设备文件），将保留原压缩文件: {archive_path} - {member_name}",
+                 "WARNING")
+        with self._incomplete_lock:
+            self._incomplete_archives.add(archive_path)
+    
+    def _iter_tar_members(self, tar_ref: tarfile.TarFile, archive_path: str):
+        """
+        依次产出TAR流中选中的普通文件成员
+        
+        链接和设备文件不解压：解压结果会被移动到目标目录，来自不可信压缩包的链接可能指向目录之外
+        """
+        for member in tar_ref:
+            if member.isdir():
+                continue
+            if not member.isfile():
+                if self.is_member_selected(member.name):
+                    self._skip_member(archive_path, member.name)
+                continue
+            if self.is_member_selected(member.name):
+                yield member.name, tar_ref.extractfile(member), member.mtime, member.mode
+    
+    def _iter_member_streams(self, archive_path: str, fmt: str, guard: ExtractionGuard,
+                             data: Optional[bytes] = None, use_external: bool = True):
+        """
+        依次产出压缩文件中选中成员的数据流，直接解压和流水线解压共用
+        
+        调用方必须在请求下一个成员之前读完并关闭当前数据流（TAR是顺序流）
+        
+        Args:
+            archive_path: 压缩文件路径
+            fmt: 格式名称
+            guard: 解压限制检查器（用于检查文件头声明的成员数量和大小）
+            data: 已读入内存的压缩文件内容（可选），提供时不再从磁盘读取
+            use_external: 是否允许使用外部程序（外部程序解压失败后改用 Python 库时为False）
+            
+        Yields:
+            (成员路径, 数据流, 修改时间, 权限位)
+        """
+        source = io.BytesIO(data) if data is not None else archive_path
+        password = self._archive_passwords.get(archive_path)
+        tool = self._external_tool(archive_path, fmt) if use_external else None
+        
+        if tool is not None and tool.streams and data is None:
+            yield from self._iter_bsdtar_members(archive_path, tool)
+        
+        elif fmt == 'zip':
+            with zipfile.ZipFile(source, 'r') as zip_ref:
+                if password is not None:
+                    zip_ref.setpassword(password.encode('utf-8'))
+                members = [info for info in zip_ref.infolist()
+                           if not info.is_dir() and self.is_member_selected(info.filename)]
+                guard.check_declared(len(members), sum(info.file_size for info in members))
+                for info in members:
+                    yield info.filename, zip_ref.open(info), None, None
+        
+        elif fmt == 'rar':
+            with rarfile.RarFile(archive_path, 'r') as rar_ref:
+                if password is not None:
+                    rar_ref.setpassword(password)
+                members = [info for info in rar_ref.infolist()
+                           if not info.isdir() and self.is_member_selected(info.filename)]
+                guard.check_declared(len(members), sum(info.file_size for info in members))
+                for info in members:
+                    yield info.filename, rar_ref.open(info), None, None
+        
+        elif fmt in TAR_STREAM_MODES:
+            mode, compression = TAR_STREAM_MODES[fmt]
+            if compression:
+                with STREAM_OPENERS[compression](source) as stream:
+                    with tarfile.open(fileobj=stream, mode=mode) as tar_ref:
+                        yield from self._iter_tar_members(tar_ref, archive_path)
+            else:
+                tar_ref = (tarfile.open(fileobj=source, mode=mode) if data is not None
+                           else tarfile.open(archive_path, mode))
+                with tar_ref:
+                    yield from self._iter_tar_members(tar_ref, archive_path)
+        
+        elif fmt in STREAM_OPENERS:
+            output_name = self._decompressed_name(archive_path, fmt)
+            if self.is_member_selected(output_name):
+                yield output_name, STREAM_OPENERS[fmt](source), None, None
+        
+        else:
+            raise ValueError(f"格式不支持流式读取: {fmt}")
+    
+    def _iter_bsdtar_members(self, archive_path: str, tool: ExternalTool):
+        """
+        用 bsdtar 把 7z/RAR 转换为 tar 流，依次产出其中的成员（边解压边写出，不经过临时文件）
+        
+        提前结束（如超出解压限制）时终止 bsdtar 进程
+        """
+        import subprocess
+        command = [tool.path, '-cf', '-', '--format', 'pax', '@' + archive_path]
+        
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=errors)
+            finished = False
+            try:
+                try:
+                    with tarfile.open(fileobj=process.stdout, mode='r|') as tar_ref:
+                        yield from self._iter_tar_members(tar_ref, archive_path)
+                except tarfile.ReadError:
+                    # bsdtar 出错时 tar 流不完整，以 bsdtar 的退出码和错误信息为准
+                    if process.wait() == 0:
+                        raise
+                # 读完 tar 流末尾的填充，bsdtar 才能正常退出
+                while process.stdout.read(COPY_CHUNK_SIZE):
+                    pass
+                finished = True
+            finally:
+                if not finished:
+                    process.kill()
+                process.stdout.close()
+                returncode = process.wait()
+            
+            if returncode != 0:
+                errors.seek(0)
+                raise RuntimeError(_external_error(tool, returncode, errors.read()))
+    
+    def _extract_streamed(self, archive_path: str, extract_to: str, fmt: str, label: str,
+                          use_external: bool = True) -> bool:
+        """
+        逐个成员流式解压到目录，每块数据写出前检查解压限制
+        
+        Args:
+            archive_path: 压缩文件路径
+            extract_to: 解压目标目录
+            fmt: 格式名称
+            label: 日志中显示的格式名称
+            use_external: 是否允许使用外部程序
+        """
         try:
-            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_to)
+            guard = self._new_guard(archive_path)
+            for name, stream, mtime, mode in self._iter_member_streams(archive_path, fmt, guard,
+                                                                       use_external=use_external):
+                self._write_member(stream, extract_to, name, guard, mtime, mode)
             return True
         except Exception as e:
-            self.log(f"解压ZIP文件失败: {archive_path} - {str(e)}", "ERROR")
-            return False
+            return self._extract_failed(label, archive_path, e)
     
-    def _extract_rar(self, archive_path: str, extract_to: str) -> bool:
-        """解压RAR文件"""
+    def _extract_external(self, archive_path: str, extract_to: str, fmt: str, label: str,
+                          tool: ExternalTool, library: Optional[Callable[[str, str], bool]]) -> bool:
+        """
+        用外部程序解压 7z/RAR；外部程序出错且对应的 Python 库已安装时，清空解压目录后改用 Python 库重新解压
+        
+        超出解压限制（疑似压缩炸弹）时不重试
+        
+        Args:
+            archive_path: 压缩文件路径
+            extract_to: 解压目标目录（每个压缩文件独立的临时目录）
+            fmt: 格式名称
+            label: 日志中显示的格式名称
+            tool: 外部程序
+            library: 使用 Python 库解压的函数，未安装对应的库时为None
+        """
         try:
-            with rarfile.RarFile(archive_path, 'r') as rar_ref:
-                rar_ref.extractall(extract_to)
+            guard = self._new_guard(archive_path)
+            if tool.streams:
+                for name, stream, mtime, mode in self._iter_member_streams(archive_path, fmt, guard):
+                    self._write_member(stream, extract_to, name, guard, mtime, mode)
+            else:
+                self._run_7z(archive_path, extract_to, tool, guard)
             return True
         except Exception as e:
-            self.log(f"解压RAR文件失败: {archive_path} - {str(e)}", "ERROR")
+            if library is None or isinstance(e, ExtractionLimitExceeded):
+                return self._extract_failed(label, archive_path, e)
+            self.log(f"{tool.name} 解压{label}文件失败，改用 Python 库重新解压: {archive_path} - {str(e)}",
+                     "WARNING")
+        
+        self._take_member_outputs(extract_to)
+        with os.scandir(extract_to) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+        return library(archive_path, extract_to)
+    
+    def _extract_zip(self, archive_path: str, extract_to: str) -> bool:
+        """解压ZIP文件"""
+        return self._extract_streamed(archive_path, extract_to, 'zip', 'ZIP')
+    
+    def _extract_rar(self, archive_path: str, extract_to: str) -> bool:
+        """解压RAR文件（本机的 7-Zip 程序支持 RAR 时交给它解压，失败时改用 rarfile）"""
+        tool = self._external_tool(archive_path, 'rar')
+        if tool is not None:
+            library = self._extract_rar_library if RAR_SUPPORT else None
+            return self._extract_external(archive_path, extract_to, 'rar', 'RAR', tool, library)
+        if not RAR_SUPPORT:
+            # PATH 中的程序都不支持 RAR（如只有 7za）
+            self.log(self._unsupported_message(archive_path, 'rar'), "ERROR")
             return False
+        return self._extract_rar_library(archive_path, extract_to)
+    
+    def _extract_rar_library(self, archive_path: str, extract_to: str) -> bool:
+        """用 rarfile 解压RAR文件"""
+        return self._extract_streamed(archive_path, extract_to, 'rar', 'RAR', use_external=False)
     
     def _extract_7z(self, archive_path: str, extract_to: str) -> bool:
-        """解压7z文件"""
+        """
+        解压7z文件
+        
+        py7zr 没有逐成员的流式读取接口，解压前按文件头声明的大小检查，
+        解压后再按实际写出的数据量复核；本机有 7z/bsdtar 程序时交给外部程序解压，失败时改用 py7zr
+        """
+        tool = self._external_tool(archive_path, '7z')
+        if tool is not None:
+            library = self._extract_7z_library if SEVENZIP_SUPPORT else None
+            return self._extract_external(archive_path, extract_to, '7z', '7z', tool, library)
+        if not SEVENZIP_SUPPORT:
+            self.log(self._unsupported_message(archive_path, '7z'), "ERROR")
+            return False
+        return self._extract_7z_library(archive_path, extract_to)
+    
+    def _extract_7z_library(self, archive_path: str, extract_to: str) -> bool:
+        """用 py7zr 解压7z文件"""
         try:
-            with py7zr.SevenZipFile(archive_path, 'r') as sevenz_ref:
-                sevenz_ref.extractall(extract_to)
+            guard = self._new_guard(archive_path)
+            with py7zr.SevenZipFile(archive_path, 'r',
+                                    password=self._archive_passwords.get(archive_path)) as sevenz_ref:
+                members = [info for info in sevenz_ref.list()
+                           if not info.is_directory and self.is_member_selected(info.filename)]
+                guard.check_declared(len(members), sum(info.uncompressed or 0 for info in members))
+                if self.has_member_filters:
+                    targets = [info.filename for info in members]
+                    if targets:
+                        sevenz_ref.extract(path=extract_to, targets=targets)
+                else:
+                    sevenz_ref.extractall(extract_to)
+            
+            for root, dirs, files in os.walk(extract_to):
+                for file in files:
+                    guard.add_member()
+                    guard.add_bytes(os.path.getsize(os.path.join(root, file)))
             return True
         except Exception as e:
-            self.log(f"解压7z文件失败: {archive_path} - {str(e)}", "ERROR")
-            return False
+            return self._extract_failed('7z', archive_path, e)
+    
+    def _run_7z(self, archive_path: str, extract_to: str, tool: ExternalTool, guard: ExtractionGuard):
+        """
+        用 7-Zip 程序解压到目录，出错时抛出异常
+        
+        与 py7zr 相同，解压前按成员清单声明的大小检查，解压后按实际写出的数据量复核；
+        选择性解压时把选中的成员写入列表文件交给 7z。解压出的链接不保留
+        """
+        members = [record for record in self._list_external(archive_path, tool)
+                   if self.is_member_selected(record['name'])]
+        guard.check_declared(len(members), sum(record['size'] or 0 for record in members))
+        
+        command = [tool.path, 'x', '-y', '-bd', '-sccUTF-8', f'-mmt={self.external_threads}',
+                   '-p' + (self._archive_passwords.get(archive_path) or ''), f'-o{extract_to}']
+        if not self.has_member_filters:
+            self._run_external(command + [archive_path], tool)
+        elif members:
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as list_file:
+                list_file.write('\n'.join(record['name'] for record in members))
+            try:
+                self._run_external(command + ['-scsUTF-8', archive_path, '@' + list_file.name], tool)
+            finally:
+                os.remove(list_file.name)
+        
+        for root, dirs, files in os.walk(extract_to):
+            for file in files:
+                file_path = os.path.join(root, file)
+                if os.path.islink(file_path):
+                    self._skip_member(archive_path, os.path.relpath(file_path, extract_to))
+                    os.remove(file_path)
+                    continue
+                guard.add_member()
+                guard.add_bytes(os.path.getsize(file_path))
     
     def _extract_tar(self, archive_path: str, extract_to: str) -> bool:
         """解压TAR文件"""
-        try:
-            with tarfile.open(archive_path, 'r') as tar_ref:
-                tar_ref.extractall(extract_to)
-            return True
-        except Exception as e:
-            self.log(f"解压TAR文件失败: {archive_path} - {str(e)}", "ERROR")
-            return False
+        return self._extract_streamed(archive_path, extract_to, 'tar', 'TAR')
     
     def _extract_gzip(self, archive_path: str, extract_to: str) -> bool:
         """解压GZIP文件"""
-        try:
-            output_path = os.path.join(extract_to, Path(archive_path).stem)
-            with gzip.open(archive_path, 'rb') as gz_ref:
-                with open(output_path, 'wb') as out_ref:
-                    shutil.copyfileobj(gz_ref, out_ref)
-            return True
-        except Exception as e:
-            self.log(f"解压GZIP文件失败: {archive_path} - {str(e)}", "ERROR")
-            return False
+        return self._extract_streamed(archive_path, extract_to, 'gz', 'GZIP')
     
     def _extract_targz(self, archive_path: str, extract_to: str) -> bool:
-        """解压TAR.GZ文件"""
-        try:
-            with tarfile.open(archive_path, 'r:gz') as tar_ref:
-                tar_ref.extractall(extract_to)
-            return True
-        except Exception as e:
-            self.log(f"解压TAR.GZ文件失败: {archive_path} - {str(e)}", "ERROR")
-            return False
+        """解压TAR.GZ文件（单次流式读取）"""
+        return self._extract_streamed(archive_path, extract_to, 'tar.gz', 'TAR.GZ')
     
     def _extract_bzip2(self, archive_path: str, extract_to: str) -> bool:
         """解压BZIP2文件"""
+        return self._extract_streamed(archive_path, extract_to, 'bz2', 'BZIP2')
+    
+    def _extract_tarbz2(self, archive_path: str, extract_to: str) -> bool:
+        """解压TAR.BZ2文件（单次流式读取）"""
+        return self._extract_streamed(archive_path, extract_to, 'tar.bz2', 'TAR.BZ2')
+    
+    def _extract_tarxz(self, archive_path: str, extract_to: str) -> bool:
+        """解压TAR.XZ文件（单次流式读取）"""
+        return self._extract_streamed(archive_path, extract_to, 'tar.xz', 'TAR.XZ')
+    
+    def _extract_xz(self, archive_path: str, extract_to: str) -> bool:
+        """解压XZ文件"""
+        return self._extract_streamed(archive_path, extract_to, 'xz', 'XZ')
+    
+    def _extract_tarzst(self, archive_path: str, extract_to: str) -> bool:
+        """解压TAR.ZST文件（单次流式读取）"""
+        return self._extract_streamed(archive_path, extract_to, 'tar.zst', 'TAR.ZST')
+    
+    def _extract_zstd(self, archive_path: str, extract_to: str) -> bool:
+        """解压ZSTD文件"""
+        return self._extract_streamed(archive_path, extract_to, 'zst', 'ZSTD')
+    
+    def _extract_tarlz4(self, archive_path: str, extract_to: str) -> bool:
+        """解压TAR.LZ4文件（单次流式读取）"""
+        return self._extract_streamed(archive_path, extract_to, 'tar.lz4', 'TAR.LZ4')
+    
+    def _extract_lz4(self, archive_path: str, extract_to: str) -> bool:
+        """解压LZ4文件"""
+        return self._extract_streamed(archive_path, extract_to, 'lz4', 'LZ4')
+    
+    @staticmethod
+    def _file_signature(file_path: str) -> Tuple[int, int]:
+        """文件签名：(文件大小, 修改时间纳秒)"""
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+    
+    @staticmethod
+    def _sample_hash(file_path: str, sample_size: int = JOURNAL_SAMPLE_SIZE) -> str:
+        """
+        抽样哈希：文件开头和结尾各 sample_size 字节的MD5（加上文件大小）
+        
+        压缩文件的结尾通常是中央目录或成员索引，内容变化时一般会改变；多GB的压缩文件也只读取两小块
+        """
+        md5_hash = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            md5_hash.update(str(size).encode('ascii'))
+            md5_hash.update(f.read(sample_size))
+            if size > sample_size:
+                f.seek(max(sample_size, size - sample_size))
+                md5_hash.update(f.read(sample_size))
+        return md5_hash.hexdigest()
+    
+    def _journal_record(self, archive_path: str, state: str, signature: Tuple[int, int],
+                        sample_hash: Optional[str] = None):
+        """写入解压状态日志（未启用日志时忽略）"""
+        if self.journal is not None:
+            self.journal.record(archive_path, state, signature, sample_hash)
+    
+    @staticmethod
+    def _archive_family(archive_path: str) -> Tuple[str, str]:
+        """
+        压缩文件所属的系列：所在文件夹 + 去掉数字后的文件名，
+        例如同一文件夹下的 drop_001.zip 和 drop_002.zip 属于同一系列
+        """
+        directory, name = os.path.split(os.path.abspath(archive_path))
+        return directory, re.sub(r'\d+', '', name).lower()
+    
+    def _password_tool(self, fmt: str) -> Optional[ExternalTool]:
+        """未安装对应的 Python 库（rarfile/py7zr）时用于检查和验证密码的 7-Zip 程序，没有时返回 None"""
+        if fmt not in ('rar', '7z') or fmt not in MISSING_BACKENDS:
+            return None
+        tool = self.external_tools.get(fmt)
+        return tool if tool is not None and tool.name == '7z' else None
+    
+    @staticmethod
+    def _needs_password_external(archive_path: str, tool: ExternalTool) -> bool:
+        """
+        用 7-Zip 程序检查压缩文件是否加密：以空密码列出成员（-slt），成员标记 "Encrypted = +"
+        或因文件头已加密而报告密码错误时认为已加密
+        """
+        import subprocess
+        completed = subprocess.run([tool.path, 'l', '-slt', '-sccUTF-8', '-p', archive_path],
+                                   stdin=subprocess.DEVNULL, capture_output=True)
+        if completed.returncode != 0:
+            return b'password' in (completed.stderr + completed.stdout).lower()
+        return b'\nEncrypted = +' in completed.stdout.replace(b'\r\n', b'\n')
+    
+    def _needs_password(self, archive_path: str, fmt: str) -> bool:
+        """检查压缩文件是否加密（只读取文件头）；读取失败时按未加密处理，由解压函数报告错误"""
         try:
-            output_path = os.path.join(extract_to, Path(archive_path).stem)
-            with bz2.open(archive_path, 'rb') as bz2_ref:
-                with open(output_path, 'wb') as out_ref:
-                    shutil.copyfileobj(bz2_ref, out_ref)
-            return True
+            tool = self._password_tool(fmt)
+            if tool is not None:
+                return self._needs_password_external(archive_path, tool)
+            if fmt == 'zip':
+                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                    return any(info.flag_bits & 0x1 for info in zip_ref.infolist())
+            if fmt == 'rar':
+                with rarfile.RarFile(archive_path, 'r') as rar_ref:
+                    return rar_ref.needs_password()
+            if fmt == '7z':
+                try:
+                    with py7zr.SevenZipFile(archive_path, 'r') as sevenz_ref:
+                        return sevenz_ref.needs_password()
+                except py7zr.exceptions.PasswordRequired:
+                    return True  # 文件头也已加密
         except Exception as e:
-            self.log(f"解压BZIP2文件失败: {archive_path} - {str(e)}", "ERROR")
-            return False
+            self.log(f"检查压缩文件是否加密时出错: {archive_path} - {str(e)}", "DEBUG")
+        return False
     
-    def _extract_tarbz2(self, archive_path: str, extract_to: str) -> bool:
-        """解压TAR.BZ2文件"""
+    def _check_password(self, archive_path: str, fmt: str, password: str) -> bool:
+        """
+        用最小的一个加密成员验证密码：只解压这一个成员，CRC校验通过即认为密码正确
+        
+        每次验证使用独立的文件句柄（或外部程序进程），可在多个线程中同时验证不同的密码；
+        未安装 rarfile/py7zr 时用 7-Zip 程序列出成员后只测试（7z t）最小的一个成员，退出码为0即密码正确
+        """
         try:
-            with tarfile.open(archive_path, 'r:bz2') as tar_ref:
-                tar_ref.extractall(extract_to)
+            tool = self._password_tool(fmt)
+            if tool is not None:
+                members = self._list_external(archive_path, tool, password)
+                if members:
+                    smallest = min(members, key=lambda record: record['compressed_size'] or record['size'] or 0)
+                    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt',
+                                                     delete=False) as list_file:
+                        list_file.write(smallest['name'])
+                    try:
+                        self._run_external([tool.path, 't', '-bd', '-sccUTF-8', '-scsUTF-8', '-p' + password,
+                                            archive_path, '@' + list_file.name], tool)
+                    finally:
+                        os.remove(list_file.name)
+                return True
+            
+            if fmt == 'zip':
+                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                    encrypted = [info for info in zip_ref.infolist()
+                                 if info.flag_bits & 0x1 and not info.is_dir()]
+                    smallest = min(encrypted, key=lambda info: info.compress_size)
+                    with zip_ref.open(smallest, pwd=password.encode('utf-8')) as member:
+                        while member.read(COPY_CHUNK_SIZE):
+                            pass
+                return True
+            
+            if fmt == 'rar':
+                with rarfile.RarFile(archive_path, 'r') as rar_ref:
+                    rar_ref.setpassword(password)
+                    members = [info for info in rar_ref.infolist() if not info.isdir()]
+                    if members:
+                        rar_ref.read(min(members, key=lambda info: info.compress_size))
+                return True
+            
+            if fmt == '7z':
+                with py7zr.SevenZipFile(archive_path, 'r', password=password) as sevenz_ref:
+                    members = [info for info in sevenz_ref.list() if not info.is_directory]
+                    if members:
+                        smallest = min(members, key=lambda info: info.uncompressed or 0)
+                        with tempfile.TemporaryDirectory() as check_dir:
+                            sevenz_ref.extract(path=check_dir, targets=[smallest.filename])
+                return True
+        except Exception:
+            return False
+        return False
+    
+    def _find_password(self, archive_path: str, fmt: str, candidates: List[str]) -> Optional[str]:
+        """并行验证候选密码，返回第一个验证通过的密码"""
+        if len(candidates) <= 1:
+            for password in candidates:
+                if self._check_password(archive_path, fmt, password):
+                    return password
+            return None
+        
+        with ThreadPoolExecutor(max_workers=min(PASSWORD_WORKERS, len(candidates))) as executor:
+            futures = {executor.submit(self._check_password, archive_path, fmt, password): password
+                       for password in candidates}
+            for future in as_completed(futures):
+                if future.result():
+                    for other in futures:
+                        other.cancel()
+                    return futures[future]
+        return None
+    
+    def _resolve_password(self, archive_path: str, fmt: str) -> bool:
+        """
+        为加密的压缩文件找到可用的密码：先尝试同系列上次成功的密码，再并行验证其余候选密码
+        
+        Returns:
+            压缩文件未加密或找到了密码时返回True
+        """
+        if not self._needs_password(archive_path, fmt):
             return True
-        except Exception as e:
-            self.log(f"解压TAR.BZ2文件失败: {archive_path} - {str(e)}", "ERROR")
+        
+        family = self._archive_family(archive_path)
+        with self._password_lock:
+            cached = self._family_passwords.get(family)
+        
+        if cached is not None and self._check_password(archive_path, fmt, cached):
+            password = cached
+        else:
+            password = self._find_password(archive_path, fmt,
+                                           [candidate for candidate in self.passwords if candidate != cached])
+        if password is None:
             return False
+        
+        with self._password_lock:
+            self._family_passwords[family] = password
+            self._archive_passwords[archive_path] = password
+        self.log(f"已找到加密压缩文件的密码: {archive_path}", "DEBUG")
+        return True
     
-    def extract_archive(self, archive_path: str) -> Tuple[bool, int]:
+    def _begin_extraction(self, archive_path: str) -> Tuple[Optional[Tuple[bool, int]], Optional[Dict]]:
         """
-        解压单个压缩文件
+        解压前的检查：是否已处理、解压日志状态、格式和嵌套深度，通过后记录 started 状态
         
         Args:
             archive_path: 压缩文件路径
             
+        Returns:
+            (提前结束时的结果, 解压任务信息)，两者只有一个不为None
+        """
+        with self._processed_lock:
+            if archive_path in self.processed_files:
+                self.log(f"跳过已处理的文件: {archive_path}", "DEBUG")
+                return (True, 0), None
+            self.processed_files.add(archive_path)
+        
+        signature = None
+        if self.journal is not None:
+            signature = self._file_signature(archive_path)
+            state = self.journal.lookup(archive_path, signature, lambda: self._sample_hash(archive_path))
+            if state in ('moved', 'deleted'):
+                # 内容已在上次运行中提取到目标目录，只剩删除步骤（如需要）
+                self.log(f"根据解压日志跳过已完成的压缩文件: {archive_path}")
+                return (True, 0), None
+        
+        fmt = self.detect_archive_format(archive_path)
+        if fmt not in self.format_handlers:
+            message = self._unsupported_message(archive_path, fmt)
+            self.log(message, "WARNING")
+            self._local.last_error = message
+            return (False, 0), None
+        
+        depth = self._archive_depths.get(archive_path, 0)
+        if self.max_nesting_depth and depth >= self.max_nesting_depth:
+            self._count('archives_rejected')
+            self.log(f"压缩文件嵌套深度 {depth} 达到上限 {self.max_nesting_depth}，不再解压: {archive_path}",
+                     "ERROR")
+            return (False, 0), None
+        
+        if self.passwords and fmt in PASSWORD_FORMATS and not self._resolve_password(archive_path, fmt):
+            self._count('password_failures')
+            self.log(f"压缩文件已加密，候选密码均不正确: {archive_path}", "ERROR")
+            return (False, 0), None
+        
+        if signature is not None:
+            self._journal_record(archive_path, 'started', signature, self._sample_hash(archive_path))
+        
+        return None, {'archive': archive_path, 'fmt': fmt, 'signature': signature, 'depth': depth}
+    
+    def _finish_extraction(self, job: Dict, temp_dir: str) -> Tuple[bool, int]:
+        """
+        将临时目录中解压出的文件移动到目标目录，并记录 extracted/moved 状态
+        
+        Args:
+            job: _begin_extraction 返回的解压任务信息
+            temp_dir: 解压临时目录
+            
         Returns:
             (成功与否, 解压的文件数量)
         """
-        if archive_path in self.processed_files:
-            self.log(f"跳过已处理的文件: {archive_path}", "DEBUG")
-            return True, 0
+        archive_path = job['archive']
+        signature = job['signature']
+        depth = job['depth']
+        
+        if signature is not None:
+            self._journal_record(archive_path, 'extracted', signature)
+        
+        # 将解压的文件移动到目标目录（只统计本压缩文件的输出，不受其他线程影响）
+        files_extracted = 0
+        bytes_extracted = 0
+        outputs = self._take_member_outputs(temp_dir)
+        output_root = self._output_root(archive_path)
+        for root, dirs, files in os.walk(temp_dir):
+            for file in files:
+                source_path = os.path.join(root, file)
+                relative_path = os.path.relpath(source_path, temp_dir)
+                target_path = os.path.join(output_root, relative_path)
+                
+                if self.content_index is not None:
+                    output = outputs.pop(relative_path, None)
+                    if output is not None:
+                        size, digest, prefix_key = output.size, output.digest, output.prefix_key
+                    else:
+                        # 7z 等整体解压的格式没有经过 MemberOutput，移动前补算哈希
+                        size, digest, prefix_key = ContentIndex.describe(source_path)
+                    bytes_extracted += size
+                    placing = self.content_index.placing(digest)
+                else:
+                    bytes_extracted += os.path.getsize(source_path)
+                    placing = nullcontext()
+                
+                # 查找相同内容、移动和登记依次进行（流水线模式下多个压缩文件同时移动）
+                with placing:
+                    if self.content_index is not None:
+                        existing_path = self.content_index.lookup(size, digest)
+                        if existing_path is not None:
+                            files_extracted += self._place_duplicate(existing_path, target_path, size)
+                            continue
+                    
+                    # 同名文件改名，不覆盖已有文件或其他压缩文件的输出
+                    target_path = self.names.allocate(target_path)
+                    
+                    if self.dry_run:
+                        self.log(f"[预览] 将提取文件: {source_path} -> {target_path}")
+                    else:
+                        # 确保目标目录存在
+                        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                        shutil.move(source_path, target_path)
+                        self.log(f"已提取文件: {target_path}")
+                        self._note_output(target_path)
+                        is_archive = ((self.max_nesting_depth or self.content_index is not None)
+                                      and self.is_archive_file(target_path))
+                        # 记录嵌套压缩文件的深度（格式识别结果会被缓存，下一轮扫描不会重复读取文件头）
+                        if self.max_nesting_depth and is_archive:
+                            self._archive_depths[target_path] = depth + 1
+                        # 嵌套压缩文件随后会被解压删除，不作为去重的比较对象
+                        if self.content_index is not None and not is_archive:
+                            self.content_index.add(target_path, size, digest, prefix_key)
+                    
+                    files_extracted += 1
+        
+        # 写出时已确认与已有文件相同、没有写到临时目录的成员
+        for relative_path, output in outputs.items():
+            if output.duplicate_of is not None:
+                bytes_extracted += output.size
+                target_path = os.path.join(output_root, relative_path)
+                files_extracted += self._place_duplicate(output.duplicate_of, target_path, output.size)
+        
+        self._count('bytes_extracted', bytes_extracted)
+        
+        if signature is not None:
+            self._journal_record(archive_path, 'moved', signature)
+        
+        self.log(f"成功解压文件: {archive_path} -> 提取了 {files_extracted} 个文件")
+        return True, files_extracted
+    
+    def _output_root(self, archive_path: str) -> str:
+        """
+        按输出布局确定压缩文件的解压目录
         
-        self.processed_files.add(archive_path)
+        - flat: 目标文件夹根目录
+        - per-archive: 目标文件夹下以压缩文件名命名的子文件夹（同名时改名）
+        - mirror: 压缩文件所在的文件夹
+        """
+        if self.layout == 'mirror':
+            return os.path.dirname(os.path.abspath(archive_path))
+        if self.layout == 'per-archive':
+            stem, ext = NameAllocator.split_name(os.path.basename(archive_path))
+            return self.names.allocate(os.path.join(self.target_path, stem or ext))
+        return self.target_path
+    
+    def extract_archive(self, archive_path: str) -> Tuple[bool, int]:
+        """
+        解压单个压缩文件
         
-        ext = Path(archive_path).suffix.lower()
-        if ext not in self.supported_extensions:
-            self.log(f"不支持的压缩格式: {archive_path}", "WARNING")
-            return False, 0
+        Args:
+            archive_path: 压缩文件路径
+            
+        Returns:
+            (成功与否, 解压的文件数量)
+        """
+        result, job = self._begin_extraction(archive_path)
+        if job is None:
+            return result
         
         # 创建临时目录用于解压
         with tempfile.TemporaryDirectory() as temp_dir:
             try:
-                # 记录解压前的文件数量
-                files_before = set()
-                for root, dirs, files in os.walk(self.target_path):
-                    for file in files:
-                        files_before.add(os.path.join(root, file))
-                
                 # 执行解压
-                extract_func = self.supported_extensions[ext]
+                extract_func = self.format_handlers[job['fmt']]
                 success = extract_func(archive_path, temp_dir)
                 
                 if not success:
                     return False, 0
                 
-                # 将解压的文件移动到目标目录
-                files_extracted = 0
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        source_path = os.path.join(root, file)
-                        relative_path = os.path.relpath(source_path, temp_dir)
-                        target_path = os.path.join(self.target_path, relative_path)
-                        
-                        # 确保目标目录存在
-                        os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                        
-                        if self.dry_run:
-                            self.log(f"[预览] 将提取文件: {source_path} -> {target_path}")
-                        else:
-                            shutil.move(source_path, target_path)
-                            self.log(f"已提取文件: {target_path}")
-                        
-                        files_extracted += 1
-                
-                # 记录解压后的文件数量变化
-                files_after = set()
-                for root, dirs, files in os.walk(self.target_path):
-                    for file in files:
-                        files_after.add(os.path.join(root, file))
-                
-                new_files = files_after - files_before
-                actual_extracted = len(new_files)
-                
-                self.log(f"成功解压文件: {archive_path} -> 提取了 {actual_extracted} 个文件")
-                return True, actual_extracted
+                return self._finish_extraction(job, temp_dir)
                 
             except Exception as e:
                 self.log(f"解压过程中发生错误: {archive_path} - {str(e)}", "ERROR")
                 return False, 0
+            finally:
+                self._take_member_outputs(temp_dir)
     
     def delete_archive(self, archive_path: str) -> bool:
         """
@@ -348,22 +2725,239 @@ class ArchiveExtractor:
                 self.log(f"[预览] 将删除压缩文件: {archive_path}")
                 return True
             
-            file_size = os.path.getsize(archive_path)
+            signature = self._file_signature(archive_path)
+            file_size = signature[0]
             os.remove(archive_path)
+            self.names.release(os.path.abspath(archive_path))
+            self._journal_record(archive_path, 'deleted', signature)
             self.log(f"已删除压缩文件: {archive_path}")
-            self.stats['space_freed'] += file_size
-            self.stats['archives_deleted'] += 1
+            self._count('space_freed', file_size)
+            self._count('archives_deleted')
             return True
             
         except Exception as e:
             self.log(f"删除压缩文件失败: {archive_path} - {str(e)}", "ERROR")
-            self.stats['errors_encountered'] += 1
+            self._count('errors_encountered')
             return False
     
+    def estimate_extracted_size(self, archive_path: str) -> int:
+        """
+        估算压缩文件解压后的大小
+        
+        ZIP/RAR/7Z 等格式直接读取文件头中的原始大小；压缩TAR等没有索引的格式
+        为避免整包解压一遍，按压缩文件大小乘以膨胀系数估算。GZIP 文件头的大小只作为下限，
+        取它与估算值中较大的一个
+        
+        Args:
+            archive_path: 压缩文件路径
+            
+        Returns:
+            预计解压后的字节数
+        """
+        archive_size = os.path.getsize(archive_path)
+        fmt = self.detect_archive_format(archive_path)
+        if fmt == 'tar':
+            return archive_size
+        
+        if fmt in HEADER_SIZED_FORMATS:
+            try:
+                records = self.list_archive_members(archive_path)
+                if all(record['size'] is not None for record in records):
+                    header_size = sum(record['size'] for record in records)
+                    if fmt in LOWER_BOUND_SIZED_FORMATS:
+                        return max(header_size, archive_size * ESTIMATED_EXPANSION_RATIO)
+                    return header_size
+            except Exception as e:
+                self.log(f"读取解压大小失败，改用估算值: {archive_path} - {str(e)}", "DEBUG")
+        
+        return archive_size * ESTIMATED_EXPANSION_RATIO
+    
+    def _space_needs(self, extracted_size: int) -> Dict[str, int]:
+        """
+        解压需要的空间：临时目录需要完整的解压大小；目标目录与临时目录在同一文件系统时
+        移动只是重命名，不额外占用空间
+        """
+        needs = {self.temp_root: extracted_size}
+        if os.stat(self.temp_root).st_dev != os.stat(self.target_path).st_dev:
+            needs[self.target_path] = extracted_size
+        return needs
+    
+    def _complete_archive(self, archive_path: str, success: bool, files_extracted: int):
+        """统计单个压缩文件的处理结果，成功后立即删除源文件，尽早释放空间给后续任务"""
+        with self._password_lock:
+            self._archive_passwords.pop(archive_path, None)
+        with self._incomplete_lock:
+            incomplete = archive_path in self._incomplete_archives
+            self._incomplete_archives.discard(archive_path)
+        if success:
+            self._count('archives_processed')
+            self._count('files_extracted', files_extracted)
+            if self.delete_after_extract and incomplete:
+                self.log(f"压缩文件中有未解压的成员，保留原压缩文件: {archive_path}", "WARNING")
+            elif self.delete_after_extract:
+                self.delete_archive(archive_path)
+        else:
+            self._count('errors_encountered')
+    
+    def _process_archive(self, archive_path: str, space_token=None) -> Tuple[bool, int]:
+        """
+        工作线程任务：解压单个压缩文件，成功后立即删除源文件，最后释放预留的空间
+        
+        Args:
+            archive_path: 压缩文件路径
+            space_token: 磁盘空间预留凭据
+            
+        Returns:
+            (成功与否, 解压的文件数量)
+        """
+        try:
+            success, files_extracted = self.extract_archive(archive_path)
+            self._complete_archive(archive_path, success, files_extracted)
+            return success, files_extracted
+        finally:
+            if space_token is not None:
+                self.disk_budget.release(space_token)
+    
+    def _note_output(self, file_path: str):
+        """记录写入目标目录的文件（仅在 extract() 调用期间收集）"""
+        outputs = getattr(self._local, 'output_files', None)
+        if outputs is not None:
+            outputs.append(file_path)
+    
+    def _thread_count(self, key: str) -> int:
+        """当前线程尚未合并的计数"""
+        return getattr(self._local, 'counters', {}).get(key, 0)
+    
+    def extract(self, archive_path: str) -> ExtractionResult:
+        """
+        解压单个压缩文件到 target_path（不递归解压其中的嵌套压缩文件）
+        
+        可在多个线程中同时调用；成功后按 delete_after_extract 删除源文件。
+        同一个路径只处理一次，重复调用返回 files_extracted=0 的成功结果
+        
+        Args:
+            archive_path: 压缩文件路径
+            
+        Returns:
+            ExtractionResult
+        """
+        started = time.perf_counter()
+        self._local.last_error = None
+        self._local.output_files = outputs = []
+        bytes_before = self._thread_count('bytes_extracted')
+        try:
+            success, files_extracted = self._process_archive(archive_path)
+        except Exception as e:
+            self.log(f"解压过程中发生错误: {archive_path} - {str(e)}", "ERROR")
+            success, files_extracted = False, 0
+        finally:
+            self._local.output_files = None
+        
+        return ExtractionResult(
+            archive=archive_path,
+            success=success,
+            files_extracted=files_extracted,
+            bytes_extracted=self._thread_count('bytes_extracted') - bytes_before,
+            output_files=outputs,
+            error=None if success else self._local.last_error,
+            duration=time.perf_counter() - started,
+        )
+    
+    async def extract_async(self, archive_path: str, executor=None) -> ExtractionResult:
+        """
+        extract 的异步版本：解压在线程池中执行，不阻塞事件循环
+        
+        Args:
+            archive_path: 压缩文件路径
+            executor: 执行解压的线程池（默认使用事件循环的默认线程池，自动限制并发数）
+        """
+        import asyncio
+        if executor is None:
+            return await asyncio.to_thread(self.extract, archive_path)
+        return await asyncio.get_running_loop().run_in_executor(executor, self.extract, archive_path)
+    
+    def iter_members(self, archive_path: str) -> Iterator[ArchiveMember]:
+        """
+        依次产出压缩文件中选中的成员，不写入磁盘
+        
+        每个成员的 stream 必须在迭代到下一个成员之前读取；读取过程同样受解压限制检查，
+        超出限制时抛出 ExtractionLimitExceeded
+        
+        Args:
+            archive_path: 压缩文件路径
+            
+        Yields:
+            ArchiveMember
+        """
+        fmt = self.detect_archive_format(archive_path)
+        if fmt not in self.format_handlers:
+            raise ValueError(self._unsupported_message(archive_path, fmt))
+        if self.passwords and fmt in PASSWORD_FORMATS and not self._resolve_password(archive_path, fmt):
+            raise ValueError(f"压缩文件已加密，候选密码均不正确: {archive_path}")
+        
+        guard = self._new_guard(archive_path)
+        try:
+            if not self._streams_members(archive_path, fmt):
+                # py7zr 和 7z 程序没有逐成员的流式接口，先解压到临时目录再依次读取
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    if not self.format_handlers[fmt](archive_path, temp_dir):
+                        raise RuntimeError(getattr(self._local, 'last_error', None))
+                    for root, dirs, files in os.walk(temp_dir):
+                        dirs.sort()
+                        for file in sorted(files):
+                            file_path = os.path.join(root, file)
+                            with open(file_path, 'rb') as stream:
+                                yield ArchiveMember(os.path.relpath(file_path, temp_dir).replace(os.sep, '/'),
+                                                    stream, os.path.getmtime(file_path))
+            else:
+                for name, stream, mtime, mode in self._iter_member_streams(archive_path, fmt, guard):
+                    with stream:
+                        guard.add_member()
+                        yield ArchiveMember(name, GuardedStream(stream, guard), mtime, mode)
+        finally:
+            with self._password_lock:
+                self._archive_passwords.pop(archive_path, None)
+            with self._incomplete_lock:
+                self._incomplete_archives.discard(archive_path)
+    
+    def _external_tool(self, archive_path: str, fmt: str) -> Optional[ExternalTool]:
+        """
+        解压该压缩文件使用的外部程序，没有时返回 None
+        
+        bsdtar 转换为 tar 流时不接受 --passphrase（只能用于读取），libarchive 也不能解密 7z/RAR，
+        文件头显示已加密的压缩文件不交给 bsdtar，改用 Python 库（未指定候选密码时由 Python 库报告需要密码）
+        """
+        if fmt not in ('7z', 'rar'):
+            return None
+        tool = self.external_tools.get(fmt)
+        if tool is not None and tool.streams and (archive_path in self._archive_passwords
+                                                  or self._needs_password(archive_path, fmt)):
+            return None
+        return tool
+    
+    def _streams_members(self, archive_path: str, fmt: str) -> bool:
+        """该压缩文件能否逐个成员流式读取（py7zr 和 7z 程序只能整体解压到目录）"""
+        tool = self._external_tool(archive_path, fmt)
+        if tool is not None:
+            return tool.streams
+        return fmt != '7z'
+    
+    def _log_throughput(self, done: int, total: int, start_time: float, base_bytes: int):
+        """输出实时吞吐量：已处理数量、个/秒、解压后数据量 MB/秒"""
+        elapsed = max(time.time() - start_time, 1e-6)
+        mb_extracted = (self._pending_count('bytes_extracted') - base_bytes) / (1024 * 1024)
+        self.log(f"已处理 {done}/{total} 个压缩文件... "
+                 f"({done / elapsed:.1f} 个/秒, {mb_extracted / elapsed:.2f} MB/秒)")
+    
     def process_archive_batch(self, archive_files: List[str]) -> int:
         """
         批量处理压缩文件（使用多线程）
         
+        同时在途的任务数限制为线程数的2倍，处理完一个再提交下一个，
+        十万级压缩文件也不会一次性创建大量 Future；启用流水线模式时任务交给 ExtractionPipeline。
+        启用磁盘空间准入时，后续压缩文件的解压大小（需要读取文件头）在独立的线程池中提前并行估算，
+        提交任务时通常已经估算完成，慢速存储上也不会让分派线程逐个等待读取文件头
+        
         Args:
             archive_files: 压缩文件列表
             
@@ -373,40 +2967,120 @@ class ArchiveExtractor:
         if not archive_files:
             return 0
         
-        self.log(f"开始批量处理 {len(archive_files)} 个压缩文件（使用 {self.max_threads} 个线程）")
+        if self.pipeline:
+            self.log(f"开始流水线处理 {len(archive_files)} 个压缩文件（解压线程 {self.max_threads} 个）")
+        else:
+            self.log(f"开始批量处理 {len(archive_files)} 个压缩文件（使用 {self.max_threads} 个线程）")
         
+        if self.content_index is not None and not self.content_index.seeded:
+            indexed = self.content_index.seed(self.target_path, set(archive_files))
+            self.log(f"内容去重: 已索引输出目录中的 {indexed} 个文件（方式: {self.dedup}）")
+        
+        max_in_flight = self.max_threads * 2
+        total = len(archive_files)
         processed_count = 0
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            # 提交所有解压任务
-            future_to_archive = {
-                executor.submit(self.extract_archive, archive_path): archive_path 
-                for archive_path in archive_files
-            }
+        start_time = last_report = time.time()
+        base_bytes = self._pending_count('bytes_extracted')
+        archive_iter = iter(archive_files)
+        waiting = []  # 因空间不足暂缓的 (压缩文件, 预计大小)
+        estimates = deque()  # 提前估算解压大小的 (压缩文件, Future)
+        estimator = ThreadPoolExecutor(max_workers=self.max_threads) if self.disk_budget is not None else None
+        
+        def next_archive() -> Optional[Tuple[str, int]]:
+            """下一个压缩文件及其预计解压大小；同时补足提前估算的压缩文件"""
+            if estimator is None:
+                archive_path = next(archive_iter, None)
+                return None if archive_path is None else (archive_path, 0)
+            while len(estimates) < max_in_flight:
+                archive_path = next(archive_iter, None)
+                if archive_path is None:
+                    break
+                estimates.append((archive_path, estimator.submit(self.estimate_extracted_size, archive_path)))
+            if not estimates:
+                return None
+            archive_path, future = estimates.popleft()
+            try:
+                return archive_path, future.result()
+            except OSError as e:
+                self.log(f"估算解压大小失败: {archive_path} - {str(e)}", "WARNING")
+                return archive_path, 0
+        
+        pipeline = ExtractionPipeline(self) if self.pipeline else None
+        if pipeline is not None:
+            context = pipeline
+        elif self.executor is not None:
+            context = nullcontext(self.executor)
+        else:
+            context = ThreadPoolExecutor(max_workers=self.max_threads)
+        with context as executor, (estimator or nullcontext()):
+            future_to_archive = {}
+            
+            def admit(archive_path: str, extracted_size: int) -> bool:
+                """尝试预留空间并提交任务；空间不足返回False"""
+                token = None
+                if self.disk_budget is not None:
+                    token = self.disk_budget.try_reserve(self._space_needs(extracted_size))
+                    if token is None:
+                        return False
+                if pipeline is not None:
+                    future = pipeline.submit(archive_path, token)
+                else:
+                    future = executor.submit(self._process_archive, archive_path, token)
+                future_to_archive[future] = archive_path
+                return True
+            
+            def submit_more():
+                nonlocal processed_count
+                while len(future_to_archive) < max_in_flight:
+                    if waiting:
+                        archive_path, extracted_size = waiting[0]
+                    else:
+                        upcoming = next_archive()
+                        if upcoming is None:
+                            return
+                        archive_path, extracted_size = upcoming
+                        waiting.append(upcoming)
+                    
+                    if admit(archive_path, extracted_size):
+                        waiting.pop(0)
+                        continue
+                    
+                    if future_to_archive:
+                        # 等待在途任务完成、空间释放后再尝试
+                        self._count('archives_deferred')
+                        return
+                    
+                    # 没有任何在途任务仍然放不下，这个压缩文件无法在当前磁盘上解压
+                    waiting.pop(0)
+                    processed_count += 1
+                    self.skipped_no_space.add(archive_path)
+                    self._count('archives_skipped_no_space')
+                    self._count('errors_encountered')
+                    self.log(f"磁盘空间不足，跳过压缩文件: {archive_path} "
+                             f"(预计需要 {extracted_size / (1024 * 1024):.2f} MB)", "ERROR")
             
-            # 收集结果
-            for future in as_completed(future_to_archive):
-                archive_path = future_to_archive[future]
-                processed_count += 1
+            submit_more()
+            while future_to_archive:
+                done, _ = wait(future_to_archive, return_when=FIRST_COMPLETED)
                 
-                if processed_count % 10 == 0:
-                    self.log(f"已处理 {processed_count}/{len(archive_files)} 个压缩文件...")
+                for future in done:
+                    archive_path = future_to_archive.pop(future)
+                    processed_count += 1
+                    
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.log(f"处理压缩文件时发生错误: {archive_path} - {str(e)}", "ERROR")
+                        self._count('errors_encountered')
                 
-                try:
-                    success, files_extracted = future.result()
-                    if success:
-                        self.stats['archives_processed'] += 1
-                        self.stats['files_extracted'] += files_extracted
-                        
-                        # 解压成功后删除原文件
-                        if self.delete_after_extract:
-                            self.delete_archive(archive_path)
-                    else:
-                        self.stats['errors_encountered'] += 1
-                        
-                except Exception as e:
-                    self.log(f"处理压缩文件时发生错误: {archive_path} - {str(e)}", "ERROR")
-                    self.stats['errors_encountered'] += 1
+                submit_more()
+                
+                now = time.time()
+                if processed_count == total or now - last_report >= PROGRESS_INTERVAL:
+                    self._log_throughput(processed_count, total, start_time, base_bytes)
+                    last_report = now
         
+        self.merge_worker_stats()
         return processed_count
     
     def run_recursive_extraction(self, max_iterations: int = 10) -> bool:
@@ -424,10 +3098,17 @@ class ArchiveExtractor:
         self.log(f"目标路径: {self.target_path}")
         self.log(f"日志文件: {self.log_file}")
         self.log(f"最大线程数: {self.max_threads}")
+        self.log(f"输出布局: {self.layout}")
+        if self.pipeline:
+            self.log("运行模式: 流水线（读取/解压/写出分阶段并行）")
         if self.dry_run:
             self.log("运行模式: 预览模式（不实际执行解压和删除操作）")
-        if not self.delete_after_extract:
+        if self.has_member_filters:
+            self.log("运行模式: 选择性解压，保留原压缩文件")
+        elif not self.delete_after_extract:
             self.log("运行模式: 解压后保留原压缩文件")
+        if self.journal is not None:
+            self.log(f"解压状态日志: {self.journal.journal_path}（已有 {len(self.journal.entries)} 条记录）")
         self.log("=" * 60)
         
         try:
@@ -456,7 +3137,8 @@ class ArchiveExtractor:
                     break
                 
                 # 过滤掉已处理的文件
-                new_archives = [f for f in archive_files if f not in self.processed_files]
+                new_archives = [f for f in archive_files
+                                if f not in self.processed_files and f not in self.skipped_no_space]
                 
                 if not new_archives:
                     self.log("所有压缩文件都已处理，解压完成")
@@ -480,7 +3162,18 @@ class ArchiveExtractor:
             self.log(f"处理的压缩文件数: {self.stats['archives_processed']}")
             self.log(f"提取的文件总数: {self.stats['files_extracted']}")
             self.log(f"删除的压缩文件数: {self.stats['archives_deleted']}")
+            self.log(f"解压的数据量: {self.stats['bytes_extracted'] / (1024 * 1024):.2f} MB")
             self.log(f"释放的空间: {self.stats['space_freed'] / (1024 * 1024):.2f} MB")
+            if self.stats['archives_rejected']:
+                self.log(f"超出安全限制被拒绝的压缩文件数: {self.stats['archives_rejected']}")
+            if self.stats['password_failures']:
+                self.log(f"找不到密码的加密压缩文件数: {self.stats['password_failures']}")
+            if self.stats['archives_skipped_no_space']:
+                self.log(f"因磁盘空间不足跳过的压缩文件数: {self.stats['archives_skipped_no_space']}")
+            if self.content_index is not None:
+                self.log(f"跳过的重复文件数: {self.stats['duplicates_skipped']}")
+                self.log(f"硬链接的重复文件数: {self.stats['duplicates_linked']}")
+                self.log(f"去重节省的写入量: {self.stats['duplicate_bytes'] / (1024 * 1024):.2f} MB")
             self.log(f"遇到的错误数: {self.stats['errors_encountered']}")
             self.log(f"总迭代次数: {iteration}")
             self.log("=" * 60)
@@ -492,12 +3185,147 @@ class ArchiveExtractor:
             import traceback
             self.log(f"堆栈跟踪: {traceback.format_exc()}", "ERROR")
             return False
+        
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+
+
+def iter_members(archive_path: str, **options) -> Iterator[ArchiveMember]:
+    """
+    依次产出压缩文件中的成员（不写入磁盘）
+    
+    Args:
+        archive_path: 压缩文件路径
+        **options: ArchiveExtractor 的其他参数（如 include_patterns、passwords、max_ratio）
+    """
+    extractor = ArchiveExtractor(os.path.dirname(os.path.abspath(archive_path)), **options)
+    yield from extractor.iter_members(archive_path)
+
+
+def extract(archive_path: str, dest: str, **options) -> ExtractionResult:
+    """
+    解压单个压缩文件到 dest，默认保留源文件
+    
+    Args:
+        archive_path: 压缩文件路径
+        dest: 解压目标文件夹（不存在时创建）
+        **options: ArchiveExtractor 的其他参数（如 layout、dedup、passwords）
+    """
+    os.makedirs(dest, exist_ok=True)
+    options.setdefault('delete_after_extract', False)
+    return ArchiveExtractor(dest, **options).extract(archive_path)
+
+
+async def extract_async(archive_path: str, dest: str, **options) -> ExtractionResult:
+    """extract 的异步版本，解压在事件循环的默认线程池中执行"""
+    import asyncio
+    return await asyncio.to_thread(extract, archive_path, dest, **options)
+
+
+def read_batch_targets(source: str) -> Iterator[str]:
+    """
+    逐行读取批量模式的目标文件夹列表，忽略空行和 # 开头的注释行
+    
+    从标准输入读取时每读到一行就产出，调度程序可以持续写入目标而不必等待输入结束
+    
+    Args:
+        source: 列表文件路径，"-" 表示标准输入
+    """
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8-sig')
+    try:
+        for line in stream:
+            target = line.strip()
+            if target and not target.startswith('#'):
+                yield target
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def run_batch(targets: Iterable[str], results: TextIO, max_iterations: int = 10,
+              jobs: int = BATCH_JOBS, **options) -> bool:
+    """
+    批量模式：在一个进程中处理多个目标文件夹
+    
+    所有目标共用一个解压线程池、格式识别缓存、密码缓存、磁盘空间预算和解压状态日志，
+    同时处理 jobs 个目标；每个目标完成后立即向 results 写入一行 JSON 结果记录
+    
+    Args:
+        targets: 目标文件夹路径（可以是逐行读取标准输入的迭代器）
+        results: 结果记录（JSONL）的输出流
+        max_iterations: 每个目标的最大递归解压轮数
+        jobs: 同时处理的目标数量
+        **options: ArchiveExtractor 的其他参数
+        
+    Returns:
+        所有目标是否都处理成功且没有错误
+    """
+    max_threads = options.pop('max_threads', None) or min(8, os.cpu_count() or 4)
+    results_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max(1, jobs))
+    outcome = {'targets': 0, 'failed': 0}
+    
+    def write_record(record: Dict):
+        with results_lock:
+            outcome['targets'] += 1
+            outcome['failed'] += not record['success']
+            results.write(json.dumps(record, ensure_ascii=False) + '\n')
+            results.flush()
+    
+    def run_target(extractor: ArchiveExtractor):
+        started = time.perf_counter()
+        error = None
+        try:
+            success = extractor.run_recursive_extraction(max_iterations)
+        except Exception as e:
+            logger.error(f"处理目标文件夹时发生错误: {extractor.target_path} - {str(e)}")
+            success, error = False, str(e)
+        
+        success = success and extractor.stats['errors_encountered'] == 0
+        record = {
+            'target': extractor.target_path,
+            'success': success,
+            'duration': round(time.perf_counter() - started, 3),
+            'stats': dict(extractor.stats),
+        }
+        if error is not None:
+            record['error'] = error
+        write_record(record)
+    
+    shared = None
+    with ThreadPoolExecutor(max_workers=max_threads) as executor, \
+            ThreadPoolExecutor(max_workers=max(1, jobs)) as target_executor:
+        for target in targets:
+            slots.acquire()
+            try:
+                extractor = ArchiveExtractor(target, max_threads=max_threads, executor=executor, **options)
+            except Exception as e:
+                # 创建失败（路径无效、无法创建解压状态日志等）只影响这一个目标
+                slots.release()
+                logger.error(f"无法处理目标文件夹: {target} - {str(e)}")
+                write_record({'target': os.path.abspath(target), 'success': False, 'duration': 0.0,
+                              'stats': {}, 'error': str(e)})
+                continue
+            if shared is None:
+                # 第一个目标的缓存、磁盘空间预算和解压状态日志由之后的所有目标共用
+                shared = extractor
+                options.pop('journal_file', None)
+            else:
+                extractor.share_state(shared)
+            
+            target_executor.submit(run_target, extractor).add_done_callback(lambda _: slots.release())
+    
+    if shared is not None and shared.journal is not None:
+        shared.journal.close()
+    logger.info(f"批量模式完成: 共处理 {outcome['targets']} 个目标文件夹，其中 {outcome['failed']} 个失败")
+    return outcome['failed'] == 0
 
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="压缩文件解压工具 - 递归解压所有压缩文件")
-    parser.add_argument("path", help="要扫描的目标文件夹路径")
+    parser.add_argument("path", nargs="?", help="要扫描的目标文件夹路径")
     parser.add_argument("--log", "-l", help="日志文件路径（可选）")
     parser.add_argument("--dry-run", "-d", action="store_true", 
                        help="预览模式，只显示将要执行的操作而不实际执行")
@@ -507,17 +3335,122 @@ def main():
                        help="解压后保留原压缩文件")
     parser.add_argument("--max-iterations", "-m", type=int, default=10,
                        help="最大递归迭代次数（默认10次）")
+    parser.add_argument("--list", "-L", nargs="?", const="-", metavar="FILE",
+                       help="只输出成员清单（JSONL：名称、大小、压缩大小、CRC），不解压；"
+                            "未指定文件时输出到标准输出")
+    parser.add_argument("--min-free-mb", type=int, default=64,
+                       help="临时目录和目标目录所在磁盘始终保留的剩余空间（MB，默认64）")
+    parser.add_argument("--no-space-check", action="store_true",
+                       help="不检查磁盘空间，直接开始解压")
+    parser.add_argument("--max-total-mb", type=int, default=0,
+                       help="单个压缩文件解压后的总大小上限（MB，默认0表示不限制）")
+    parser.add_argument("--max-ratio", type=float, default=0,
+                       help="单个压缩文件的解压比上限（默认0表示不限制，解压超过1GB后才检查）")
+    parser.add_argument("--max-members", type=int, default=100000,
+                       help="单个压缩文件的成员数量上限（默认100000，0表示不限制）")
+    parser.add_argument("--max-depth", type=int, default=8,
+                       help="压缩文件嵌套深度上限（默认8，0表示不限制）")
+    parser.add_argument("--journal", "-j", metavar="FILE",
+                       help="解压状态日志（JSONL），中断后使用同一日志重新运行可从中断处继续")
+    parser.add_argument("--include", "-i", action="append", metavar="PATTERN",
+                       help="只解压匹配该通配符的成员（可多次使用，选择性解压时保留原压缩文件）")
+    parser.add_argument("--exclude", "-x", action="append", metavar="PATTERN",
+                       help="跳过匹配该通配符的成员（可多次使用）")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default="off",
+                       help="内容去重：skip 跳过与输出目录中已有文件内容相同的成员，"
+                            "hardlink 改为硬链接到已有文件（默认off）")
+    parser.add_argument("--layout", choices=LAYOUTS, default="flat",
+                       help="输出布局：flat 解压到目标文件夹根目录（默认），per-archive 每个压缩文件一个子文件夹，"
+                            "mirror 解压到压缩文件所在的文件夹；同名文件自动改名，不会覆盖")
+    parser.add_argument("--passwords-file", metavar="FILE",
+                       help="加密压缩文件的候选密码（UTF-8，每行一个）")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                       help="解压后端：auto 优先使用本机的 7z/bsdtar 程序解压7z/RAR（默认），python 只使用 Python 库")
+    parser.add_argument("--sniff-extensionless", "-S", action="store_true",
+                       help="没有扩展名的文件也读取文件头识别格式（默认只识别压缩文件扩展名的文件）")
+    parser.add_argument("--pipeline", "-P", action="store_true",
+                       help="流水线模式：读取、解压、写出分阶段并行，结束时输出各阶段利用率")
+    parser.add_argument("--batch-file", "-b", metavar="FILE",
+                       help="批量模式：处理列表文件中的所有目标文件夹（每行一个，\"-\" 表示从标准输入读取），"
+                            "共用线程池、缓存和日志")
+    parser.add_argument("--results", "-r", metavar="FILE", default="-",
+                       help="批量模式每个目标的结果记录（JSONL，默认输出到标准输出）")
+    parser.add_argument("--batch-jobs", type=int, default=BATCH_JOBS,
+                       help=f"批量模式同时处理的目标文件夹数量（默认{BATCH_JOBS}）")
     
     args = parser.parse_args()
     
+    if bool(args.path) == bool(args.batch_file):
+        parser.error("必须指定目标文件夹路径或 --batch-file（二者只能选一个）")
+    
+    if args.batch_file:
+        if args.list:
+            parser.error("--list 不能与 --batch-file 同时使用")
+        # 结果记录输出到标准输出时，控制台日志改写到标准错误
+        configure_logging(args.log or DEFAULT_LOG_FILE, sys.stderr if args.results == "-" else None)
+        options = dict(
+            log_file=args.log,
+            dry_run=args.dry_run,
+            max_threads=args.threads,
+            delete_after_extract=not args.keep_archives,
+            include_patterns=args.include,
+            exclude_patterns=args.exclude,
+            journal_file=args.journal,
+            check_disk_space=not args.no_space_check,
+            min_free_mb=args.min_free_mb,
+            max_total_mb=args.max_total_mb,
+            max_ratio=args.max_ratio,
+            max_members=args.max_members,
+            max_nesting_depth=args.max_depth,
+            pipeline=args.pipeline,
+            dedup=args.dedup,
+            layout=args.layout,
+            passwords=load_passwords(args.passwords_file) if args.passwords_file else None,
+            backend=args.backend,
+            sniff_extensionless=args.sniff_extensionless,
+        )
+        results = nullcontext(sys.stdout) if args.results == "-" else open(args.results, 'a', encoding='utf-8')
+        with results as output:
+            success = run_batch(read_batch_targets(args.batch_file), output,
+                                args.max_iterations, args.batch_jobs, **options)
+        sys.exit(0 if success else 1)
+    
     # 运行解压工具
     extractor = ArchiveExtractor(
         args.path, 
         args.log, 
         args.dry_run, 
         args.threads,
-        not args.keep_archives
+        not args.keep_archives,
+        args.include,
+        args.exclude,
+        args.journal,
+        not args.no_space_check,
+        args.min_free_mb,
+        args.max_total_mb,
+        args.max_ratio,
+        args.max_members,
+        args.max_depth,
+        args.pipeline,
+        args.dedup,
+        args.layout,
+        load_passwords(args.passwords_file) if args.passwords_file else None,
+        args.backend,
+        sniff_extensionless=args.sniff_extensionless
     )
+    extractor.setup_logging()
+    
+    if args.list:
+        if args.list == "-":
+            # 标准输出留给JSONL清单，控制台日志改写到标准错误
+            for handler in logging.getLogger().handlers:
+                if type(handler) is logging.StreamHandler and handler.stream is sys.stdout:
+                    handler.setStream(sys.stderr)
+            extractor.list_archives(sys.stdout)
+        else:
+            with open(args.list, 'w', encoding='utf-8') as output:
+                extractor.list_archives(output)
+        sys.exit(0 if extractor.stats['errors_encountered'] == 0 else 1)
     
     success = extractor.run_recursive_extraction(args.max_iterations)
     
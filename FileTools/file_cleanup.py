@@ -18,6 +18,8 @@
 - 大文件优化：使用1MB块大小减少I/O操作次数
 - 智能进度显示：实时显示处理进度
 - 媒体文件智能处理：保留拍摄时间最早的照片/视频文件
+- 批量模式：--batch-file 在一个进程中清理列表中的所有文件夹，共用哈希线程池和日志，
+  每个文件夹完成后输出一行 JSON 结果记录
 
 文件处理规则：
 - 媒体文件（照片、视频等）：优先根据拍摄时间决定保留哪个文件
@@ -29,25 +31,54 @@
 python file_cleanup.py /path/to/folder
 python file_cleanup.py /path/to/folder --dry-run
 python file_cleanup.py /path/to/folder --no-fast-hash
+python file_cleanup.py --batch-file folders.txt --results results.jsonl
 """
 
 import os
 import sys
+import time
+import json
 import hashlib
 import argparse
 import logging
 from datetime import datetime
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Dict, List, Tuple, Set, Optional, TextIO, Iterator, Iterable
 import shutil
 import threading
+from contextlib import nullcontext
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import imghdr
-import struct
-import subprocess
+
+# 默认的日志文件
+DEFAULT_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "file_cleanup.log")
+
+# 批量模式同时处理的文件夹数量
+BATCH_JOBS = 4
+
+
+def configure_logging(log_file: str, stream: TextIO = None):
+    """
+    日志配置：同时写入日志文件和控制台；已经配置过时不再重复打开日志文件
+    
+    Args:
+        log_file: 日志文件路径
+        stream: 控制台输出流（默认标准输出）
+    """
+    if logging.getLogger().handlers:
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(stream or sys.stdout)
+        ]
+    )
 
 
 class FileCleanupTool:
-    def __init__(self, target_path: str, log_file: str = None, dry_run: bool = False, fast_hash: bool = True):
+    def __init__(self, target_path: str, log_file: str = None, dry_run: bool = False, fast_hash: bool = True,
+                 executor: ThreadPoolExecutor = None):
         """
         初始化文件清理工具
         
@@ -56,11 +87,13 @@ class FileCleanupTool:
             log_file: 日志文件路径（可选）
             dry_run: 预览模式，不实际执行删除操作
             fast_hash: 使用快速哈希算法（MD5），比SHA256更快
+            executor: 计算哈希的线程池（批量模式下多个文件夹共用，由调用方关闭），默认每次扫描创建一个
         """
         self.target_path = os.path.abspath(target_path)
         self.dry_run = dry_run
         self.fast_hash = fast_hash
-        self.log_file = log_file or os.path.join(os.path.dirname(__file__), "file_cleanup.log")
+        self.executor = executor
+        self.log_file = log_file or DEFAULT_LOG_FILE
         
         # 设置日志
         self.setup_logging()
@@ -71,20 +104,15 @@ class FileCleanupTool:
             'duplicate_files': 0,
             'duplicates_removed': 0,
             'space_saved': 0,
-            'empty_folders_removed': 0
+            'empty_folders_removed': 0,
+            'errors': 0
         }
+        # 计算哈希的线程（批量模式下与其他文件夹共用）也会记录错误，累加错误数时加锁
+        self.stats_lock = threading.Lock()
     
     def setup_logging(self):
         """设置日志配置"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S',
-            handlers=[
-                logging.FileHandler(self.log_file, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        configure_logging(self.log_file)
         self.logger = logging.getLogger(__name__)
     
     def log(self, message: str, level: str = "INFO"):
@@ -94,6 +122,8 @@ class FileCleanupTool:
         elif level == "WARNING":
             self.logger.warning(message)
         elif level == "ERROR":
+            with self.stats_lock:
+                self.stats['errors'] += 1
             self.logger.error(message)
         elif level == "DEBUG":
             self.logger.debug(message)
@@ -132,6 +162,9 @@ class FileCleanupTool:
             拍摄时间，如果无法获取则返回None
         """
         try:
+            # imghdr 只在读取照片时间时才用到，延迟导入以缩短启动时间
+            import imghdr
+            
             # 检查是否为图片文件
             if not imghdr.what(file_path):
                 return None
@@ -168,6 +201,7 @@ class FileCleanupTool:
         """
         try:
             # 尝试使用ffprobe获取视频元数据（如果可用）
+            import subprocess
             try:
                 result = subprocess.run([
                     'ffprobe', '-v', 'quiet', '-print_format', 'json',
@@ -293,8 +327,12 @@ class FileCleanupTool:
             if total_to_process > 0:
                 self.log(f"需要计算哈希的文件数量: {total_to_process}")
                 
-                # 使用线程池并行计算哈希
-                with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() * 2)) as executor:
+                # 使用线程池并行计算哈希（批量模式下使用共用的线程池）
+                if self.executor is not None:
+                    context = nullcontext(self.executor)
+                else:
+                    context = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() * 2))
+                with context as executor:
                     # 提交所有需要计算哈希的文件任务
                     future_to_file = {}
                     for file_size, file_paths in size_groups.items():
@@ -504,8 +542,13 @@ class FileCleanupTool:
         if self.stats['empty_folders_removed'] > 0:
             self.log(f"共删除 {self.stats['empty_folders_removed']} 个空文件夹")
     
-    def run(self):
-        """运行文件清理工具"""
+    def run(self) -> bool:
+        """
+        运行文件清理工具
+        
+        Returns:
+            是否完成清理且没有发生错误
+        """
         self.log("=" * 60)
         self.log("文件清理工具启动")
         self.log(f"目标路径: {self.target_path}")
@@ -518,11 +561,11 @@ class FileCleanupTool:
             # 检查目标路径是否存在
             if not os.path.exists(self.target_path):
                 self.log(f"错误：指定的路径 '{self.target_path}' 不存在", "ERROR")
-                return
+                return False
             
             if not os.path.isdir(self.target_path):
                 self.log(f"错误：'{self.target_path}' 不是一个文件夹", "ERROR")
-                return
+                return False
             
             # 扫描文件并查找重复
             file_hash_map = self.scan_files()
@@ -549,24 +592,128 @@ class FileCleanupTool:
             self.log(f"删除的空文件夹: {self.stats['empty_folders_removed']}")
             self.log("=" * 60)
             
+            return self.stats['errors'] == 0
+            
         except Exception as e:
             self.log(f"工具执行过程中发生错误: {str(e)}", "ERROR")
             import traceback
             self.log(f"堆栈跟踪: {traceback.format_exc()}", "ERROR")
+            return False
+
+
+def read_batch_targets(source: str) -> Iterator[str]:
+    """
+    逐行读取批量模式的文件夹列表，忽略空行和 # 开头的注释行
+    
+    Args:
+        source: 列表文件路径，"-" 表示标准输入（每读到一行就产出）
+    """
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8-sig')
+    try:
+        for line in stream:
+            target = line.strip()
+            if target and not target.startswith('#'):
+                yield target
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def run_batch(targets: Iterable[str], results: TextIO, jobs: int = BATCH_JOBS, **options) -> bool:
+    """
+    批量模式：在一个进程中清理多个文件夹
+    
+    所有文件夹共用一个计算哈希的线程池和日志，同时处理 jobs 个文件夹；
+    每个文件夹完成后立即向 results 写入一行 JSON 结果记录
+    
+    Args:
+        targets: 文件夹路径（可以是逐行读取标准输入的迭代器）
+        results: 结果记录（JSONL）的输出流
+        jobs: 同时处理的文件夹数量
+        **options: FileCleanupTool 的其他参数
+        
+    Returns:
+        所有文件夹是否都清理成功
+    """
+    results_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max(1, jobs))
+    outcome = {'targets': 0, 'failed': 0}
+    
+    def write_record(record: Dict):
+        with results_lock:
+            outcome['targets'] += 1
+            outcome['failed'] += not record['success']
+            results.write(json.dumps(record, ensure_ascii=False) + '\n')
+            results.flush()
+    
+    def run_target(tool: FileCleanupTool):
+        started = time.perf_counter()
+        error = None
+        try:
+            success = tool.run()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"处理文件夹时发生错误: {tool.target_path} - {str(e)}")
+            success, error = False, str(e)
+        record = {
+            'target': tool.target_path,
+            'success': success,
+            'duration': round(time.perf_counter() - started, 3),
+            'stats': dict(tool.stats),
+        }
+        if error is not None:
+            record['error'] = error
+        write_record(record)
+    
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() * 2)) as executor, \
+            ThreadPoolExecutor(max_workers=max(1, jobs)) as target_executor:
+        for target in targets:
+            slots.acquire()
+            try:
+                tool = FileCleanupTool(target, executor=executor, **options)
+            except Exception as e:
+                # 创建失败（路径无效、无法打开日志文件等）只影响这一个文件夹
+                slots.release()
+                logging.getLogger(__name__).error(f"无法处理文件夹: {target} - {str(e)}")
+                write_record({'target': os.path.abspath(target), 'success': False, 'duration': 0.0,
+                              'stats': {}, 'error': str(e)})
+                continue
+            target_executor.submit(run_target, tool).add_done_callback(lambda _: slots.release())
+    
+    logging.getLogger(__name__).info(
+        f"批量模式完成: 共处理 {outcome['targets']} 个文件夹，其中 {outcome['failed']} 个失败")
+    return outcome['failed'] == 0
 
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="文件清理工具 - 删除重复文件和空文件夹")
-    parser.add_argument("path", help="要扫描的目标文件夹路径")
+    parser.add_argument("path", nargs="?", help="要扫描的目标文件夹路径")
     parser.add_argument("--log", "-l", help="日志文件路径（可选）")
     parser.add_argument("--dry-run", "-d", action="store_true", 
                        help="预览模式，只显示将要执行的操作而不实际执行")
     parser.add_argument("--no-fast-hash", action="store_true",
                        help="禁用快速哈希算法（使用SHA256，更安全但更慢）")
+    parser.add_argument("--batch-file", "-b", metavar="FILE",
+                       help="批量模式：清理列表文件中的所有文件夹（每行一个，\"-\" 表示从标准输入读取）")
+    parser.add_argument("--results", "-r", metavar="FILE", default="-",
+                       help="批量模式每个文件夹的结果记录（JSONL，默认输出到标准输出）")
+    parser.add_argument("--batch-jobs", type=int, default=BATCH_JOBS,
+                       help=f"批量模式同时处理的文件夹数量（默认{BATCH_JOBS}）")
     
     args = parser.parse_args()
     
+    if bool(args.path) == bool(args.batch_file):
+        parser.error("必须指定目标文件夹路径或 --batch-file（二者只能选一个）")
+    
+    if args.batch_file:
+        # 结果记录输出到标准输出时，控制台日志改写到标准错误
+        configure_logging(args.log or DEFAULT_LOG_FILE, sys.stderr if args.results == "-" else None)
+        results = nullcontext(sys.stdout) if args.results == "-" else open(args.results, 'a', encoding='utf-8')
+        with results as output:
+            success = run_batch(read_batch_targets(args.batch_file), output, args.batch_jobs,
+                                log_file=args.log, dry_run=args.dry_run, fast_hash=not args.no_fast_hash)
+        sys.exit(0 if success else 1)
+    
     # 运行清理工具
     tool = FileCleanupTool(args.path, args.log, args.dry_run, not args.no_fast_hash)
     tool.run()
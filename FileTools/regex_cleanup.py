@@ -11,12 +11,39 @@
 4. 可配置的清理规则
 5. 预览模式（dry-run）和安全删除
 6. 详细的操作日志记录
+7. 组合匹配：只是字面量的规则（完整文件名、后缀、前缀）改为哈希表查找，
+   其余正则合并为一个表达式，每个文件名只需一次 search，并能报告匹配的规则
+8. 类型化规则：配置文件的 rules 中可以使用 suffix、name、glob、path_regex、min_size、older_than 条件，
+   按代价从低到高检查，只有规则包含大小或时间条件时才读取文件信息
+9. 批量模式：--batch-file 在一个进程中清理列表中的所有文件夹，正则表达式只编译一次，
+   共用日志，每个文件夹完成后输出一行 JSON 结果记录
+10. 并行删除：按目录分批，多个线程同时删除（--delete-workers），释放的空间按扫描时读取的文件大小统计
+11. 流式模式：--stream 边扫描边删除，内存占用与匹配数量无关；预览时输出 JSONL 清理计划（--plan）
+12. 规则统计：记录每条规则的匹配次数和文件大小，--profile-rules 逐条计时并按耗时输出报告；
+    加载时检查容易产生大量回溯的正则（有歧义的重复，如 (a+)+、(a|a)*；(?:x+y)+ 这类以分隔符隔开的重复不报告）
+13. 隔离模式：--quarantine 把匹配项改名移动到按时间命名的隔离目录（每次运行一个元数据日志），
+    可以 --restore 恢复，--purge-older-than 清除过期的隔离目录；改名的代价与预览相当，不必先预览再扫描一遍
 
 使用示例：
 python regex_cleanup.py /path/to/folder
 python regex_cleanup.py /path/to/folder --dry-run
 python regex_cleanup.py /path/to/folder --pattern ".*\\.tmp$"
 python regex_cleanup.py /path/to/folder --config custom_rules.json
+python regex_cleanup.py --batch-file folders.txt --results results.jsonl
+python regex_cleanup.py /path/to/folder --stream --dry-run --plan plan.jsonl
+python regex_cleanup.py /path/to/folder --max-depth 2
+python regex_cleanup.py /path/to/folder --config rules.json --dry-run --profile-rules
+python regex_cleanup.py /path/to/folder --quarantine D:/quarantine
+python regex_cleanup.py --restore D:/quarantine/20240101-120000_folder
+python regex_cleanup.py --quarantine D:/quarantine --purge-older-than 30d
+
+配置文件中的类型化规则（一条规则中的所有条件都满足时匹配，条件的值可以是字符串或列表）：
+{"rules": [
+  {"suffix": [".log", ".tmp"], "ignore_case": true},
+  {"glob": "*.bak", "older_than": "30d"},
+  {"path_regex": "(^|/)build/.*\\\\.o$"},
+  {"suffix": ".dmp", "min_size": "1G", "description": "大于1GB的内存转储"}
+]}
 
 常见需要清理的文件模式（在正则表达式中用注释说明）：
 Windows系统：
@@ -39,17 +66,538 @@ import os
 import sys
 import re
 import argparse
+import errno
 import json
 import logging
 import shutil
+import stat
+import string
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Set, Optional, Pattern
+from typing import List, Dict, Set, Optional, Pattern, TextIO, Iterator, Iterable
 import fnmatch
 
+# 默认的日志文件
+DEFAULT_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regex_cleanup.log")
+
+# 批量模式同时处理的文件夹数量
+BATCH_JOBS = 4
+
+# 同时删除文件的线程数（删除操作受文件系统延迟限制，网络文件系统上尤其明显）
+DELETE_WORKERS = 8
+
+# 流式模式：每批最多删除的文件数，以及最多等待删除的批数（限制内存占用）
+STREAM_BATCH_SIZE = 256
+STREAM_QUEUE_SIZE = 64
+
+# 隔离目录中的元数据日志，以及存放隔离文件的子目录
+QUARANTINE_JOURNAL = "journal.jsonl"
+QUARANTINE_FILES = "files"
+
+# 是否支持打开目录后按文件名相对目录删除（Windows 不支持）
+_UNLINK_DIR_FD = os.unlink in os.supports_dir_fd
+
+# 正则中的字面量部分：转义的符号或普通字符
+_LITERAL_PATTERN = re.compile(r'(?:\\[^A-Za-z0-9]|[^\\.^$*+?{}\[\]|()])+')
+
+# 合并表达式时可以写成局部内联标志的标志位
+_SCOPED_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x'}
+
+# 类型化规则的条件：只看文件名、看相对路径、需要读取文件信息
+NAME_CONDITIONS = ('suffix', 'name', 'glob')
+PATH_CONDITIONS = ('path_regex',)
+STAT_CONDITIONS = ('min_size', 'older_than')
+
+# 大小和时间条件的单位
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+               'G': 1024 ** 3, 'GB': 1024 ** 3, 'T': 1024 ** 4, 'TB': 1024 ** 4}
+_DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_QUANTITY_PATTERN = re.compile(r'\s*(\d+(?:\.\d+)?)\s*([A-Za-z]*)\s*')
+
+
+def configure_logging(log_file: str, stream: TextIO = None):
+    """
+    日志配置：同时写入日志文件和控制台；已经配置过时不再重复打开日志文件
+    
+    Args:
+        log_file: 日志文件路径
+        stream: 控制台输出流（默认标准输出）
+    """
+    if logging.getLogger().handlers:
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(stream or sys.stdout)
+        ]
+    )
+
+
+def _literal(text: str) -> Optional[str]:
+    """正则片段只由字面量组成时返回去掉转义后的字符串，否则返回None"""
+    if not text or not _LITERAL_PATTERN.fullmatch(text):
+        return None
+    return re.sub(r'\\(.)', r'\1', text)
+
+
+def _parse_quantity(value, units: Dict[str, int], case_sensitive: bool) -> float:
+    """解析带单位的数量（如 "10M"、"7d"），数字按最小单位处理"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    found = _QUANTITY_PATTERN.fullmatch(str(value))
+    unit = found.group(2) if found else None
+    if unit is not None and not case_sensitive:
+        unit = unit.upper()
+    if unit not in units:
+        raise ValueError(f"无法解析的数量: {value!r}")
+    return float(found.group(1)) * units[unit]
+
+
+def _glob_pattern(glob: str, flags: int) -> Pattern:
+    """把通配符转换为正则；*后缀、前缀* 和不含通配符的写法转换为组合匹配器能查表的字面量正则"""
+    wildcards = '*?['
+    core = glob[1:] if glob.startswith('*') else glob
+    if not any(char in core for char in wildcards):
+        return re.compile((re.escape(core) + '$') if glob.startswith('*') else ('^' + re.escape(core) + '$'), flags)
+    if glob.endswith('*') and not any(char in glob[:-1] for char in wildcards):
+        return re.compile('^' + re.escape(glob[:-1]), flags)
+    return re.compile('^' + fnmatch.translate(glob), flags)
+
+
+class CleanupRule:
+    """
+    配置文件中的类型化规则，规则中的所有条件都满足时匹配
+    
+    条件（值可以是字符串或列表，列表中任意一个满足即可）：
+    suffix 文件名后缀、name 完整文件名、glob 通配符、path_regex 相对目标文件夹的路径（用 / 分隔）上的正则、
+    min_size 最小文件大小（如 "10M"）、older_than 最后修改时间早于多久以前（如 "7d"）。
+    包含 min_size 或 older_than 的规则只匹配文件，不匹配目录
+    """
+    
+    def __init__(self, spec: Dict):
+        """
+        Args:
+            spec: 配置文件中的规则，如 {"glob": "*.bak", "older_than": "30d"}
+            
+        Raises:
+            ValueError: 规则为空或包含未知的条件
+        """
+        if not isinstance(spec, dict):
+            raise ValueError("规则必须是 JSON 对象")
+        known = set(NAME_CONDITIONS + PATH_CONDITIONS + STAT_CONDITIONS)
+        unknown = set(spec) - known - {'description', 'ignore_case'}
+        if unknown:
+            raise ValueError(f"未知的条件: {', '.join(sorted(unknown))}")
+        conditions = {key: value for key, value in spec.items() if key in known}
+        if not conditions:
+            raise ValueError("规则中没有任何条件")
+        
+        self.ignore_case = bool(spec.get('ignore_case', False))
+        self.label = spec.get('description') or json.dumps(conditions, ensure_ascii=False)
+        flags = re.IGNORECASE if self.ignore_case else 0
+        
+        def values(key: str) -> List[str]:
+            value = spec[key]
+            value = [value] if isinstance(value, str) else list(value)
+            if not value or not all(isinstance(item, str) and item for item in value):
+                raise ValueError(f"{key} 必须是非空字符串或字符串列表")
+            return value
+        
+        # 文件名条件：逐条检查时使用的函数，以及可以交给组合匹配器的正则
+        self.name_tests = []
+        name_patterns = []
+        if 'suffix' in spec:
+            suffixes = values('suffix')
+            folded = tuple(suffix.lower() for suffix in suffixes) if self.ignore_case else tuple(suffixes)
+            self.name_tests.append(lambda name, suffixes=folded: name.endswith(suffixes))
+            name_patterns = [re.compile(re.escape(suffix) + '$', flags) for suffix in suffixes]
+        if 'name' in spec:
+            names = values('name')
+            folded = frozenset(name.lower() for name in names) if self.ignore_case else frozenset(names)
+            self.name_tests.append(lambda name, names=folded: name in names)
+            name_patterns = [re.compile('^' + re.escape(name) + '$', flags) for name in names]
+        if 'glob' in spec:
+            name_patterns = [_glob_pattern(glob, flags) for glob in values('glob')]
+            combined = re.compile('|'.join(f"(?:{pattern.pattern})" for pattern in name_patterns), flags)
+            self.name_tests.append(lambda name, combined=combined: combined.search(name) is not None)
+        
+        self.path_pattern = re.compile('|'.join(values('path_regex')), flags) if 'path_regex' in spec else None
+        self.min_size = _parse_quantity(spec['min_size'], _SIZE_UNITS, False) if 'min_size' in spec else None
+        self.older_than = (_parse_quantity(spec['older_than'], _DURATION_UNITS, True)
+                           if 'older_than' in spec else None)
+        self.needs_stat = self.min_size is not None or self.older_than is not None
+        
+        # 只有一个文件名条件的规则直接并入组合匹配器（查表或合并后的正则）
+        self.name_patterns = name_patterns if len(self.name_tests) == 1 and len(conditions) == 1 else []
+        # 检查代价：需要读取文件信息的最贵，其次是路径正则，没有文件名条件可以先排除的排在后面
+        self.cost = (self.needs_stat, self.path_pattern is not None, not self.name_tests)
+    
+    def matches(self, name: str, relative_path: str, get_stat, is_dir: bool, now: float) -> bool:
+        """
+        按代价从低到高检查规则的条件
+        
+        Args:
+            name: 文件名
+            relative_path: 相对目标文件夹的路径（用 / 分隔）
+            get_stat: 返回文件信息（os.stat_result，失败时为None）的函数，只在需要时调用
+            is_dir: 是否为目录
+            now: 计算文件年龄的当前时间
+            
+        Returns:
+            是否匹配
+        """
+        if self.needs_stat and is_dir:
+            return False
+        if self.name_tests:
+            folded = name.lower() if self.ignore_case else name
+            for test in self.name_tests:
+                if not test(folded):
+                    return False
+        if self.path_pattern is not None and not self.path_pattern.search(relative_path):
+            return False
+        if self.needs_stat:
+            info = get_stat()
+            if info is None:
+                return False
+            if self.min_size is not None and info.st_size < self.min_size:
+                return False
+            if self.older_than is not None and now - info.st_mtime < self.older_than:
+                return False
+        return True
+
+
+# 静态检查回溯风险时用于比较字符集合的代表字符（ASCII可打印字符和几个常见的非ASCII字符）
+RISK_PROBE_CHARS = string.printable + '\u00a0\u00e9\u00c9\u4e2d\u3000\uff10'
+
+
+class _RiskChecker:
+    """
+    在正则语法树上查找有歧义的重复：无上限的重复中，变长的部分能够匹配紧随其后的内容，
+    或者分支之间能匹配相同的文本时，同一段文本有指数级的划分方式，不匹配时回溯次数随长度指数增长。
+    
+    字符集合用 RISK_PROBE_CHARS 中的代表字符近似；占有量词和原子组不会回溯，不检查
+    """
+    
+    _char_cache: Dict[tuple, Set[str]] = {}
+    
+    def __init__(self, parser, ignore_case: bool):
+        self.parser = parser
+        self.ignore_case = ignore_case
+        self.repeats = {parser.MAX_REPEAT, parser.MIN_REPEAT}
+        self.no_backtrack = {getattr(parser, name) for name in ('POSSESSIVE_REPEAT', 'ATOMIC_GROUP')
+                             if hasattr(parser, name)}
+        self.char_ops = {parser.LITERAL, parser.NOT_LITERAL, parser.ANY, parser.IN, parser.CATEGORY}
+        self.categories = {
+            parser.CATEGORY_DIGIT: str.isdecimal,
+            parser.CATEGORY_SPACE: str.isspace,
+            parser.CATEGORY_WORD: lambda char: char.isalnum() or char == '_',
+            parser.CATEGORY_NOT_DIGIT: lambda char: not char.isdecimal(),
+            parser.CATEGORY_NOT_SPACE: lambda char: not char.isspace(),
+            parser.CATEGORY_NOT_WORD: lambda char: not (char.isalnum() or char == '_'),
+        }
+    
+    def _char_matches(self, op, av, char: str) -> bool:
+        """单个字符节点（LITERAL、IN、ANY 等）能否匹配该字符"""
+        parser = self.parser
+        if op == parser.LITERAL:
+            return ord(char) == av
+        if op == parser.NOT_LITERAL:
+            return ord(char) != av
+        if op == parser.ANY:
+            return char != '\n'
+        if op == parser.RANGE:
+            return av[0] <= ord(char) <= av[1]
+        if op == parser.CATEGORY:
+            test = self.categories.get(av)
+            return test is None or test(char)
+        if op == parser.IN:
+            negate = bool(av) and av[0][0] == parser.NEGATE
+            items = av[1:] if negate else av
+            return negate != any(self._char_matches(item_op, item_av, char) for item_op, item_av in items)
+        return True
+    
+    def _chars(self, op, av) -> Set[str]:
+        """单个字符节点能匹配的代表字符（所有正则共用缓存）"""
+        key = (op, str(av), self.ignore_case)
+        chars = self._char_cache.get(key)
+        if chars is None:
+            chars = self._char_cache[key] = set()
+            for char in RISK_PROBE_CHARS:
+                variants = {char, char.lower(), char.upper()} if self.ignore_case else (char,)
+                if any(self._char_matches(op, av, variant) for variant in variants):
+                    chars.add(char)
+        return chars
+    
+    def first(self, items) -> tuple:
+        """一段表达式可能匹配的第一个字符的集合，以及它能否匹配空串"""
+        chars: Set[str] = set()
+        for op, av in items:
+            node_chars, nullable = self._first_node(op, av)
+            chars |= node_chars
+            if not nullable:
+                return chars, False
+        return chars, True
+    
+    def _first_node(self, op, av) -> tuple:
+        parser = self.parser
+        if op in self.char_ops:
+            return self._chars(op, av), False
+        if op in self.repeats or op == getattr(parser, 'POSSESSIVE_REPEAT', None):
+            low, _, item = av
+            chars, nullable = self.first(item)
+            return chars, nullable or low == 0
+        if op == parser.SUBPATTERN:
+            return self.first(av[-1])
+        if op == getattr(parser, 'ATOMIC_GROUP', None):
+            return self.first(av)
+        if op == parser.BRANCH:
+            chars, nullable = set(), False
+            for branch in av[1]:
+                branch_chars, branch_nullable = self.first(branch)
+                chars |= branch_chars
+                nullable = nullable or branch_nullable
+            return chars, nullable
+        # 锚点、断言、反向引用等按不消耗字符处理
+        return set(), True
+    
+    def _branches_overlap(self, branches, follow: Set[str]) -> bool:
+        """
+        分支之间能否匹配相同的文本（如 (a|a)*、(ab|a.)*、(a|aa)+）
+        
+        只由单个字符节点组成的分支逐个位置比较，较短的分支与较长分支的开头相同、
+        较长分支多出的部分又能作为后续内容（follow）的开头时也有歧义；其他分支比较第一个字符
+        """
+        for index, branch in enumerate(branches):
+            for other in branches[index + 1:]:
+                if all(op in self.char_ops for op, _ in list(branch) + list(other)):
+                    shorter, longer = sorted((list(branch), list(other)), key=len)
+                    if all(self._chars(*node) & self._chars(*other_node)
+                           for node, other_node in zip(shorter, longer)):
+                        if len(shorter) == len(longer) or self._chars(*longer[len(shorter)]) & follow:
+                            return True
+                elif self.first(branch)[0] & self.first(other)[0]:
+                    return True
+        return False
+    
+    def ambiguous(self, items, follow: Set[str], inside_unbounded: bool = False) -> bool:
+        """
+        是否有歧义的重复
+        
+        Args:
+            items: 表达式序列
+            follow: 序列之后可能出现的第一个字符的集合（在无上限的重复中包括下一次重复的开头）
+            inside_unbounded: 是否位于无上限的重复中
+        """
+        parser = self.parser
+        items = list(items)
+        for index, (op, av) in enumerate(items):
+            if op in self.no_backtrack:
+                continue
+            rest_chars, rest_nullable = self.first(items[index + 1:])
+            after = rest_chars | follow if rest_nullable else rest_chars
+            
+            if op in self.repeats:
+                low, high, item = av
+                item_chars, _ = self.first(item)
+                # 变长的重复能匹配紧随其后的内容：同一段文本可以在两者之间任意划分
+                if inside_unbounded and low != high and item_chars & after:
+                    return True
+                if high == parser.MAXREPEAT:
+                    if self.ambiguous(item, item_chars | after, True):
+                        return True
+                elif self.ambiguous(item, item_chars | after if high > 1 else after, inside_unbounded):
+                    return True
+            elif op == parser.SUBPATTERN:
+                if self.ambiguous(av[-1], after, inside_unbounded):
+                    return True
+            elif op == parser.BRANCH:
+                if inside_unbounded and self._branches_overlap(av[1], after):
+                    return True
+                if any(self.ambiguous(branch, after, inside_unbounded) for branch in av[1]):
+                    return True
+        return False
+
+
+def backtracking_risk(pattern: Pattern) -> Optional[str]:
+    """
+    静态检查正则是否容易产生灾难性回溯
+    
+    Args:
+        pattern: 编译后的正则表达式
+        
+    Returns:
+        风险说明，没有发现风险时返回None
+    """
+    try:
+        from re import _parser as parser  # Python 3.11+
+    except ImportError:
+        import sre_parse as parser
+    try:
+        tree = parser.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+    if _RiskChecker(parser, bool(pattern.flags & re.IGNORECASE)).ambiguous(tree, set()):
+        return ("无上限的重复中，变长的部分能匹配紧随其后的内容，或分支能匹配相同的文本"
+                "（如 (a+)+、(\\w+\\s?)+、(a|a)*），不匹配时回溯次数随长度指数增长")
+    return None
+
+
+def _rename(source: str, destination: str):
+    """同一文件系统内直接改名；跨文件系统时退回为复制后删除"""
+    try:
+        os.rename(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, destination)
+
+
+def _remove_readonly(function, path, exc_info):
+    """shutil.rmtree 的错误处理：去掉只读属性后重试（如 Windows 上 .git 中的对象文件）"""
+    if not os.access(path, os.W_OK):
+        os.chmod(path, stat.S_IWRITE)
+        function(path)
+    else:
+        raise exc_info[1]
+
+
+class PatternMatcher:
+    r"""
+    把一组正则表达式编译为一个组合匹配器
+    
+    只是字面量的规则改为哈希表查找：^Thumbs\.db$ → 完整文件名，.*\.tmp$ → 后缀，^\._.* → 前缀；
+    其余正则合并为一个带命名组的分支表达式，一次 search 即可判断是否匹配并报告匹配的规则。
+    自带捕获组的正则（可能有反向引用，合并后组号会变化）仍单独匹配
+    """
+    
+    def __init__(self, patterns: List[Pattern]):
+        """
+        Args:
+            patterns: 编译后的正则表达式列表
+        """
+        self.patterns = list(patterns)
+        # 完整文件名 {文件名: 规则}，以及 {长度: {后缀/前缀: 规则}}；*_folded 为不区分大小写的规则（小写）
+        self._exact: Dict[str, Pattern] = {}
+        self._exact_folded: Dict[str, Pattern] = {}
+        self._suffixes: Dict[int, Dict[str, Pattern]] = {}
+        self._suffixes_folded: Dict[int, Dict[str, Pattern]] = {}
+        self._prefixes: Dict[int, Dict[str, Pattern]] = {}
+        self._prefixes_folded: Dict[int, Dict[str, Pattern]] = {}
+        self._separate: List[Pattern] = []
+        
+        alternatives = []
+        self._combined_rules: Dict[str, Pattern] = {}
+        for pattern in self.patterns:
+            if self._route_literal(pattern):
+                continue
+            flags = pattern.flags & ~re.UNICODE
+            if pattern.groups or flags & ~sum(_SCOPED_FLAGS):
+                self._separate.append(pattern)
+                continue
+            inline = ''.join(letter for flag, letter in _SCOPED_FLAGS.items() if flags & flag)
+            group = f"r{len(alternatives)}"
+            alternative = (f"(?P<{group}>(?{inline}:{pattern.pattern}))" if inline
+                           else f"(?P<{group}>{pattern.pattern})")
+            try:
+                re.compile(alternative)
+            except re.error:
+                # 个别写法无法放进分支（如写在开头的全局内联标志 (?i)），单独匹配
+                self._separate.append(pattern)
+                continue
+            alternatives.append(alternative)
+            self._combined_rules[group] = pattern
+        
+        self._combined = re.compile('|'.join(alternatives)) if alternatives else None
+    
+    def _route_literal(self, pattern: Pattern) -> bool:
+        """字面量规则放入完整文件名/后缀/前缀表，成功返回True"""
+        flags = pattern.flags & ~re.UNICODE
+        if flags not in (0, re.IGNORECASE):
+            return False
+        text = pattern.pattern
+        folded = flags == re.IGNORECASE
+        
+        if text.startswith('^.*') and text.endswith('$'):
+            kind, literal = 'suffix', _literal(text[3:-1])
+        elif text.startswith('^') and text.endswith('$'):
+            kind, literal = 'exact', _literal(text[1:-1])
+        elif text.endswith('$'):
+            core = text[:-1]
+            kind, literal = 'suffix', _literal(core[2:] if core.startswith('.*') else core)
+        elif text.startswith('^'):
+            core = text[1:]
+            kind, literal = 'prefix', _literal(core[:-2] if core.endswith('.*') else core)
+        else:
+            return False
+        
+        if literal is None or (folded and not literal.isascii()):
+            return False
+        if folded:
+            literal = literal.lower()
+        
+        if kind == 'exact':
+            table = self._exact_folded if folded else self._exact
+        else:
+            tables = ({'suffix': self._suffixes_folded, 'prefix': self._prefixes_folded} if folded
+                      else {'suffix': self._suffixes, 'prefix': self._prefixes})[kind]
+            table = tables.setdefault(len(literal), {})
+        table.setdefault(literal, pattern)
+        return True
+    
+    def match(self, name: str) -> Optional[Pattern]:
+        """
+        查找匹配文件名的规则
+        
+        Args:
+            name: 文件名
+            
+        Returns:
+            匹配的规则，没有匹配时返回None
+        """
+        folded = name.lower()
+        rule = self._exact.get(name) or self._exact_folded.get(folded)
+        if rule is not None:
+            return rule
+        
+        for key, tables in ((name, self._suffixes), (folded, self._suffixes_folded)):
+            for length, table in tables.items():
+                rule = table.get(key[-length:])
+                if rule is not None:
+                    return rule
+        
+        for key, tables in ((name, self._prefixes), (folded, self._prefixes_folded)):
+            for length, table in tables.items():
+                rule = table.get(key[:length])
+                if rule is not None:
+                    return rule
+        
+        if self._combined is not None:
+            found = self._combined.search(name)
+            if found is not None:
+                return self._combined_rules[found.lastgroup]
+        
+        for pattern in self._separate:
+            if pattern.search(name):
+                return pattern
+        return None
+
+
 class RegexFileCleanup:
     def __init__(self, target_path: str, patterns: List[str] = None, 
                  config_file: str = None, dry_run: bool = False, 
-                 log_file: str = None, recursive: bool = True):
+                 log_file: str = None, recursive: bool = True,
+                 compiled_patterns: List[Pattern] = None,
+                 compiled_rules: List[CleanupRule] = None,
+                 delete_workers: int = DELETE_WORKERS,
+                 stream: bool = False, plan: TextIO = None,
+                 max_depth: int = None, profile_rules: bool = False,
+                 quarantine: str = None, executor: ThreadPoolExecutor = None):
         """
         初始化正则表达式文件清理工具
         
@@ -59,18 +607,45 @@ class RegexFileCleanup:
             config_file: 配置文件路径（JSON格式，可选）
             dry_run: 预览模式，不实际执行删除操作
             log_file: 日志文件路径（可选）
-            recursive: 是否递归扫描子目录
+            recursive: 是否递归扫描子目录（不递归时只匹配目标文件夹中的文件，不匹配也不进入其中的目录）
+            compiled_patterns: 已编译的模式（批量模式下多个文件夹共用），提供时忽略 patterns 和 config_file
+            compiled_rules: 与 compiled_patterns 一起提供的类型化规则
+            delete_workers: 同时删除文件的线程数
+            stream: 流式模式，边扫描边删除
+            plan: 流式预览模式下输出 JSONL 清理计划的流（可选，未指定时逐条记录日志）
+            max_depth: 最多进入几层子目录（0 表示只扫描目标文件夹中的文件和目录，None 表示不限制）
+            profile_rules: 逐条规则计时，完成后输出按耗时排序的规则报告（会降低扫描速度）
+            quarantine: 隔离目录（可选），匹配项移动到其中按时间命名的子目录而不是删除
+            executor: 共用的删除线程池（批量模式下多个文件夹共用，由调用方关闭），默认每次清理创建一个
         """
         self.target_path = os.path.abspath(target_path)
         self.dry_run = dry_run
         self.recursive = recursive
-        self.log_file = log_file or os.path.join(os.path.dirname(__file__), "regex_cleanup.log")
+        self.max_depth = max_depth
+        self.profile_rules = profile_rules
+        self.quarantine_root = os.path.abspath(quarantine) if quarantine else None
+        # 本次运行的隔离目录和元数据日志，第一次隔离时创建
+        self.quarantine_dir = None
+        self.quarantine_journal = None
+        self.quarantine_lock = threading.Lock()
+        self.delete_workers = max(1, delete_workers)
+        self.executor = executor
+        self.stream = stream
+        self.plan = plan
+        self.log_file = log_file or DEFAULT_LOG_FILE
         
         # 设置日志
         self.setup_logging()
         
-        # 编译正则表达式模式
-        self.patterns = self.load_patterns(patterns, config_file)
+        # 编译正则表达式模式和类型化规则
+        self.rules: List[CleanupRule] = []
+        if compiled_patterns is not None:
+            self.patterns = compiled_patterns
+            self.rules = list(compiled_rules or [])
+        else:
+            self.patterns = self.load_patterns(patterns, config_file)
+        self.setup_matcher()
+        self.scan_time = time.time()
         
         # 统计信息
         self.stats = {
@@ -81,20 +656,43 @@ class RegexFileCleanup:
             'dirs_matched': 0,
             'dirs_removed': 0,
             'space_saved': 0,
+            'bytes_quarantined': 0,
             'errors': 0
         }
+        # 并行删除时保护统计信息
+        self.stats_lock = threading.Lock()
+    
+    def setup_matcher(self):
+        """
+        建立组合匹配器：只有一个文件名条件的类型化规则并入正则的组合匹配器，
+        其余规则（带路径、大小、时间条件）按检查代价从低到高排序
+        """
+        self.rule_labels: Dict[Pattern, str] = {}
+        self.conditional_rules: List[CleanupRule] = []
+        own_patterns = set(self.patterns)
+        rule_patterns = []
+        for rule in self.rules:
+            if not rule.name_patterns:
+                self.conditional_rules.append(rule)
+                continue
+            for pattern in rule.name_patterns:
+                if pattern not in own_patterns:
+                    self.rule_labels.setdefault(pattern, rule.label)
+                rule_patterns.append(pattern)
+        self.conditional_rules.sort(key=lambda rule: rule.cost)
+        self.matcher = PatternMatcher(self.patterns + rule_patterns)
+        
+        # 每条规则的统计：匹配次数、匹配文件的总大小、累计匹配耗时（仅 profile_rules 时计时）
+        self.rule_stats: Dict[str, Dict[str, float]] = {}
+        self._profiled_patterns = [(pattern.pattern, pattern) for pattern in self.patterns]
+        for rule in self.rules:
+            self._profiled_patterns.extend((rule.label, pattern) for pattern in rule.name_patterns)
+        for label in [pattern.pattern for pattern in self.patterns] + [rule.label for rule in self.rules]:
+            self.rule_stats.setdefault(label, {'matches': 0, 'bytes': 0, 'time': 0.0})
     
     def setup_logging(self):
         """设置日志配置"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S',
-            handlers=[
-                logging.FileHandler(self.log_file, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        configure_logging(self.log_file)
         self.logger = logging.getLogger(__name__)
     
     def log(self, message: str, level: str = "INFO"):
@@ -135,6 +733,14 @@ class RegexFileCleanup:
                             self.log(f"从配置文件加载模式: {pattern_str}")
                         except re.error as e:
                             self.log(f"无效的正则表达式 '{pattern_str}': {e}", "WARNING")
+                
+                for spec in config.get('rules', []):
+                    try:
+                        rule = CleanupRule(spec)
+                        self.rules.append(rule)
+                        self.log(f"从配置文件加载规则: {rule.label}")
+                    except (ValueError, re.error) as e:
+                        self.log(f"无效的规则 {json.dumps(spec, ensure_ascii=False)}: {e}", "WARNING")
             except Exception as e:
                 self.log(f"加载配置文件失败: {config_file} - {str(e)}", "ERROR")
         
@@ -148,11 +754,18 @@ class RegexFileCleanup:
                 except re.error as e:
                     self.log(f"无效的正则表达式 '{pattern_str}': {e}", "WARNING")
         
-        # 如果没有提供任何模式，使用默认模式
-        if not compiled_patterns:
+        # 如果没有提供任何模式和规则，使用默认模式
+        if not compiled_patterns and not self.rules:
             compiled_patterns = self.get_default_patterns()
             self.log("使用默认清理模式")
         
+        # 检查容易产生大量回溯的正则
+        checked = compiled_patterns + [rule.path_pattern for rule in self.rules if rule.path_pattern is not None]
+        for pattern in checked:
+            risk = backtracking_risk(pattern)
+            if risk:
+                self.log(f"正则表达式可能很慢 '{pattern.pattern}': {risk}", "WARNING")
+        
         return compiled_patterns
     
     def get_default_patterns(self) -> List[Pattern]:
@@ -226,111 +839,342 @@ class RegexFileCleanup:
         Returns:
             如果匹配任何模式返回True，否则返回False
         """
-        for pattern in self.patterns:
-            if pattern.search(name):
-                return True
-        return False
+        return self.matcher.match(name) is not None
+    
+    def matching_rule(self, name: str) -> Optional[str]:
+        """
+        返回匹配文件名的规则（正则表达式原文）
+        
+        Args:
+            name: 文件名
+            
+        Returns:
+            匹配的规则，没有匹配时返回None
+        """
+        rule = self.matcher.match(name)
+        return self.rule_labels.get(rule, rule.pattern) if rule is not None else None
+    
+    @staticmethod
+    def lazy_stat(entry):
+        """
+        返回读取文件信息的函数，只在第一次调用时读取（不跟随符号链接，失败时返回None）
+        
+        Args:
+            entry: os.DirEntry（Windows 上扫描目录时已带有文件信息，不需要额外的系统调用）或文件路径
+        """
+        info = []
+        
+        def get_stat():
+            if not info:
+                try:
+                    info.append(entry.stat(follow_symlinks=False) if isinstance(entry, os.DirEntry)
+                                else os.lstat(entry))
+                except OSError:
+                    info.append(None)
+            return info[0]
+        return get_stat
+    
+    def match_entry(self, name: str, path: str, is_dir: bool = False, get_stat=None) -> Optional[str]:
+        """
+        检查扫描到的文件或目录是否需要清理
+        
+        先用组合匹配器匹配文件名，再按代价从低到高检查带路径、大小、时间条件的规则，
+        只有检查到大小或时间条件时才读取文件信息（每个文件最多一次）
+        
+        Args:
+            name: 文件名
+            path: 完整路径
+            is_dir: 是否为目录
+            get_stat: 读取文件信息的函数（可选，扫描时与统计文件大小共用）
+            
+        Returns:
+            匹配的规则（正则原文或规则描述），没有匹配时返回None
+        """
+        if self.profile_rules:
+            self._profile_name(name)
+        
+        rule = self.matcher.match(name)
+        if rule is not None:
+            return self.rule_labels.get(rule, rule.pattern)
+        if not self.conditional_rules:
+            return None
+        
+        relative_path = path[len(self.target_path):].lstrip(os.sep).replace(os.sep, '/')
+        if get_stat is None:
+            get_stat = self.lazy_stat(path)
+        
+        for rule in self.conditional_rules:
+            if self.profile_rules:
+                started = time.perf_counter()
+                matched = rule.matches(name, relative_path, get_stat, is_dir, self.scan_time)
+                self.rule_stats[rule.label]['time'] += time.perf_counter() - started
+            else:
+                matched = rule.matches(name, relative_path, get_stat, is_dir, self.scan_time)
+            if matched:
+                return rule.label
+        return None
+    
+    def _profile_name(self, name: str):
+        """逐条对文件名计时匹配（组合匹配器一次匹配所有规则，无法区分每条规则的耗时）"""
+        clock = time.perf_counter
+        rule_stats = self.rule_stats
+        for label, pattern in self._profiled_patterns:
+            started = clock()
+            pattern.search(name)
+            rule_stats[label]['time'] += clock() - started
+    
+    def _count_match(self, rule: str, size: Optional[int]):
+        """记录规则的匹配次数和匹配文件的大小"""
+        counters = self.rule_stats.setdefault(rule, {'matches': 0, 'bytes': 0, 'time': 0.0})
+        counters['matches'] += 1
+        counters['bytes'] += size or 0
+    
+    def iter_matches(self) -> Iterator[tuple]:
+        """
+        扫描目录，逐个产出匹配的文件和文件夹
+        
+        匹配的目录会整个删除，扫描时不再进入，不枚举其中的内容，
+        因此产出的文件不会位于之前或之后产出的目录中，边扫描边删除时不会出现目录先于其内容被删除的情况
+        
+        Yields:
+            (路径, 是否为目录, 文件大小（目录为None）, 匹配的规则)
+        """
+        # older_than 条件以扫描开始的时间为准
+        self.scan_time = time.time()
+        
+        # 检查目标目录本身（匹配时整个目录都会被删除，无需再扫描其中的内容）
+        rule = self.match_entry(os.path.basename(self.target_path), self.target_path, True)
+        if rule is not None:
+            self.stats['total_dirs_scanned'] += 1
+            self.stats['dirs_matched'] += 1
+            self.log(f"匹配的目录: {self.target_path}", "DEBUG")
+            self._count_match(rule, None)
+            yield self.target_path, True, None, rule
+        else:
+            # 用 os.scandir 逐层扫描：文件类型来自目录项，不需要为每一项单独 stat
+            pending = [(self.target_path, 0)]
+            while pending:
+                dir_path, depth = pending.pop()
+                self.stats['total_dirs_scanned'] += 1
+                try:
+                    with os.scandir(dir_path) as iterator:
+                        entries = list(iterator)
+                except OSError as e:
+                    self.log(f"无法读取目录: {dir_path} - {str(e)}", "WARNING")
+                    continue
+                
+                subdirs = []
+                for entry in entries:
+                    # 指向目录的符号链接按文件处理（只删除链接本身，不进入）
+                    if entry.is_dir(follow_symlinks=False):
+                        # 不递归时只匹配文件：目录（包括 .git、.idea 等）既不匹配也不进入
+                        if not self.recursive:
+                            continue
+                        # 隔离目录位于目标文件夹中时不扫描
+                        if entry.path == self.quarantine_root:
+                            continue
+                        # 匹配的目录整个删除，不再进入
+                        rule = self.match_entry(entry.name, entry.path, True)
+                        if rule is not None:
+                            self.stats['dirs_matched'] += 1
+                            self.log(f"匹配的目录: {entry.path}", "DEBUG")
+                            self._count_match(rule, None)
+                            yield entry.path, True, None, rule
+                        elif self.max_depth is None or depth < self.max_depth:
+                            subdirs.append(entry.path)
+                        continue
+                    
+                    self.stats['total_files_scanned'] += 1
+                    get_stat = self.lazy_stat(entry)
+                    rule = self.match_entry(entry.name, entry.path, get_stat=get_stat)
+                    if rule is not None:
+                        self.stats['files_matched'] += 1
+                        self.log(f"匹配的文件: {entry.path}", "DEBUG")
+                        
+                        # 每100个文件报告一次进度
+                        if self.stats['total_files_scanned'] % 100 == 0:
+                            self.log(f"已扫描 {self.stats['total_files_scanned']} 个文件...")
+                        size = self._stat_size(get_stat)
+                        self._count_match(rule, size)
+                        yield entry.path, False, size, rule
+                
+                # 按目录项的顺序深度优先扫描子目录
+                pending.extend((subdir, depth + 1) for subdir in reversed(subdirs))
     
     def scan_directory(self) -> Dict[str, List[str]]:
         """
         扫描目录，查找匹配的文件和文件夹
         
         Returns:
-            字典：{'files': [文件路径列表], 'dirs': [文件夹路径列表]}
+            字典：{'files': [文件路径列表], 'dirs': [文件夹路径列表], 'sizes': [与 files 对应的文件大小]}
         """
         self.log(f"开始扫描目录: {self.target_path}")
         
         matched_files = []
+        matched_sizes = []
         matched_dirs = []
         
         try:
-            if self.recursive:
-                # 递归扫描
-                for root, dirs, files in os.walk(self.target_path):
-                    self.stats['total_dirs_scanned'] += 1
-                    
-                    # 检查当前目录名是否匹配
-                    dir_name = os.path.basename(root)
-                    if self.matches_any_pattern(dir_name):
-                        matched_dirs.append(root)
-                        self.log(f"匹配的目录: {root}", "DEBUG")
-                    
-                    # 检查文件
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        self.stats['total_files_scanned'] += 1
-                        
-                        if self.matches_any_pattern(file):
-                            matched_files.append(file_path)
-                            self.log(f"匹配的文件: {file_path}", "DEBUG")
-                            
-                            # 每100个文件报告一次进度
-                            if self.stats['total_files_scanned'] % 100 == 0:
-                                self.log(f"已扫描 {self.stats['total_files_scanned']} 个文件...")
-            else:
-                # 仅扫描当前目录
-                self.stats['total_dirs_scanned'] += 1
-                
-                # 检查当前目录
-                dir_name = os.path.basename(self.target_path)
-                if self.matches_any_pattern(dir_name):
-                    matched_dirs.append(self.target_path)
-                
-                # 检查文件
-                for item in os.listdir(self.target_path):
-                    item_path = os.path.join(self.target_path, item)
-                    
-                    if os.path.isfile(item_path):
-                        self.stats['total_files_scanned'] += 1
-                        
-                        if self.matches_any_pattern(item):
-                            matched_files.append(item_path)
-                            self.log(f"匹配的文件: {item_path}", "DEBUG")
-            
-            self.stats['files_matched'] = len(matched_files)
-            self.stats['dirs_matched'] = len(matched_dirs)
+            for path, is_dir, size, _ in self.iter_matches():
+                if is_dir:
+                    matched_dirs.append(path)
+                else:
+                    matched_files.append(path)
+                    matched_sizes.append(size)
             
             self.log(f"扫描完成: 共扫描 {self.stats['total_files_scanned']} 个文件和 {self.stats['total_dirs_scanned']} 个目录")
             self.log(f"匹配结果: {self.stats['files_matched']} 个文件, {self.stats['dirs_matched']} 个目录")
             
-            return {'files': matched_files, 'dirs': matched_dirs}
+            return {'files': matched_files, 'dirs': matched_dirs, 'sizes': matched_sizes}
             
         except Exception as e:
             self.log(f"扫描目录时发生错误: {str(e)}", "ERROR")
             self.stats['errors'] += 1
-            return {'files': [], 'dirs': []}
+            return {'files': [], 'dirs': [], 'sizes': []}
     
-    def remove_file(self, file_path: str) -> bool:
+    def stream_cleanup(self):
+        """
+        流式清理：边扫描边删除，内存占用与匹配数量无关
+        
+        匹配的文件按目录分批（每批最多 STREAM_BATCH_SIZE 个），最多 STREAM_QUEUE_SIZE 批等待删除，
+        删除线程跟不上时扫描暂停；预览模式下指定了 plan 时输出 JSONL 格式的清理计划，不再逐条记录日志
+        """
+        self.log(f"开始流式扫描和清理: {self.target_path}")
+        
+        slots = threading.BoundedSemaphore(STREAM_QUEUE_SIZE)
+        with self._delete_executor() as executor:
+            def submit(function, *args):
+                slots.acquire()
+                executor.submit(function, *args).add_done_callback(lambda _: slots.release())
+            
+            batch_dir, batch = None, []
+            try:
+                for path, is_dir, size, rule in self.iter_matches():
+                    if self.dry_run and self.plan is not None:
+                        self.write_plan(path, is_dir, size, rule)
+                    elif is_dir:
+                        submit(self.remove_directory, path)
+                    else:
+                        dir_path, name = os.path.split(path)
+                        if dir_path != batch_dir or len(batch) >= STREAM_BATCH_SIZE:
+                            if batch:
+                                submit(self.remove_files, batch_dir, batch)
+                            batch_dir, batch = dir_path, []
+                        batch.append((name, size))
+                if batch:
+                    submit(self.remove_files, batch_dir, batch)
+            except Exception as e:
+                self.log(f"扫描目录时发生错误: {str(e)}", "ERROR")
+                with self.stats_lock:
+                    self.stats['errors'] += 1
+            
+            # 共用的线程池不随本次清理关闭：取回全部名额，即等待本次提交的删除任务全部完成
+            for _ in range(STREAM_QUEUE_SIZE):
+                slots.acquire()
+        
+        self.close_quarantine()
+        self.log(f"扫描完成: 共扫描 {self.stats['total_files_scanned']} 个文件和 {self.stats['total_dirs_scanned']} 个目录")
+        self.log_summary()
+    
+    def _delete_executor(self):
+        """删除使用的线程池：批量模式下使用共用的线程池（不关闭），否则创建一个，清理完成后关闭"""
+        if self.executor is not None:
+            return nullcontext(self.executor)
+        return ThreadPoolExecutor(max_workers=self.delete_workers)
+    
+    def write_plan(self, path: str, is_dir: bool, size: Optional[int], rule: str):
+        """
+        向清理计划写入一行 JSON 记录
+        
+        Args:
+            path: 将要删除的路径
+            is_dir: 是否为目录
+            size: 文件大小
+            rule: 匹配的规则
+        """
+        record = {'type': 'dir' if is_dir else 'file', 'path': path, 'size': size, 'rule': rule}
+        self.plan.write(json.dumps(record, ensure_ascii=False) + '\n')
+    
+    @staticmethod
+    def _stat_size(get_stat) -> Optional[int]:
+        """扫描时读取的文件大小（读取失败时为None，删除时再获取）"""
+        info = get_stat()
+        return info.st_size if info is not None else None
+    
+    def remove_file(self, file_path: str, file_size: int = None) -> bool:
         """
         删除文件
         
         Args:
             file_path: 文件路径
+            file_size: 扫描时记录的文件大小（可选，用于统计）
             
         Returns:
             成功返回True，失败返回False
         """
-        try:
-            if self.dry_run:
-                self.log(f"[预览] 将删除文件: {file_path}")
-                return True
-            
-            # 获取文件大小（用于统计）
-            file_size = os.path.getsize(file_path)
-            
-            # 删除文件
-            os.remove(file_path)
-            
-            self.log(f"已删除文件: {file_path}")
-            self.stats['files_removed'] += 1
-            self.stats['space_saved'] += file_size
-            
-            return True
+        dir_path, name = os.path.split(file_path)
+        return self.remove_files(dir_path, [(name, file_size)])
+    
+    def remove_files(self, dir_path: str, entries: List[tuple]) -> bool:
+        """
+        删除同一目录下的一批文件
+        
+        支持 dir_fd 的系统上只打开一次目录，按文件名相对目录删除，不必为每个文件重新解析完整路径
+        
+        Args:
+            dir_path: 目录路径
+            entries: [(文件名, 扫描时记录的文件大小或None)]
             
-        except Exception as e:
-            self.log(f"删除文件失败: {file_path} - {str(e)}", "ERROR")
-            self.stats['errors'] += 1
-            return False
+        Returns:
+            全部删除成功返回True
+        """
+        removed = space_saved = quarantined = errors = 0
+        dir_fd = None
+        if not self.dry_run and self.quarantine_root is None and _UNLINK_DIR_FD:
+            try:
+                dir_fd = os.open(dir_path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            except OSError:
+                # 打不开目录时按完整路径逐个删除，由删除操作报告具体错误
+                dir_fd = None
+        
+        try:
+            for name, file_size in entries:
+                file_path = os.path.join(dir_path, name)
+                if self.dry_run:
+                    self.log(f"[预览] 将{'隔离' if self.quarantine_root else '删除'}文件: {file_path}")
+                    continue
+                
+                try:
+                    if file_size is None:
+                        file_size = os.lstat(file_path).st_size
+                    if self.quarantine_root is not None:
+                        self.quarantine_entry(file_path, False, file_size)
+                        self.log(f"已隔离文件: {file_path}")
+                        removed += 1
+                        quarantined += file_size
+                        continue
+                    if dir_fd is not None:
+                        os.unlink(name, dir_fd=dir_fd)
+                    else:
+                        os.remove(file_path)
+                    
+                    self.log(f"已删除文件: {file_path}")
+                    removed += 1
+                    space_saved += file_size
+                    
+                except Exception as e:
+                    self.log(f"删除文件失败: {file_path} - {str(e)}", "ERROR")
+                    errors += 1
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+        
+        with self.stats_lock:
+            self.stats['files_removed'] += removed
+            self.stats['space_saved'] += space_saved
+            self.stats['bytes_quarantined'] += quarantined
+            self.stats['errors'] += errors
+        return errors == 0
     
     def remove_directory(self, dir_path: str) -> bool:
         """
@@ -344,22 +1188,89 @@ class RegexFileCleanup:
         """
         try:
             if self.dry_run:
-                self.log(f"[预览] 将删除目录: {dir_path}")
+                self.log(f"[预览] 将{'隔离' if self.quarantine_root else '删除'}目录: {dir_path}")
                 return True
             
-            # 递归删除目录
-            shutil.rmtree(dir_path)
-            
-            self.log(f"已删除目录: {dir_path}")
-            self.stats['dirs_removed'] += 1
+            if self.quarantine_root is not None:
+                # 整个目录改名移动到隔离目录
+                self.quarantine_entry(dir_path, True, None)
+                self.log(f"已隔离目录: {dir_path}")
+            else:
+                # 一次性删除整个目录树（只读文件先去掉只读属性再重试）
+                shutil.rmtree(dir_path, onerror=_remove_readonly)
+                self.log(f"已删除目录: {dir_path}")
+            with self.stats_lock:
+                self.stats['dirs_removed'] += 1
             
             return True
             
         except Exception as e:
             self.log(f"删除目录失败: {dir_path} - {str(e)}", "ERROR")
-            self.stats['errors'] += 1
+            with self.stats_lock:
+                self.stats['errors'] += 1
             return False
     
+    def open_quarantine(self) -> str:
+        """
+        返回本次运行的隔离目录，第一次调用时创建隔离目录和元数据日志
+        
+        隔离目录按 "时间_目标文件夹名" 命名，日志第一行记录目标文件夹和创建时间
+        """
+        with self.quarantine_lock:
+            if self.quarantine_dir is None:
+                name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{os.path.basename(self.target_path)}"
+                index = 0
+                while True:
+                    run_dir = os.path.join(self.quarantine_root, name if not index else f"{name}_{index}")
+                    try:
+                        os.makedirs(run_dir)
+                        break
+                    except FileExistsError:
+                        index += 1
+                self.quarantine_journal = open(os.path.join(run_dir, QUARANTINE_JOURNAL), 'a', encoding='utf-8')
+                header = {'target': self.target_path, 'created': time.time(),
+                          'time': datetime.now().isoformat(timespec='seconds')}
+                self.quarantine_journal.write(json.dumps(header, ensure_ascii=False) + '\n')
+                self.quarantine_dir = run_dir
+                self.log(f"隔离目录: {run_dir}")
+            elif self.quarantine_journal is None:
+                self.quarantine_journal = open(os.path.join(self.quarantine_dir, QUARANTINE_JOURNAL), 'a',
+                                               encoding='utf-8')
+            return self.quarantine_dir
+    
+    def close_quarantine(self):
+        """关闭隔离目录的元数据日志"""
+        with self.quarantine_lock:
+            if self.quarantine_journal is not None:
+                self.quarantine_journal.close()
+                self.quarantine_journal = None
+    
+    def quarantine_entry(self, path: str, is_dir: bool, size: Optional[int]):
+        """
+        把文件或目录移动到隔离目录中（保持相对目标文件夹的路径）
+        
+        先写日志再移动：中途中断时日志中可能有尚未移动的记录，恢复时会跳过
+        
+        Args:
+            path: 文件或目录路径
+            is_dir: 是否为目录
+            size: 文件大小
+        """
+        run_dir = self.open_quarantine()
+        relative_path = os.path.relpath(path, self.target_path)
+        if relative_path == os.curdir:
+            relative_path = os.path.basename(self.target_path)
+        stored = os.path.join(QUARANTINE_FILES, relative_path)
+        record = {'original': path, 'stored': stored.replace(os.sep, '/'),
+                  'type': 'dir' if is_dir else 'file', 'size': size}
+        with self.quarantine_lock:
+            self.quarantine_journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.quarantine_journal.flush()
+        
+        stored_path = os.path.join(run_dir, stored)
+        os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+        _rename(path, stored_path)
+    
     def cleanup(self, matches: Dict[str, List[str]]):
         """
         执行清理操作
@@ -369,26 +1280,46 @@ class RegexFileCleanup:
         """
         self.log("开始清理操作...")
         
-        # 先删除文件
-        if matches['files']:
-            self.log(f"准备删除 {len(matches['files'])} 个匹配的文件...")
+        with self._delete_executor() as executor:
+            # 先删除文件：按所在目录分批，每批由一个线程删除
+            if matches['files']:
+                self.log(f"准备删除 {len(matches['files'])} 个匹配的文件（{self.delete_workers} 个线程）...")
+                
+                batches: Dict[str, List[tuple]] = {}
+                sizes = matches.get('sizes') or [None] * len(matches['files'])
+                for file_path, file_size in zip(matches['files'], sizes):
+                    dir_path, name = os.path.split(file_path)
+                    batches.setdefault(dir_path, []).append((name, file_size))
+                list(executor.map(lambda batch: self.remove_files(*batch), batches.items()))
             
-            for file_path in matches['files']:
-                self.remove_file(file_path)
+            # 再删除目录（扫描时已剪除匹配目录的子树，目录之间不会相互嵌套，每个目录整棵删除一次）
+            if matches['dirs']:
+                self.log(f"准备删除 {len(matches['dirs'])} 个匹配的目录...")
+                
+                list(executor.map(self.remove_directory, matches['dirs']))
         
-        # 再删除目录（按路径长度排序，先删除最深层的目录）
-        if matches['dirs']:
-            self.log(f"准备删除 {len(matches['dirs'])} 个匹配的目录...")
-            
-            # 按路径长度排序，先删除最深层的目录
-            sorted_dirs = sorted(matches['dirs'], key=len, reverse=True)
-            
-            for dir_path in sorted_dirs:
-                # 检查目录是否仍然存在（可能已经被父目录删除）
-                if os.path.exists(dir_path):
-                    self.remove_directory(dir_path)
+        self.close_quarantine()
+        self.log_summary()
+    
+    def log_rule_profile(self):
+        """输出规则报告：按累计匹配耗时排序，列出从未匹配的规则"""
+        self.log("=" * 60)
+        self.log("规则报告（按匹配耗时排序）:")
+        self.log(f"  {'耗时(毫秒)':>10}  {'匹配次数':>8}  {'大小(MB)':>10}  规则")
+        ranked = sorted(self.rule_stats.items(), key=lambda item: item[1]['time'], reverse=True)
+        for label, counters in ranked:
+            self.log(f"  {counters['time'] * 1000:>12.3f}  {counters['matches']:>12}  "
+                     f"{counters['bytes'] / (1024 * 1024):>10.2f}  {label}")
         
-        # 输出统计信息
+        unmatched = [label for label, counters in self.rule_stats.items() if counters['matches'] == 0]
+        if unmatched:
+            self.log(f"从未匹配的规则（{len(unmatched)} 条）:")
+            for label in unmatched:
+                self.log(f"  {label}")
+        self.log("=" * 60)
+    
+    def log_summary(self):
+        """输出统计信息"""
         self.log("=" * 60)
         self.log("清理操作完成统计:")
         self.log(f"扫描的文件数: {self.stats['total_files_scanned']}")
@@ -402,27 +1333,48 @@ class RegexFileCleanup:
             space_saved_mb = self.stats['space_saved'] / (1024 * 1024)
             self.log(f"节省的空间: {space_saved_mb:.2f} MB")
         
+        if self.quarantine_dir is not None:
+            self.log(f"隔离的文件大小: {self.stats['bytes_quarantined'] / (1024 * 1024):.2f} MB")
+            self.log(f"隔离目录: {self.quarantine_dir}（可用 --restore 恢复）")
+        
         if self.stats['errors'] > 0:
             self.log(f"发生的错误数: {self.stats['errors']}", "WARNING")
         
         self.log("=" * 60)
     
-    def run(self):
-        """运行清理工具"""
+    def run(self) -> bool:
+        """
+        运行清理工具
+        
+        Returns:
+            是否完成清理且没有发生错误
+        """
         self.log("=" * 60)
         self.log("正则表达式文件清理工具启动")
         self.log(f"目标路径: {self.target_path}")
         self.log(f"日志文件: {self.log_file}")
         self.log(f"递归扫描: {'是' if self.recursive else '否'}")
+        if self.recursive and self.max_depth is not None:
+            self.log(f"最大深度: {self.max_depth}")
         self.log(f"模式数量: {len(self.patterns)}")
+        if self.rules:
+            self.log(f"规则数量: {len(self.rules)}")
         
         if self.dry_run:
             self.log("运行模式: 预览模式（不实际执行删除操作）")
+        if self.stream:
+            self.log("流式模式: 边扫描边删除")
+        if self.quarantine_root:
+            self.log(f"隔离模式: 匹配项移动到 {self.quarantine_root}")
         
         # 显示使用的模式
         self.log("使用的正则表达式模式:")
         for i, pattern in enumerate(self.patterns, 1):
             self.log(f"  {i}. {pattern.pattern}")
+        if self.rules:
+            self.log("使用的类型化规则:")
+            for i, rule in enumerate(self.rules, 1):
+                self.log(f"  {i}. {rule.label}")
         
         self.log("=" * 60)
         
@@ -430,27 +1382,225 @@ class RegexFileCleanup:
             # 检查目标路径是否存在
             if not os.path.exists(self.target_path):
                 self.log(f"错误：指定的路径 '{self.target_path}' 不存在", "ERROR")
-                return
+                self.stats['errors'] += 1
+                return False
             
             if not os.path.isdir(self.target_path):
                 self.log(f"错误：'{self.target_path}' 不是一个文件夹", "ERROR")
-                return
+                self.stats['errors'] += 1
+                return False
+            
+            if self.stream:
+                self.stream_cleanup()
+                if self.profile_rules:
+                    self.log_rule_profile()
+                return self.stats['errors'] == 0
             
             # 扫描目录
             matches = self.scan_directory()
+            if self.profile_rules:
+                self.log_rule_profile()
             
             # 如果没有匹配项，直接返回
             if not matches['files'] and not matches['dirs']:
                 self.log("没有找到匹配的文件或目录，无需清理")
-                return
+                return self.stats['errors'] == 0
             
             # 执行清理
             self.cleanup(matches)
+            return self.stats['errors'] == 0
             
         except Exception as e:
             self.log(f"工具执行过程中发生错误: {str(e)}", "ERROR")
             import traceback
             self.log(f"堆栈跟踪: {traceback.format_exc()}", "ERROR")
+            self.stats['errors'] += 1
+            return False
+        finally:
+            self.close_quarantine()
+
+
+def read_batch_targets(source: str) -> Iterator[str]:
+    """
+    逐行读取批量模式的文件夹列表，忽略空行和 # 开头的注释行
+    
+    Args:
+        source: 列表文件路径，"-" 表示标准输入（每读到一行就产出）
+    """
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8-sig')
+    try:
+        for line in stream:
+            target = line.strip()
+            if target and not target.startswith('#'):
+                yield target
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def run_batch(targets: Iterable[str], results: TextIO, jobs: int = BATCH_JOBS, **options) -> bool:
+    """
+    批量模式：在一个进程中清理多个文件夹
+    
+    正则表达式只在处理第一个文件夹时加载和编译一次，之后的文件夹直接复用；
+    同时处理 jobs 个文件夹，所有文件夹共用一个删除线程池，每个文件夹完成后立即向 results 写入一行 JSON 结果记录
+    
+    Args:
+        targets: 文件夹路径（可以是逐行读取标准输入的迭代器）
+        results: 结果记录（JSONL）的输出流
+        jobs: 同时处理的文件夹数量
+        **options: RegexFileCleanup 的其他参数
+        
+    Returns:
+        所有文件夹是否都清理成功
+    """
+    results_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max(1, jobs))
+    outcome = {'targets': 0, 'failed': 0}
+    
+    def write_record(record: Dict):
+        with results_lock:
+            outcome['targets'] += 1
+            outcome['failed'] += not record['success']
+            results.write(json.dumps(record, ensure_ascii=False) + '\n')
+            results.flush()
+    
+    def run_target(tool: RegexFileCleanup):
+        started = time.perf_counter()
+        success = tool.run()
+        write_record({
+            'target': tool.target_path,
+            'success': success,
+            'duration': round(time.perf_counter() - started, 3),
+            'stats': dict(tool.stats),
+        })
+    
+    compiled_patterns = None
+    compiled_rules = None
+    delete_workers = max(1, options.get('delete_workers', DELETE_WORKERS))
+    with ThreadPoolExecutor(max_workers=delete_workers) as executor, \
+            ThreadPoolExecutor(max_workers=max(1, jobs)) as target_executor:
+        for target in targets:
+            slots.acquire()
+            try:
+                tool = RegexFileCleanup(target, compiled_patterns=compiled_patterns,
+                                        compiled_rules=compiled_rules, executor=executor, **options)
+            except Exception as e:
+                # 创建失败（路径无效、无法创建日志或隔离目录等）只影响这一个文件夹
+                slots.release()
+                logging.getLogger(__name__).error(f"无法处理文件夹: {target} - {str(e)}")
+                write_record({'target': os.path.abspath(target), 'success': False, 'duration': 0.0,
+                              'stats': {}, 'error': str(e)})
+                continue
+            compiled_patterns = tool.patterns
+            compiled_rules = tool.rules
+            target_executor.submit(run_target, tool).add_done_callback(lambda _: slots.release())
+    
+    logging.getLogger(__name__).info(
+        f"批量模式完成: 共处理 {outcome['targets']} 个文件夹，其中 {outcome['failed']} 个失败")
+    return outcome['failed'] == 0
+
+
+def _quarantine_created(journal_path: str) -> float:
+    """隔离目录的创建时间（元数据日志第一行记录的时间，读取失败时使用日志文件的修改时间）"""
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            return float(json.loads(f.readline())['created'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return os.path.getmtime(journal_path)
+
+
+def restore_quarantine(run_dir: str) -> bool:
+    """
+    按元数据日志把隔离目录中的文件和目录移回原来的位置
+    
+    原位置已被占用的项跳过并保留在隔离目录中；全部恢复后删除隔离目录。
+    已经恢复过的项（隔离目录中已不存在）直接跳过，可以重复执行
+    
+    Args:
+        run_dir: 一次运行的隔离目录（包含 journal.jsonl）
+        
+    Returns:
+        是否全部恢复
+    """
+    logger = logging.getLogger(__name__)
+    journal_path = os.path.join(run_dir, QUARANTINE_JOURNAL)
+    if not os.path.isfile(journal_path):
+        logger.error(f"不是隔离目录（缺少 {QUARANTINE_JOURNAL}）: {run_dir}")
+        return False
+    
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    
+    restored = skipped = failed = 0
+    for record in records:
+        if 'original' not in record:
+            continue
+        stored_path = os.path.join(run_dir, *record['stored'].split('/'))
+        original = record['original']
+        if not os.path.lexists(stored_path):
+            continue
+        if os.path.lexists(original):
+            logger.warning(f"原位置已存在，跳过恢复: {original}")
+            skipped += 1
+            continue
+        try:
+            os.makedirs(os.path.dirname(original), exist_ok=True)
+            _rename(stored_path, original)
+            logger.info(f"已恢复: {original}")
+            restored += 1
+        except OSError as e:
+            logger.error(f"恢复失败: {original} - {str(e)}")
+            failed += 1
+    
+    logger.info(f"恢复完成: {restored} 项已恢复，{skipped} 项跳过，{failed} 项失败")
+    if skipped or failed:
+        return False
+    shutil.rmtree(run_dir, onerror=_remove_readonly)
+    logger.info(f"已删除隔离目录: {run_dir}")
+    return True
+
+
+def purge_quarantine(quarantine_root: str, older_than: float, dry_run: bool = False) -> int:
+    """
+    删除过期的隔离目录
+    
+    Args:
+        quarantine_root: 隔离目录（--quarantine 指定的目录）
+        older_than: 创建时间早于多少秒以前的隔离目录会被删除
+        dry_run: 预览模式，只记录将要删除的目录
+        
+    Returns:
+        删除的隔离目录数量
+    """
+    logger = logging.getLogger(__name__)
+    if not os.path.isdir(quarantine_root):
+        logger.warning(f"隔离目录不存在: {quarantine_root}")
+        return 0
+    
+    now = time.time()
+    purged = 0
+    with os.scandir(quarantine_root) as iterator:
+        entries = sorted(iterator, key=lambda entry: entry.name)
+    for entry in entries:
+        journal_path = os.path.join(entry.path, QUARANTINE_JOURNAL)
+        if not entry.is_dir(follow_symlinks=False) or not os.path.isfile(journal_path):
+            continue
+        if now - _quarantine_created(journal_path) < older_than:
+            continue
+        if dry_run:
+            logger.info(f"[预览] 将删除隔离目录: {entry.path}")
+        else:
+            try:
+                shutil.rmtree(entry.path, onerror=_remove_readonly)
+            except OSError as e:
+                logger.error(f"删除隔离目录失败: {entry.path} - {str(e)}")
+                continue
+            logger.info(f"已删除隔离目录: {entry.path}")
+        purged += 1
+    
+    logger.info(f"清除过期隔离目录完成: {purged} 个")
+    return purged
 
 
 def create_example_config():
@@ -469,6 +1619,12 @@ def create_example_config():
             r'.*\.bak$',
             r'.*\.old$',
             r'^\..*'
+        ],
+        "rules": [
+            {"description": "构建目录中的目标文件", "path_regex": r"(^|/)build/.*\.(o|obj)$"},
+            {"description": "30天前的轮转日志", "glob": "*.log.[0-9]*", "older_than": "30d"},
+            {"description": "大于1GB的内存转储", "suffix": [".dmp", ".hprof"], "ignore_case": True,
+             "min_size": "1G"}
         ]
     }
     
@@ -495,6 +1651,7 @@ def main():
   %(prog)s /path/to/folder --pattern ".*\\.tmp$" --pattern ".*\\.log$"
   %(prog)s /path/to/folder --config custom_rules.json
   %(prog)s --create-example-config            # 创建示例配置文件
+  %(prog)s --batch-file folders.txt           # 批量清理列表中的所有文件夹
   
 默认清理模式包括:
   - Windows临时文件: ~$*, *.tmp, *.temp, Thumbs.db, Desktop.ini
@@ -513,9 +1670,31 @@ def main():
     parser.add_argument("--dry-run", "-d", action="store_true",
                        help="预览模式，只显示将要执行的操作而不实际执行")
     parser.add_argument("--no-recursive", action="store_true",
-                       help="不递归扫描子目录")
+                       help="不递归扫描子目录，只匹配目标文件夹中的文件（目录不匹配、不删除）")
+    parser.add_argument("--profile-rules", action="store_true",
+                       help="逐条规则计时，输出按耗时排序的规则报告和从未匹配的规则")
+    parser.add_argument("--quarantine", "-q", metavar="DIR",
+                       help="隔离模式：匹配项改名移动到 DIR 下按时间命名的子目录，而不是删除")
+    parser.add_argument("--restore", metavar="RUN_DIR",
+                       help="把一次运行的隔离目录中的文件移回原位置并退出")
+    parser.add_argument("--purge-older-than", metavar="AGE",
+                       help="删除 --quarantine 中早于 AGE（如 30d、12h）的隔离目录")
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                       help="最多进入 N 层子目录（0 表示只扫描目标文件夹本身的文件和目录）")
     parser.add_argument("--create-example-config", action="store_true",
                        help="创建示例配置文件并退出")
+    parser.add_argument("--batch-file", "-b", metavar="FILE",
+                       help="批量模式：清理列表文件中的所有文件夹（每行一个，\"-\" 表示从标准输入读取）")
+    parser.add_argument("--results", "-r", metavar="FILE", default="-",
+                       help="批量模式每个文件夹的结果记录（JSONL，默认输出到标准输出）")
+    parser.add_argument("--batch-jobs", type=int, default=BATCH_JOBS,
+                       help=f"批量模式同时处理的文件夹数量（默认{BATCH_JOBS}）")
+    parser.add_argument("--delete-workers", type=int, default=DELETE_WORKERS,
+                       help=f"同时删除文件的线程数（默认{DELETE_WORKERS}）")
+    parser.add_argument("--stream", "-s", action="store_true",
+                       help="流式模式：边扫描边删除，内存占用与匹配数量无关")
+    parser.add_argument("--plan", metavar="FILE",
+                       help="流式预览模式的 JSONL 清理计划（\"-\" 表示标准输出；未指定时逐条记录日志）")
     
     args = parser.parse_args()
     
@@ -524,21 +1703,68 @@ def main():
         create_example_config()
         return
     
+    if args.restore:
+        configure_logging(args.log or DEFAULT_LOG_FILE)
+        sys.exit(0 if restore_quarantine(args.restore) else 1)
+    
+    if args.purge_older_than:
+        if not args.quarantine:
+            parser.error("--purge-older-than 需要同时指定 --quarantine")
+        try:
+            age = _parse_quantity(args.purge_older_than, _DURATION_UNITS, True)
+        except ValueError as e:
+            parser.error(str(e))
+        configure_logging(args.log or DEFAULT_LOG_FILE)
+        purge_quarantine(args.quarantine, age, args.dry_run)
+        # 没有指定目标文件夹时只清除过期的隔离目录
+        if not args.path and not args.batch_file:
+            return
+    
     # 检查必要的参数
-    if not args.path:
-        parser.error("必须指定目标文件夹路径")
-    
-    # 运行清理工具
-    tool = RegexFileCleanup(
-        target_path=args.path,
-        patterns=args.pattern,
-        config_file=args.config,
-        dry_run=args.dry_run,
-        log_file=args.log,
-        recursive=not args.no_recursive
-    )
+    if bool(args.path) == bool(args.batch_file):
+        parser.error("必须指定目标文件夹路径或 --batch-file（二者只能选一个）")
+    
+    if args.batch_file:
+        # 结果记录输出到标准输出时，控制台日志改写到标准错误
+        configure_logging(args.log or DEFAULT_LOG_FILE, sys.stderr if args.results == "-" else None)
+        results = nullcontext(sys.stdout) if args.results == "-" else open(args.results, 'a', encoding='utf-8')
+        with results as output:
+            success = run_batch(read_batch_targets(args.batch_file), output, args.batch_jobs,
+                                patterns=args.pattern, config_file=args.config, dry_run=args.dry_run,
+                                log_file=args.log, recursive=not args.no_recursive,
+                                delete_workers=args.delete_workers, stream=args.stream,
+                                max_depth=args.max_depth, profile_rules=args.profile_rules,
+                                quarantine=args.quarantine)
+        sys.exit(0 if success else 1)
     
-    tool.run()
+    if args.plan and not (args.stream and args.dry_run):
+        parser.error("--plan 只能与 --stream 和 --dry-run 一起使用")
+    
+    if args.plan == "-":
+        # 清理计划输出到标准输出时，控制台日志改写到标准错误
+        configure_logging(args.log or DEFAULT_LOG_FILE, sys.stderr)
+    plan = None
+    if args.plan:
+        plan = nullcontext(sys.stdout) if args.plan == "-" else open(args.plan, 'w', encoding='utf-8')
+    
+    with plan or nullcontext() as plan_output:
+        # 运行清理工具
+        tool = RegexFileCleanup(
+            target_path=args.path,
+            patterns=args.pattern,
+            config_file=args.config,
+            dry_run=args.dry_run,
+            log_file=args.log,
+            recursive=not args.no_recursive,
+            delete_workers=args.delete_workers,
+            stream=args.stream,
+            plan=plan_output,
+            max_depth=args.max_depth,
+            profile_rules=args.profile_rules,
+            quarantine=args.quarantine
+        )
+        
+        tool.run()
 
 
 if __name__ == "__main__":
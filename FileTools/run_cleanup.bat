@@ -21,11 +21,14 @@ echo.
 echo 选项:
 echo   -l [日志文件]   指定日志文件路径
 echo   -d             预览模式（不实际删除）
+echo   -b [列表文件]  批量模式：处理列表文件中的所有文件夹（每行一个）
+echo   -r [结果文件]  批量模式的结果记录（JSONL）
 echo.
 echo 示例:
 echo   run_cleanup.bat C:\MyFiles
 echo   run_cleanup.bat D:\Documents -l C:\Logs\cleanup.log
 echo   run_cleanup.bat E:\TestFolder -d
+echo   run_cleanup.bat -b targets.txt -r results.jsonl
 echo.
 
 REM 如果没有参数，显示帮助信息
@@ -35,8 +38,8 @@ if "%~1"=="" (
     exit /b 1
 )
 
-REM 构建Python命令
-set "PYTHON_CMD=python file_cleanup.py"
+REM 构建Python命令（以 -m 方式运行可复用 __pycache__ 中的字节码，省去每次启动时编译脚本）
+set "PYTHON_CMD=python -m file_cleanup"
 
 REM 处理参数
 :parse_args
@@ -55,6 +58,20 @@ if "%~1"=="-d" (
     goto parse_args
 )
 
+if "%~1"=="-b" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --batch-file "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-r" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --results "%~1""
+    shift
+    goto parse_args
+)
+
 REM 第一个非选项参数作为目标路径
 if not defined TARGET_PATH (
     set "TARGET_PATH=%~1"
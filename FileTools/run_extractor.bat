@@ -24,12 +24,28 @@ echo   -d             预览模式（不实际解压和删除）
 echo   -t [线程数]    指定最大线程数
 echo   -k             解压后保留原压缩文件
 echo   -m [迭代次数]  最大递归迭代次数
+echo   -L [清单文件]  只输出成员清单（JSONL），不解压
+echo   -i [通配符]    只解压匹配的成员（可多次使用）
+echo   -x [通配符]    跳过匹配的成员（可多次使用）
+echo   -j [日志文件]  解压状态日志，中断后重新运行可从中断处继续
+echo   -P             流水线模式（读取/解压/写出分阶段并行，输出各阶段利用率）
+echo   -D [方式]      内容去重：skip 跳过重复成员，hardlink 硬链接到已有文件
+echo   -o [布局]      输出布局：flat（默认）、per-archive、mirror
+echo   -w [密码文件]  加密压缩文件的候选密码（每行一个）
+echo   -E [后端]      解压后端：auto（默认，优先使用本机 7z/bsdtar）、python
+echo   -S             没有扩展名的文件也按文件头识别格式
+echo   -b [列表文件]  批量模式：处理列表文件中的所有文件夹（每行一个）
+echo   -r [结果文件]  批量模式的结果记录（JSONL）
 echo.
 echo 示例:
 echo   run_extractor.bat C:\MyFiles
 echo   run_extractor.bat D:\Documents -l C:\Logs\extract.log
 echo   run_extractor.bat E:\TestFolder -d -t 4
 echo   run_extractor.bat F:\Archives -k -m 5
+echo   run_extractor.bat G:\Drops -L members.jsonl
+echo   run_extractor.bat H:\Drops -i "*.pdf" -x "__MACOSX/*"
+echo   run_extractor.bat I:\Drops -D hardlink
+echo   run_extractor.bat -b targets.txt -r results.jsonl
 echo.
 
 REM 如果没有参数，显示帮助信息
@@ -39,8 +55,8 @@ if "%~1"=="" (
     exit /b 1
 )
 
-REM 构建Python命令
-set "PYTHON_CMD=python archive_extractor.py"
+REM 构建Python命令（以 -m 方式运行可复用 __pycache__ 中的字节码，省去每次启动时编译脚本）
+set "PYTHON_CMD=python -m archive_extractor"
 
 REM 处理参数
 :parse_args
@@ -79,6 +95,88 @@ if "%~1"=="-m" (
     goto parse_args
 )
 
+if "%~1"=="-L" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --list "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-j" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --journal "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-w" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --passwords-file "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-o" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --layout "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-D" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --dedup "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-P" (
+    set "PYTHON_CMD=%PYTHON_CMD% --pipeline"
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-i" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --include "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-x" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --exclude "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-E" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --backend "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-S" (
+    set "PYTHON_CMD=%PYTHON_CMD% --sniff-extensionless"
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-b" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --batch-file "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-r" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --results "%~1""
+    shift
+    goto parse_args
+)
+
 REM 第一个非选项参数作为目标路径
 if not defined TARGET_PATH (
     set "TARGET_PATH=%~1"
@@ -109,10 +207,12 @@ if exist archive_extractor.log (
 echo.
 echo 支持的压缩格式:
 echo   ZIP (.zip), RAR (.rar), 7Z (.7z), TAR (.tar)
-echo   GZIP (.gz, .tgz), BZIP2 (.bz2, .tbz2)
+echo   GZIP (.gz, .tgz), BZIP2 (.bz2, .tbz2), XZ (.xz, .tar.xz)
+echo   ZSTD (.zst, .tar.zst), LZ4 (.lz4, .tar.lz4)
+echo   按文件头识别实际格式；无扩展名的压缩包需使用 -S
 echo.
-echo 注意: 如需支持RAR和7Z格式，请安装相应库:
-echo   pip install rarfile py7zr
+echo 注意: 如需支持RAR、7Z、ZSTD和LZ4格式，请安装相应库:
+echo   pip install rarfile py7zr zstandard lz4
 echo.
 
 pause
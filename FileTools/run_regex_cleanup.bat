@@ -24,7 +24,17 @@ echo   -c [配置文件]   指定配置文件路径（JSON格式）
 echo   -l [日志文件]   指定日志文件路径
 echo   -d             预览模式（不实际删除）
 echo   -nr            不递归扫描子目录
+echo   -depth [层数]  最多进入几层子目录
 echo   -example       创建示例配置文件
+echo   -profile       输出规则报告（每条规则的匹配次数和耗时）
+echo   -q [隔离目录]  隔离模式：匹配项移动到隔离目录而不是删除
+echo   -restore [目录] 把一次运行的隔离目录中的文件移回原位置
+echo   -purge [时长]  删除 -q 中早于指定时长（如 30d）的隔离目录
+echo   -b [列表文件]  批量模式：处理列表文件中的所有文件夹（每行一个）
+echo   -r [结果文件]  批量模式的结果记录（JSONL）
+echo   -w [线程数]    同时删除文件的线程数（默认8）
+echo   -s             流式模式（边扫描边删除）
+echo   -plan [文件]   流式预览模式的 JSONL 清理计划（与 -s -d 一起使用）
 echo.
 echo 示例:
 echo   run_regex_cleanup.bat C:\MyFiles
@@ -32,6 +42,10 @@ echo   run_regex_cleanup.bat D:\Documents -d
 echo   run_regex_cleanup.bat E:\TestFolder -p ".*\.tmp$" -p ".*\.log$"
 echo   run_regex_cleanup.bat F:\Data -c cleanup_rules.json
 echo   run_regex_cleanup.bat -example
+echo   run_regex_cleanup.bat -b targets.txt -r results.jsonl
+echo   run_regex_cleanup.bat G:\Build -s -d -plan plan.jsonl
+echo   run_regex_cleanup.bat C:\MyFiles -q D:\Quarantine
+echo   run_regex_cleanup.bat -restore D:\Quarantine\20240101-120000_MyFiles
 echo.
 
 REM 如果没有参数，显示帮助信息
@@ -82,12 +96,80 @@ if "%~1"=="-nr" (
     goto parse_args
 )
 
+if "%~1"=="-depth" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --max-depth %~1"
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-q" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --quarantine "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-restore" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --restore "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-purge" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --purge-older-than %~1"
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-profile" (
+    set "PYTHON_CMD=%PYTHON_CMD% --profile-rules"
+    shift
+    goto parse_args
+)
+
 if "%~1"=="-example" (
     set "PYTHON_CMD=%PYTHON_CMD% --create-example-config"
     shift
     goto parse_args
 )
 
+if "%~1"=="-b" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --batch-file "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-r" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --results "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-s" (
+    set "PYTHON_CMD=%PYTHON_CMD% --stream"
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-plan" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --plan "%~1""
+    shift
+    goto parse_args
+)
+
+if "%~1"=="-w" (
+    shift
+    set "PYTHON_CMD=%PYTHON_CMD% --delete-workers %~1"
+    shift
+    goto parse_args
+)
+
 REM 第一个非选项参数作为目标路径
 if not defined TARGET_PATH (
     set "TARGET_PATH=%~1"
@@ -10,6 +10,8 @@ import tempfile
 import zipfile
 import tarfile
 import gzip
+import io
+import json
 from pathlib import Path
 from archive_extractor import ArchiveExtractor
 
@@ -199,6 +201,1007 @@ def test_error_handling():
         success, files_extracted = extractor.extract_archive(corrupt_zip)
         print(f"损坏文件测试: 成功={success}, 提取文件数={files_extracted}")
 
+def test_list_and_filter():
+    """测试成员清单和选择性解压"""
+    print("\n" + "=" * 60)
+    print("成员清单和选择性解压测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        test_files = {
+            'docs/readme.txt': '说明文件',
+            'docs/manual.pdf': 'PDF内容',
+            '__MACOSX/._manual.pdf': '资源派生文件',
+            'data.bin': '二进制数据',
+        }
+        zip_path = os.path.join(temp_dir, 'mixed.zip')
+        create_test_archive('zip', zip_path, test_files)
+        
+        # 清单模式只读取中央目录，不解压
+        extractor = ArchiveExtractor(temp_dir, exclude_patterns=['__MACOSX/*'])
+        output = io.StringIO()
+        count = extractor.list_archives(output)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        names = sorted(record['name'] for record in records)
+        print(f"清单记录数: {count}, 成员: {names}")
+        assert names == ['data.bin', 'docs/manual.pdf', 'docs/readme.txt']
+        assert all(record['crc'] and record['size'] is not None for record in records)
+        assert not os.path.exists(os.path.join(temp_dir, 'data.bin'))
+        print("✓ 清单模式没有解压任何文件")
+        
+        # 只解压 PDF，排除资源派生文件
+        extractor = ArchiveExtractor(temp_dir, include_patterns=['*.pdf'], exclude_patterns=['__MACOSX/*'])
+        success, files_extracted = extractor.extract_archive(zip_path)
+        print(f"选择性解压结果: 成功={success}, 提取文件数={files_extracted}")
+        assert os.path.exists(os.path.join(temp_dir, 'docs', 'manual.pdf'))
+        assert not os.path.exists(os.path.join(temp_dir, 'docs', 'readme.txt'))
+        assert not os.path.exists(os.path.join(temp_dir, '__MACOSX'))
+        print("✓ 只解压了匹配的成员")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        zip_path = os.path.join(temp_dir, 'mixed.zip')
+        create_test_archive('zip', zip_path, test_files)
+        
+        # 选择性解压后保留源文件，未选中的成员不会丢失
+        extractor = ArchiveExtractor(temp_dir, include_patterns=['*.pdf'])
+        assert not extractor.delete_after_extract
+        extractor.run_recursive_extraction(max_iterations=2)
+        assert os.path.exists(os.path.join(temp_dir, 'docs', 'manual.pdf'))
+        assert os.path.exists(zip_path)
+        with zipfile.ZipFile(zip_path) as zip_ref:
+            assert len(zip_ref.namelist()) == len(test_files)
+        assert extractor.stats['archives_processed'] == 1
+        print("✓ 选择性解压后保留了原压缩文件")
+
+def test_content_sniffing():
+    """测试基于文件头的格式识别"""
+    print("\n" + "=" * 60)
+    print("文件头格式识别测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # .tar.gz 应直接识别为 tar.gz，一轮解压完成，不产生中间 .tar 文件
+        targz_path = os.path.join(temp_dir, 'bundle.tar.gz')
+        with tarfile.open(targz_path, 'w:gz') as tarf:
+            data = '打包内容'.encode('utf-8')
+            info = tarfile.TarInfo('bundle/content.txt')
+            info.size = len(data)
+            tarf.addfile(info, io.BytesIO(data))
+        
+        # 改名且没有扩展名的ZIP
+        renamed_zip = os.path.join(temp_dir, 'download_12345')
+        create_test_archive('zip', renamed_zip, {'renamed.txt': '改名的压缩包'})
+        
+        # 扩展名是.zip但内容不是ZIP的文件，以及内部是ZIP/gzip结构的文档
+        with open(os.path.join(temp_dir, 'fake.zip'), 'w') as f:
+            f.write('这不是压缩文件')
+        documents = ('report.docx', 'letter.dotx', 'ledger.xlsb', 'diagram.vsdx')
+        for name in documents:
+            create_test_archive('zip', os.path.join(temp_dir, name), {'[Content_Types].xml': '<xml/>'})
+        with gzip.open(os.path.join(temp_dir, 'icon.svgz'), 'wb') as f:
+            f.write(b'<svg/>')
+        documents += ('icon.svgz',)
+        
+        names = ('bundle.tar.gz', 'download_12345', 'fake.zip') + documents
+        extractor = ArchiveExtractor(temp_dir)
+        formats = {name: extractor.detect_archive_format(os.path.join(temp_dir, name)) for name in names}
+        print(f"识别结果: {formats}")
+        assert formats == {'bundle.tar.gz': 'tar.gz', **{name: None for name in names[1:]}}
+        
+        # 没有扩展名的文件需要显式开启识别
+        extractor = ArchiveExtractor(temp_dir, sniff_extensionless=True)
+        assert extractor.detect_archive_format(renamed_zip) == 'zip'
+        assert extractor.detect_archive_format(os.path.join(temp_dir, 'letter.dotx')) is None
+        
+        success = extractor.run_recursive_extraction(max_iterations=3)
+        assert success
+        assert os.path.exists(os.path.join(temp_dir, 'bundle', 'content.txt'))
+        assert os.path.exists(os.path.join(temp_dir, 'renamed.txt'))
+        assert not os.path.exists(os.path.join(temp_dir, 'bundle.tar'))
+        assert all(os.path.exists(os.path.join(temp_dir, name)) for name in documents)
+        print("✓ tar.gz 单次解压完成，无扩展名的压缩包按需识别，文档格式未被解压")
+
+def test_stream_formats():
+    """测试 XZ/ZSTD/LZ4 单文件与TAR格式解压"""
+    print("\n" + "=" * 60)
+    print("XZ/ZSTD/LZ4 格式解压测试")
+    print("=" * 60)
+    
+    import lzma
+    import archive_extractor
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(os.path.join(temp_dir, 'notes.txt.xz'), 'wb') as f:
+            f.write(lzma.compress('XZ内容'.encode('utf-8')))
+        
+        tar_buffer = io.BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode='w') as tarf:
+            data = '构建产物'.encode('utf-8')
+            info = tarfile.TarInfo('build/artifact.txt')
+            info.size = len(data)
+            tarf.addfile(info, io.BytesIO(data))
+        
+        expected = ['notes.txt']
+        if archive_extractor.ZSTD_SUPPORT:
+            with open(os.path.join(temp_dir, 'build.tar.zst'), 'wb') as f:
+                f.write(archive_extractor.zstandard.ZstdCompressor().compress(tar_buffer.getvalue()))
+            expected.append('build/artifact.txt')
+        if archive_extractor.LZ4_SUPPORT:
+            with open(os.path.join(temp_dir, 'single.lz4'), 'wb') as f:
+                f.write(archive_extractor.lz4_frame.compress(b'lz4 payload'))
+            expected.append('single')
+        
+        extractor = ArchiveExtractor(temp_dir)
+        assert extractor.run_recursive_extraction(max_iterations=3)
+        
+        for name in expected:
+            status = '✓' if os.path.exists(os.path.join(temp_dir, name)) else '✗'
+            print(f"{status} {name}")
+            assert status == '✓'
+
+def test_resume_from_journal():
+    """测试解压状态日志的断点续传"""
+    print("\n" + "=" * 60)
+    print("断点续传测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as journal_dir:
+        journal_path = os.path.join(journal_dir, 'journal.jsonl')
+        zip_path = os.path.join(temp_dir, 'first.zip')
+        create_test_archive('zip', zip_path, {'first.txt': '第一个'})
+        
+        # 第一次运行保留压缩文件，最终状态为 moved
+        extractor = ArchiveExtractor(temp_dir, delete_after_extract=False, journal_file=journal_path)
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        with open(journal_path, encoding='utf-8') as f:
+            states = [json.loads(line)['state'] for line in f]
+        print(f"日志状态序列: {states}")
+        assert states == ['started', 'extracted', 'moved']
+        
+        # 模拟中断：删除已提取的文件后重新运行，日志显示已完成，因此不会再次解压
+        os.remove(os.path.join(temp_dir, 'first.txt'))
+        extractor = ArchiveExtractor(temp_dir, journal_file=journal_path)
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        assert not os.path.exists(os.path.join(temp_dir, 'first.txt'))
+        assert not os.path.exists(zip_path)
+        print("✓ 已完成的压缩文件被跳过，只补做了删除步骤")
+        
+        # 同名的新压缩文件（大小/修改时间不同）会被重新处理
+        create_test_archive('zip', zip_path, {'second.txt': '第二个，内容更长一些'})
+        extractor = ArchiveExtractor(temp_dir, journal_file=journal_path)
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        assert os.path.exists(os.path.join(temp_dir, 'second.txt'))
+        print("✓ 同名的新压缩文件被重新解压")
+        
+        # 大小和修改时间都与日志一致的同名新文件（如复制时保留了修改时间）由抽样哈希识别
+        create_test_archive('zip', zip_path, {'third.txt': 'AAAA'})
+        extractor = ArchiveExtractor(temp_dir, delete_after_extract=False, journal_file=journal_path)
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        os.remove(os.path.join(temp_dir, 'third.txt'))
+        old_stat = os.stat(zip_path)
+        create_test_archive('zip', zip_path, {'third.txt': 'BBBB'})
+        os.utime(zip_path, ns=(old_stat.st_atime_ns, old_stat.st_mtime_ns))
+        assert os.path.getsize(zip_path) == old_stat.st_size
+        extractor = ArchiveExtractor(temp_dir, journal_file=journal_path)
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        with open(os.path.join(temp_dir, 'third.txt'), encoding='utf-8') as f:
+            assert f.read() == 'BBBB'
+        assert len(extractor.journal.sample_hash(zip_path)) == 32
+        print("✓ 修改时间相同的同名新文件由抽样哈希识别，不读取整个压缩文件")
+
+def test_disk_space_admission():
+    """测试磁盘空间准入控制"""
+    print("\n" + "=" * 60)
+    print("磁盘空间准入测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        zip_path = os.path.join(temp_dir, 'large.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr('large.bin', b'\0' * (4 * 1024 * 1024))
+        
+        extractor = ArchiveExtractor(temp_dir)
+        estimated = extractor.estimate_extracted_size(zip_path)
+        print(f"文件头记录的解压大小: {estimated} 字节")
+        assert estimated == 4 * 1024 * 1024
+        
+        # gzip 的 ISIZE 只记录原始大小对 2^32 取模的值，只作为下限
+        gz_path = os.path.join(temp_dir, 'wrapped.bin.gz')
+        with gzip.open(gz_path, 'wb') as f:
+            f.write(os.urandom(256 * 1024))
+        with open(gz_path, 'r+b') as f:
+            f.seek(-4, os.SEEK_END)
+            f.write((16).to_bytes(4, 'little'))
+        estimated = extractor.estimate_extracted_size(gz_path)
+        assert estimated == os.path.getsize(gz_path) * 5
+        os.remove(gz_path)
+        print("✓ gzip 文件头的解压大小只作为下限")
+        
+        # 要求保留的剩余空间超过磁盘容量，任何压缩文件都无法准入
+        extractor = ArchiveExtractor(temp_dir, min_free_mb=1024 * 1024 * 1024)
+        extractor.process_archive_batch([zip_path])
+        print(f"统计信息: {extractor.stats}")
+        assert extractor.stats['archives_skipped_no_space'] == 1
+        assert os.path.exists(zip_path)
+        assert not os.path.exists(os.path.join(temp_dir, 'large.bin'))
+        print("✓ 空间不足的压缩文件没有开始解压，源文件保留")
+        
+        # 递归解压时空间不足的压缩文件只记录一次，后续轮次不再尝试
+        extractor = ArchiveExtractor(temp_dir, min_free_mb=1024 * 1024 * 1024)
+        extractor.run_recursive_extraction(max_iterations=3)
+        assert extractor.skipped_no_space == {zip_path}
+        assert extractor.stats['archives_skipped_no_space'] == 1
+        assert extractor.stats['errors_encountered'] == 1
+        print("✓ 空间不足的压缩文件在后续轮次中不再重试")
+        
+        extractor = ArchiveExtractor(temp_dir)
+        extractor.process_archive_batch([zip_path])
+        assert os.path.exists(os.path.join(temp_dir, 'large.bin'))
+        assert not os.path.exists(zip_path)
+        assert extractor.disk_budget.reserved_bytes == 0
+        print("✓ 空间充足时正常解压，预留空间已全部释放")
+        
+        # 解压大小在独立的线程中提前估算，分派线程不逐个读取文件头
+        import threading
+        from unittest import mock
+        batch = []
+        for index in range(6):
+            path = os.path.join(temp_dir, f'batch_{index}.zip')
+            create_test_archive('zip', path, {f'batch_{index}.txt': str(index)})
+            batch.append(path)
+        extractor = ArchiveExtractor(temp_dir, max_threads=2)
+        estimate = extractor.estimate_extracted_size
+        threads = []
+        
+        def recording_estimate(archive_path):
+            threads.append(threading.current_thread())
+            return estimate(archive_path)
+        
+        with mock.patch.object(extractor, 'estimate_extracted_size', recording_estimate):
+            assert extractor.process_archive_batch(batch) == 6
+        assert len(threads) == 6 and threading.main_thread() not in threads
+        assert all(os.path.exists(os.path.join(temp_dir, f'batch_{index}.txt')) for index in range(6))
+        print("✓ 解压大小在独立的线程中提前并行估算")
+
+def test_bomb_guard():
+    """测试压缩炸弹防护"""
+    print("\n" + "=" * 60)
+    print("压缩炸弹防护测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 64MB 的全零数据压缩后只有几十KB，超过 32MB 的解压大小上限
+        bomb_path = os.path.join(temp_dir, 'bomb.zip')
+        with zipfile.ZipFile(bomb_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr('zeros.bin', b'\0' * (64 * 1024 * 1024))
+        
+        # 成员路径试图写到解压目录之外
+        slip_path = os.path.join(temp_dir, 'slip.zip')
+        create_test_archive('zip', slip_path, {'../../escaped.txt': '越界写入'})
+        
+        extractor = ArchiveExtractor(temp_dir, delete_after_extract=False, max_total_mb=32)
+        success, _ = extractor.extract_archive(bomb_path)
+        print(f"压缩炸弹解压结果: 成功={success}")
+        assert not success
+        assert not os.path.exists(os.path.join(temp_dir, 'zeros.bin'))
+        
+        success, _ = extractor.extract_archive(slip_path)
+        assert success
+        assert os.path.exists(os.path.join(temp_dir, 'escaped.txt'))
+        assert not os.path.exists(os.path.join(os.path.dirname(temp_dir), 'escaped.txt'))
+        print("✓ 压缩炸弹被中止，越界路径被限制在解压目录内")
+        
+        # 默认不限制压缩比：高度可压缩的正常数据可以解压
+        extractor = ArchiveExtractor(temp_dir, delete_after_extract=False)
+        success, _ = extractor.extract_archive(bomb_path)
+        assert success and os.path.getsize(os.path.join(temp_dir, 'zeros.bin')) == 64 * 1024 * 1024
+        
+        # 指定压缩比上限时，解压数据量超过起始阈值后才检查
+        from archive_extractor import ExtractionGuard, ExtractionLimitExceeded, RATIO_CHECK_MIN_BYTES
+        guard = ExtractionGuard(bomb_path, 1024, max_ratio=100)
+        guard.add_bytes(RATIO_CHECK_MIN_BYTES)
+        try:
+            guard.add_bytes(1)
+            assert False, "超过起始阈值后应检查压缩比"
+        except ExtractionLimitExceeded:
+            pass
+        print("✓ 压缩比默认不限制，指定上限时超过起始阈值才检查")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # TAR 中的链接不解压，输出警告并保留原压缩文件
+        tar_path = os.path.join(temp_dir, 'links.tar')
+        with tarfile.open(tar_path, 'w') as tarf:
+            data = '链接目标'.encode('utf-8')
+            info = tarfile.TarInfo('links/target.txt')
+            info.size = len(data)
+            tarf.addfile(info, io.BytesIO(data))
+            for name, link_type in (('links/soft.txt', tarfile.SYMTYPE), ('links/hard.txt', tarfile.LNKTYPE)):
+                info = tarfile.TarInfo(name)
+                info.type = link_type
+                info.linkname = 'links/target.txt'
+                tarf.addfile(info)
+        
+        extractor = ArchiveExtractor(temp_dir)
+        extractor.run_recursive_extraction(max_iterations=2)
+        assert os.path.exists(os.path.join(temp_dir, 'links', 'target.txt'))
+        assert not os.path.lexists(os.path.join(temp_dir, 'links', 'soft.txt'))
+        assert not os.path.lexists(os.path.join(temp_dir, 'links', 'hard.txt'))
+        assert os.path.exists(tar_path)
+        assert extractor.stats['archives_processed'] == 1
+        print("✓ 链接成员没有解压，原压缩文件被保留")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 三层嵌套，嵌套深度上限为2时最内层不再解压
+        create_test_archive('zip', os.path.join(temp_dir, 'level2.zip'), {'deepest.txt': '最内层'})
+        for level in (1, 0):
+            inner = os.path.join(temp_dir, f'level{level + 1}.zip')
+            with open(inner, 'rb') as f:
+                inner_bytes = f.read()
+            os.remove(inner)
+            with zipfile.ZipFile(os.path.join(temp_dir, f'level{level}.zip'), 'w') as zipf:
+                zipf.writestr(f'level{level + 1}.zip', inner_bytes)
+        
+        extractor = ArchiveExtractor(temp_dir, max_nesting_depth=2)
+        extractor.run_recursive_extraction(max_iterations=5)
+        assert os.path.exists(os.path.join(temp_dir, 'level2.zip'))
+        assert not os.path.exists(os.path.join(temp_dir, 'deepest.txt'))
+        assert extractor.stats['archives_rejected'] == 1
+        print("✓ 超过嵌套深度上限的压缩文件没有被解压")
+
+def build_pipeline_fixture(root):
+    """创建流水线测试用的多种格式压缩文件（含嵌套和 bz2/xz 进程池路径）"""
+    import bz2
+    import lzma
+    
+    create_test_archive('zip', os.path.join(root, 'docs.zip'), {
+        'docs/a.txt': '文档A' * 100, 'docs/b.txt': '文档B'})
+    create_test_archive('tar', os.path.join(root, 'plain.tar'), {'plain/c.txt': '普通TAR'})
+    with open(os.path.join(root, 'single.txt.bz2'), 'wb') as f:
+        f.write(bz2.compress('BZIP2内容'.encode('utf-8') * 1000))
+    with open(os.path.join(root, 'single.log.xz'), 'wb') as f:
+        f.write(lzma.compress(b'xz log line\n' * 1000))
+    
+    tar_buffer = io.BytesIO()
+    with tarfile.open(fileobj=tar_buffer, mode='w') as tarf:
+        for name, data in (('nested/inner.zip', None), ('nested/d.bin', bytes(range(256)) * 64)):
+            if data is None:
+                zip_buffer = io.BytesIO()
+                with zipfile.ZipFile(zip_buffer, 'w') as zipf:
+                    zipf.writestr('inner/e.txt', '嵌套内容')
+                data = zip_buffer.getvalue()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tarf.addfile(info, io.BytesIO(data))
+    with tarfile.open(os.path.join(root, 'bundle.tar.xz'), 'w:xz') as tarf:
+        info = tarfile.TarInfo('bundle.tar')
+        info.size = len(tar_buffer.getvalue())
+        tarf.addfile(info, io.BytesIO(tar_buffer.getvalue()))
+
+
+def snapshot_tree(root):
+    """返回 {相对路径: 文件内容}"""
+    result = {}
+    for current, dirs, files in os.walk(root):
+        for file in files:
+            path = os.path.join(current, file)
+            with open(path, 'rb') as f:
+                result[os.path.relpath(path, root)] = f.read()
+    return result
+
+
+def test_pipeline_mode():
+    """测试流水线模式与普通模式的解压结果一致，并输出各阶段利用率"""
+    print("\n" + "=" * 60)
+    print("流水线模式测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as normal_dir, tempfile.TemporaryDirectory() as pipeline_dir:
+        build_pipeline_fixture(normal_dir)
+        build_pipeline_fixture(pipeline_dir)
+        
+        assert ArchiveExtractor(normal_dir, max_threads=2).run_recursive_extraction(max_iterations=5)
+        extractor = ArchiveExtractor(pipeline_dir, max_threads=2, pipeline=True)
+        assert extractor.run_recursive_extraction(max_iterations=5)
+        
+        expected = snapshot_tree(normal_dir)
+        actual = snapshot_tree(pipeline_dir)
+        print(f"普通模式 {len(expected)} 个文件，流水线模式 {len(actual)} 个文件")
+        assert 'inner/e.txt' in expected and 'single.txt' in expected
+        assert actual == expected
+        assert extractor.stats['errors_encountered'] == 0
+        
+        print(f"各阶段利用率: {extractor.stage_utilisation}")
+        assert set(extractor.stage_utilisation) == {'读取', '解压', '写出'}
+        print("✓ 流水线模式解压结果与普通模式一致")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 压缩炸弹在流水线模式下同样会被中止
+        bomb_path = os.path.join(temp_dir, 'bomb.zip')
+        with zipfile.ZipFile(bomb_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr('zeros.bin', b'\0' * (64 * 1024 * 1024))
+        extractor = ArchiveExtractor(temp_dir, pipeline=True, max_total_mb=32)
+        extractor.run_recursive_extraction(max_iterations=2)
+        assert extractor.stats['archives_rejected'] == 1
+        assert os.path.exists(bomb_path)
+        assert not os.path.exists(os.path.join(temp_dir, 'zeros.bin'))
+        print("✓ 流水线模式下压缩炸弹被中止")
+
+def test_content_dedup():
+    """测试解压时的内容去重（跳过和硬链接两种方式）"""
+    print("\n" + "=" * 60)
+    print("内容去重测试")
+    print("=" * 60)
+    
+    # 超过 64KB 的内容覆盖逐块比较的路径；near 与 second 只有最后一个字节不同
+    first = os.urandom(200 * 1024)
+    second = os.urandom(150 * 1024)
+    near = second[:-1] + bytes([second[-1] ^ 0xFF])
+    
+    for dedup, pipeline in (('skip', False), ('hardlink', True)):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'existing.bin'), 'wb') as f:
+                f.write(first)
+            create_test_archive('zip', os.path.join(temp_dir, 'a.zip'), {
+                'a/one.bin': first, 'a/two.bin': second})
+            create_test_archive('zip', os.path.join(temp_dir, 'b.zip'), {
+                'b/one_copy.bin': first, 'b/two_copy.bin': second, 'b/near.bin': near,
+                'b/small.txt': '小文件'})
+            
+            extractor = ArchiveExtractor(temp_dir, max_threads=1, pipeline=pipeline, dedup=dedup)
+            assert extractor.run_recursive_extraction(max_iterations=2)
+            
+            def exists(name):
+                return os.path.exists(os.path.join(temp_dir, name))
+            
+            with open(os.path.join(temp_dir, 'b/near.bin'), 'rb') as f:
+                assert f.read() == near
+            assert exists('b/small.txt')
+            
+            if dedup == 'skip':
+                assert not exists('a/one.bin') and not exists('b/one_copy.bin')
+                assert exists('a/two.bin') != exists('b/two_copy.bin')
+                assert extractor.stats['duplicates_skipped'] == 3
+            else:
+                existing_inode = os.stat(os.path.join(temp_dir, 'existing.bin')).st_ino
+                for name, content in (('a/one.bin', first), ('b/one_copy.bin', first),
+                                      ('a/two.bin', second), ('b/two_copy.bin', second)):
+                    with open(os.path.join(temp_dir, name), 'rb') as f:
+                        assert f.read() == content
+                assert os.stat(os.path.join(temp_dir, 'b/one_copy.bin')).st_ino == existing_inode
+                assert extractor.stats['duplicates_linked'] == 3
+            
+            print(f"✓ {dedup} 模式（流水线={pipeline}）: 重复 {extractor.stats['duplicate_bytes'] // 1024} KB 未写出")
+
+def test_output_layouts():
+    """测试输出布局和同名文件的改名"""
+    print("\n" + "=" * 60)
+    print("输出布局测试")
+    print("=" * 60)
+    
+    from archive_extractor import NameAllocator
+    
+    def read(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 已有文件和两个压缩文件中的同名文件都不会被覆盖
+        with open(os.path.join(temp_dir, 'readme.txt'), 'w', encoding='utf-8') as f:
+            f.write('已有')
+        create_test_archive('zip', os.path.join(temp_dir, 'a.zip'), {'readme.txt': '甲', 'docs/x.txt': '1'})
+        os.makedirs(os.path.join(temp_dir, 'sub'))
+        create_test_archive('zip', os.path.join(temp_dir, 'sub', 'b.zip'), {'readme.txt': '乙', 'docs/x.txt': '2'})
+        
+        extractor = ArchiveExtractor(temp_dir)
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        readmes = {read(os.path.join(temp_dir, name))
+                   for name in ('readme.txt', 'readme (1).txt', 'readme (2).txt')}
+        assert readmes == {'已有', '甲', '乙'}
+        assert {read(os.path.join(temp_dir, 'docs', name)) for name in ('x.txt', 'x (1).txt')} == {'1', '2'}
+        print("✓ flat: 同名文件改名为 readme (1).txt、readme (2).txt")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, 'sub'))
+        create_test_archive('zip', os.path.join(temp_dir, 'sub', 'data.zip'), {'readme.txt': '甲'})
+        create_test_archive('tar', os.path.join(temp_dir, 'data.tar'), {'readme.txt': '乙'})
+        
+        extractor = ArchiveExtractor(temp_dir, layout='per-archive')
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        contents = {read(os.path.join(temp_dir, folder, 'readme.txt')) for folder in ('data', 'data (1)')}
+        assert contents == {'甲', '乙'}
+        print("✓ per-archive: 每个压缩文件一个子文件夹，同名压缩文件的文件夹同样改名")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, 'sub'))
+        create_test_archive('zip', os.path.join(temp_dir, 'sub', 'c.zip'), {'inner/readme.txt': '丙'})
+        
+        extractor = ArchiveExtractor(temp_dir, layout='mirror')
+        assert extractor.run_recursive_extraction(max_iterations=2)
+        assert read(os.path.join(temp_dir, 'sub', 'inner', 'readme.txt')) == '丙'
+        print("✓ mirror: 解压到压缩文件所在的文件夹")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        allocator = NameAllocator(temp_dir)
+        paths = {allocator.allocate(os.path.join(temp_dir, 'readme.txt')) for _ in range(20000)}
+        assert len(paths) == 20000
+        assert os.path.join(temp_dir, 'readme (19999).txt') in paths
+        assert allocator.allocate(os.path.join(temp_dir, 'pkg.tar.gz')) == os.path.join(temp_dir, 'pkg.tar.gz')
+        assert allocator.allocate(os.path.join(temp_dir, 'pkg.tar.gz')) == os.path.join(temp_dir, 'pkg (1).tar.gz')
+        print("✓ 2万个同名文件分配到互不相同的名称")
+
+def test_password_protected():
+    """测试加密压缩文件的候选密码验证和按系列缓存"""
+    print("\n" + "=" * 60)
+    print("加密压缩文件测试")
+    print("=" * 60)
+    
+    import shutil
+    import subprocess
+    import archive_extractor
+    from archive_extractor import load_passwords
+    
+    with tempfile.TemporaryDirectory() as temp_dir, tempfile.TemporaryDirectory() as work_dir:
+        password_file = os.path.join(work_dir, 'passwords.txt')
+        with open(password_file, 'w', encoding='utf-8') as f:
+            f.write('错误1\nwrong2\n\nsecret\nwrong3\nsecret\n')
+        passwords = load_passwords(password_file)
+        assert passwords == ['错误1', 'wrong2', 'secret', 'wrong3']
+        
+        expected = []
+        if archive_extractor.SEVENZIP_SUPPORT:
+            for index, password in ((1, 'secret'), (2, 'secret'), (3, 'unknown')):
+                with archive_extractor.py7zr.SevenZipFile(
+                        os.path.join(temp_dir, f'drop_{index:03d}.7z'), 'w', password=password) as archive:
+                    archive.writestr(f'第{index}批'.encode('utf-8') * 100, f'drop{index}/data.txt')
+                    archive.writestr(b'tiny', f'drop{index}/tiny.txt')
+            expected += ['drop1/data.txt', 'drop2/data.txt']
+        
+        if shutil.which('zip'):
+            source = os.path.join(work_dir, 'zipped.txt')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write('加密ZIP')
+            subprocess.run(['zip', '-q', '-j', '-P', 'secret', os.path.join(temp_dir, 'locked.zip'), source],
+                           check=True)
+            expected.append('zipped.txt')
+        
+        if not expected:
+            print("跳过：没有可用于创建加密压缩文件的工具")
+            return
+        
+        extractor = ArchiveExtractor(temp_dir, max_threads=1, passwords=passwords)
+        extractor.run_recursive_extraction(max_iterations=2)
+        
+        for name in expected:
+            status = '✓' if os.path.exists(os.path.join(temp_dir, name)) else '✗'
+            print(f"{status} {name}")
+            assert status == '✓'
+        
+        if archive_extractor.SEVENZIP_SUPPORT:
+            assert os.path.exists(os.path.join(temp_dir, 'drop_003.7z'))
+            assert not os.path.exists(os.path.join(temp_dir, 'drop3', 'data.txt'))
+            assert extractor.stats['password_failures'] == 1
+            assert extractor._family_passwords[extractor._archive_family(
+                os.path.join(temp_dir, 'drop_001.7z'))] == 'secret'
+            print("✓ 同系列压缩文件共用缓存的密码，密码未知的压缩文件被保留")
+
+# 模拟 7-Zip 程序的脚本：用 py7zr 实现 l -slt / t / x 命令，密码错误时与 7z 一样报告 "Wrong password" 并以退出码2结束
+FAKE_SEVENZIP = """#!{python}
+import sys, tempfile, py7zr
+command, args = sys.argv[1], sys.argv[2:]
+with open({calls!r}, 'a', encoding='utf-8') as calls:
+    calls.write(' '.join(sys.argv[1:]) + '\\n')
+if command == 'i':
+    sys.exit(0)
+password = next((arg[2:] for arg in args if arg.startswith('-p')), '') or None
+output = next((arg[2:] for arg in args if arg.startswith('-o')), None)
+positional = [arg for arg in args if not arg.startswith('-')]
+archive_path, names = positional[0], None
+if len(positional) > 1:
+    with open(positional[1][1:], encoding='utf-8') as f:
+        names = f.read().splitlines()
+try:
+    with py7zr.SevenZipFile(archive_path, 'r', password=password) as archive:
+        if command == 'l':
+            encrypted = '+' if archive.needs_password() else '-'
+            print('Path = ' + archive_path + '\\n\\n----------')
+            for info in archive.list():
+                print(f'Path = {{info.filename}}\\nSize = {{info.uncompressed}}\\nEncrypted = {{encrypted}}\\n')
+        else:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                if names is None:
+                    archive.extractall(path=output if command == 'x' else temp_dir)
+                else:
+                    archive.extract(path=output if command == 'x' else temp_dir, targets=names)
+except Exception as e:
+    sys.stderr.write(f'ERROR: {{archive_path}} : Wrong password? {{e}}\\n')
+    sys.exit(2)
+"""
+
+def test_password_external_tool():
+    """测试只有 7-Zip 程序（未安装 py7zr）时按文件头判断加密，并用 7z t 验证候选密码"""
+    print("\n" + "=" * 60)
+    print("外部程序验证密码测试")
+    print("=" * 60)
+    
+    import sys
+    from unittest import mock
+    import archive_extractor
+    from archive_extractor import ExternalTool
+    
+    if os.name == 'nt' or not archive_extractor.SEVENZIP_SUPPORT:
+        print("跳过：需要类 Unix 系统和 py7zr（用于模拟 7z 程序）")
+        return
+    
+    py7zr = archive_extractor.py7zr
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bin_dir = os.path.join(temp_dir, 'bin')
+        os.makedirs(bin_dir)
+        calls_file = os.path.join(temp_dir, 'calls.txt')
+        fake = os.path.join(bin_dir, '7z')
+        with open(fake, 'w', encoding='utf-8') as f:
+            f.write(FAKE_SEVENZIP.format(python=sys.executable, calls=calls_file))
+        os.chmod(fake, 0o755)
+        
+        target = os.path.join(temp_dir, 'target')
+        os.makedirs(target)
+        # 1、3 只加密成员数据，2 连文件头（成员清单）也加密
+        for index, password, header in ((1, 'secret', False), (2, 'secret', True), (3, 'unknown', False)):
+            with py7zr.SevenZipFile(os.path.join(target, f'drop_{index:03d}.7z'), 'w', password=password,
+                                    header_encryption=header) as archive:
+                archive.writestr(f'第{index}批'.encode('utf-8') * 100, f'drop{index}/data.txt')
+                archive.writestr(b'tiny', f'drop{index}/tiny.txt')
+        
+        with mock.patch.object(archive_extractor, 'SEVENZIP_SUPPORT', False), \
+                mock.patch.dict(archive_extractor.MISSING_BACKENDS, {'7z': 'py7zr'}):
+            extractor = ArchiveExtractor(target, max_threads=1, passwords=['wrong', 'secret'])
+            extractor.external_tools = {'7z': ExternalTool('7z', fake, {'7z'})}
+            assert '7z' in extractor.format_handlers
+            extractor.run_recursive_extraction(max_iterations=1)
+        
+        for index in (1, 2):
+            with open(os.path.join(target, f'drop{index}', 'data.txt'), 'rb') as f:
+                assert f.read() == f'第{index}批'.encode('utf-8') * 100
+        assert os.path.exists(os.path.join(target, 'drop_003.7z'))
+        assert not os.path.exists(os.path.join(target, 'drop3'))
+        assert extractor.stats['password_failures'] == 1
+        assert extractor._family_passwords[extractor._archive_family(
+            os.path.join(target, 'drop_001.7z'))] == 'secret'
+        with open(calls_file, encoding='utf-8') as f:
+            commands = [line.split() for line in f]
+        # 验证密码时只测试最小的成员，不整体解压
+        assert any(command[0] == 't' and '-psecret' in command for command in commands)
+        assert not any(command[0] == 'x' and 'drop_003.7z' in command[-1] for command in commands)
+        print("✓ 7z 程序识别加密（包括文件头加密），候选密码用 7z t 验证，密码未知的压缩文件被保留")
+
+def test_library_api():
+    """测试库接口：iter_members、extract、extract_async"""
+    print("\n" + "=" * 60)
+    print("库接口测试")
+    print("=" * 60)
+    
+    import asyncio
+    import logging
+    import archive_extractor
+    from archive_extractor import ExtractionLimitExceeded
+    
+    root_handlers = list(logging.getLogger().handlers)
+    
+    with tempfile.TemporaryDirectory() as source_dir, tempfile.TemporaryDirectory() as dest_dir:
+        zip_path = os.path.join(source_dir, 'upload.zip')
+        create_test_archive('zip', zip_path, {'a.txt': '内容A', 'sub/b.txt': '内容B'})
+        
+        members = {member.name: member.read().decode('utf-8')
+                   for member in archive_extractor.iter_members(zip_path)}
+        assert members == {'a.txt': '内容A', 'sub/b.txt': '内容B'}
+        print(f"✓ iter_members: {sorted(members)}")
+        
+        result = archive_extractor.extract(zip_path, os.path.join(dest_dir, 'single'))
+        assert result.success and result.files_extracted == 2
+        assert result.bytes_extracted == len('内容A'.encode('utf-8')) * 2
+        assert sorted(os.path.basename(path) for path in result.output_files) == ['a.txt', 'b.txt']
+        assert os.path.exists(zip_path)  # 库接口默认保留源文件
+        print(f"✓ extract: {result.files_extracted} 个文件，耗时 {result.duration:.3f} 秒")
+        
+        broken_path = os.path.join(source_dir, 'broken.zip')
+        with open(broken_path, 'wb') as f:
+            f.write(b'PK\x03\x04' + b'\0' * 64)
+        result = archive_extractor.extract(broken_path, os.path.join(dest_dir, 'broken'))
+        assert not result.success and result.error
+        print(f"✓ 损坏的压缩文件返回错误信息: {result.error}")
+        
+        # 同一个事件循环中并发解压多个上传文件
+        uploads = []
+        for index in range(20):
+            upload = os.path.join(source_dir, f'batch_{index}.zip')
+            create_test_archive('zip', upload, {f'upload_{index}.txt': str(index)})
+            uploads.append(upload)
+        
+        extractor = ArchiveExtractor(os.path.join(dest_dir, 'async'), delete_after_extract=False)
+        os.makedirs(extractor.target_path)
+        
+        async def run_all():
+            return await asyncio.gather(*(extractor.extract_async(upload) for upload in uploads))
+        
+        results = asyncio.run(run_all())
+        assert all(result.success for result in results)
+        assert len(os.listdir(extractor.target_path)) == 20
+        single = asyncio.run(archive_extractor.extract_async(uploads[0], os.path.join(dest_dir, 'one')))
+        assert single.success
+        print(f"✓ extract_async: 并发解压 {len(results)} 个压缩文件")
+        
+        bomb_path = os.path.join(source_dir, 'bomb.zip')
+        with zipfile.ZipFile(bomb_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr('zeros.bin', b'\0' * (64 * 1024 * 1024))
+        try:
+            for member in archive_extractor.iter_members(bomb_path, max_total_mb=32):
+                member.read()
+            assert False, "压缩炸弹应被中止"
+        except ExtractionLimitExceeded as e:
+            print(f"✓ iter_members 读取时同样检查解压限制: {e}")
+    
+    assert logging.getLogger().handlers == root_handlers
+    print("✓ 作为库使用时没有修改全局日志配置")
+
+def test_lazy_imports():
+    """测试可选库延迟导入：导入模块时不加载压缩库，用到对应格式时才导入"""
+    print("\n" + "=" * 60)
+    print("延迟导入测试")
+    print("=" * 60)
+    
+    import subprocess
+    import sys
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    heavy_modules = ['rarfile', 'py7zr', 'zstandard', 'lz4', 'asyncio', 'multiprocessing']
+    code = (
+        "import sys, json, archive_extractor, file_cleanup\n"
+        f"print(json.dumps([name for name in {heavy_modules!r} if name in sys.modules]))\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=script_dir,
+                            capture_output=True, text=True, check=True).stdout
+    loaded = json.loads(output.strip().splitlines()[-1])
+    assert loaded == [], f"导入时加载了: {loaded}"
+    print("✓ 导入 archive_extractor/file_cleanup 时未加载可选压缩库、asyncio 和 multiprocessing")
+    
+    import archive_extractor
+    if archive_extractor.SEVENZIP_SUPPORT:
+        import py7zr as real_py7zr
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive_path = os.path.join(temp_dir, 'lazy.7z')
+            with real_py7zr.SevenZipFile(archive_path, 'w') as archive:
+                archive.writestr(b'lazy', 'lazy.txt')
+            members = {member.name: member.read() for member in archive_extractor.iter_members(archive_path)}
+            assert members == {'lazy.txt': b'lazy'}
+        print("✓ 第一次处理 7z 文件时导入 py7zr 并正常解压")
+
+def test_batch_mode():
+    """测试批量模式：一个进程处理多个目标文件夹，共用线程池和缓存，逐个输出结果记录"""
+    print("\n" + "=" * 60)
+    print("批量模式测试")
+    print("=" * 60)
+    
+    import subprocess
+    import sys
+    from archive_extractor import run_batch, read_batch_targets
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        targets = []
+        for index in range(6):
+            target = os.path.join(temp_dir, f'upload_{index}')
+            os.makedirs(target)
+            create_test_archive('zip', os.path.join(target, 'drop.zip'), {f'file_{index}.txt': str(index)})
+            targets.append(target)
+        missing = os.path.join(temp_dir, 'missing')
+        broken = os.path.join(temp_dir, 'broken')
+        
+        list_file = os.path.join(temp_dir, 'targets.txt')
+        with open(list_file, 'w', encoding='utf-8') as f:
+            f.write('# 调度程序生成的目标列表\n\n' + '\n'.join([broken] + targets[:3] + [missing]) + '\n')
+        assert list(read_batch_targets(list_file)) == [broken] + targets[:3] + [missing]
+        
+        created = []
+        original_init = ArchiveExtractor.__init__
+        
+        def recording_init(self, *args, **kwargs):
+            # 模拟创建解压工具时失败（如无法创建临时目录）
+            if args[0] == broken:
+                raise PermissionError(f"无法访问: {broken}")
+            original_init(self, *args, **kwargs)
+            created.append(self)
+        
+        results = io.StringIO()
+        ArchiveExtractor.__init__ = recording_init
+        try:
+            success = run_batch(read_batch_targets(list_file), results, jobs=2, max_threads=2)
+        finally:
+            ArchiveExtractor.__init__ = original_init
+        
+        records = {record['target']: record for record in map(json.loads, results.getvalue().splitlines())}
+        assert not success  # 不存在的目标和无法创建解压工具的目标记为失败
+        assert set(records) == set([broken] + targets[:3] + [missing])
+        assert not records[missing]['success']
+        assert not records[broken]['success'] and '无法访问' in records[broken]['error']
+        for index, target in enumerate(targets[:3]):
+            assert records[target]['success'] and records[target]['stats']['files_extracted'] == 1
+            assert os.path.exists(os.path.join(target, f'file_{index}.txt'))
+        
+        assert len({id(extractor.executor) for extractor in created}) == 1
+        assert len({id(extractor._format_cache) for extractor in created}) == 1
+        print(f"✓ run_batch: {len(records)} 个目标共用一个线程池和格式识别缓存，逐个输出结果记录")
+        
+        # 命令行：从标准输入读取目标列表，结果记录写到标准输出，日志写到标准错误
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive_extractor.py')
+        completed = subprocess.run(
+            [sys.executable, script, '--batch-file', '-', '--log', os.path.join(temp_dir, 'batch.log')],
+            input='\n'.join(targets[3:]) + '\n', capture_output=True, text=True, encoding='utf-8')
+        assert completed.returncode == 0, completed.stderr
+        records = [json.loads(line) for line in completed.stdout.splitlines()]
+        assert sorted(record['target'] for record in records) == targets[3:]
+        assert all(record['success'] for record in records)
+        print(f"✓ --batch-file -: 从标准输入读取 {len(records)} 个目标，标准输出只包含结果记录")
+
+# 模拟 bsdtar 的脚本：用 py7zr 读取 7z，按 "bsdtar -cf - @压缩包" 的方式输出 tar 流
+FAKE_BSDTAR = """#!{python}
+import io, sys, tarfile, tempfile, os, py7zr
+args = sys.argv[1:]
+archive_path = args[-1][1:]
+with open({calls!r}, 'a') as calls:
+    calls.write(' '.join(args) + '\\n')
+if os.path.basename(archive_path).startswith('unsupported'):
+    sys.stderr.write('bsdtar: Unsupported feature\\n')
+    sys.exit(1)
+with tempfile.TemporaryDirectory() as temp_dir:
+    with py7zr.SevenZipFile(archive_path, 'r') as archive:
+        archive.extractall(temp_dir)
+    with tarfile.open(fileobj=sys.stdout.buffer, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+        for root, dirs, files in os.walk(temp_dir):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                tar.add(path, arcname=os.path.relpath(path, temp_dir))
+"""
+
+def test_external_backend():
+    """测试外部解压程序：探测本机程序，7z 交给 bsdtar 转换为 tar 流逐个成员写出"""
+    print("\n" + "=" * 60)
+    print("外部解压程序测试")
+    print("=" * 60)
+    
+    import sys
+    import archive_extractor
+    from archive_extractor import probe_external_tools
+    
+    if os.name == 'nt' or not archive_extractor.SEVENZIP_SUPPORT:
+        print("跳过：需要类 Unix 系统和 py7zr")
+        return
+    
+    import py7zr
+    saved_tools, saved_path = archive_extractor._external_tools, os.environ.get('PATH', '')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bin_dir = os.path.join(temp_dir, 'bin')
+        os.makedirs(bin_dir)
+        calls_file = os.path.join(temp_dir, 'calls.txt')
+        fake = os.path.join(bin_dir, 'bsdtar')
+        with open(fake, 'w', encoding='utf-8') as f:
+            f.write(FAKE_BSDTAR.format(python=sys.executable, calls=calls_file))
+        os.chmod(fake, 0o755)
+        
+        try:
+            archive_extractor._external_tools = None
+            os.environ['PATH'] = bin_dir
+            tools = probe_external_tools()
+        finally:
+            os.environ['PATH'] = saved_path
+        
+        try:
+            assert tools['7z'].name == 'bsdtar' and tools['7z'].path == fake
+            # 安装了 rarfile 时 RAR 不交给 bsdtar
+            assert ('rar' in tools) == (not archive_extractor.RAR_SUPPORT)
+            print(f"✓ 探测到外部程序: {sorted(tools)} → {fake}")
+            
+            # 只遇到 zip 时不探测外部程序（`7z i` 需要启动进程）
+            zip_target = os.path.join(temp_dir, 'zip_only')
+            os.makedirs(zip_target)
+            with zipfile.ZipFile(os.path.join(zip_target, 'plain.zip'), 'w') as zipf:
+                zipf.writestr('plain.txt', 'plain')
+            archive_extractor._external_tools = None
+            extractor = ArchiveExtractor(zip_target)
+            assert '7z' in extractor.format_handlers and 'rar' in extractor.format_handlers
+            assert extractor.run_recursive_extraction()
+            assert archive_extractor._external_tools is None
+            assert os.path.exists(os.path.join(zip_target, 'plain.txt'))
+            archive_extractor._external_tools = tools
+            print("✓ 外部程序在第一次遇到 7z/RAR 时才探测")
+            
+            target = os.path.join(temp_dir, 'target')
+            os.makedirs(target)
+            with py7zr.SevenZipFile(os.path.join(target, 'solid.7z'), 'w') as archive:
+                archive.writestr(b'alpha' * 1000, 'docs/alpha.txt')
+                archive.writestr(b'beta', 'beta.txt')
+            
+            extractor = ArchiveExtractor(target)
+            assert extractor.external_tools['7z'].streams
+            assert extractor.run_recursive_extraction()
+            assert extractor.stats['files_extracted'] == 2
+            with open(os.path.join(target, 'docs', 'alpha.txt'), 'rb') as f:
+                assert f.read() == b'alpha' * 1000
+            with open(calls_file, encoding='utf-8') as f:
+                assert f.read().split() == ['-cf', '-', '--format', 'pax', '@' + os.path.join(target, 'solid.7z')]
+            print("✓ 7z 由 bsdtar 转换为 tar 流逐个成员解压")
+            
+            # bsdtar 出错时改用 py7zr 重新解压；加密的压缩文件按文件头判断，不交给 bsdtar
+            os.remove(calls_file)
+            with py7zr.SevenZipFile(os.path.join(target, 'unsupported.7z'), 'w') as archive:
+                archive.writestr(b'gamma', 'gamma.txt')
+            with py7zr.SevenZipFile(os.path.join(target, 'locked.7z'), 'w', password='secret') as archive:
+                archive.writestr(b'delta', 'delta.txt')
+            extractor = ArchiveExtractor(target)
+            extractor.run_recursive_extraction(max_iterations=1)
+            assert extractor.stats['errors_encountered'] == 1
+            with open(os.path.join(target, 'gamma.txt'), 'rb') as f:
+                assert f.read() == b'gamma'
+            assert not os.path.exists(os.path.join(target, 'unsupported.7z'))
+            assert os.path.exists(os.path.join(target, 'locked.7z'))
+            with open(calls_file, encoding='utf-8') as f:
+                called = f.read()
+            assert 'unsupported.7z' in called and 'locked.7z' not in called
+            print("✓ bsdtar 出错时改用 py7zr，加密的7z不交给 bsdtar")
+            
+            big_path = _copy_bomb_candidate(temp_dir, py7zr)
+            assert [member.name for member in archive_extractor.iter_members(big_path)] == ['big.bin']
+            print("✓ iter_members 同样通过 bsdtar 逐个产出成员")
+            
+            bomb_target = os.path.join(temp_dir, 'bomb')
+            os.makedirs(bomb_target)
+            _copy_bomb_candidate(bomb_target, py7zr)
+            extractor = ArchiveExtractor(bomb_target, max_total_mb=1)
+            extractor.run_recursive_extraction()
+            assert extractor.stats['archives_rejected'] == 1
+            assert not os.path.exists(os.path.join(bomb_target, 'big.bin'))
+            print("✓ 外部程序的输出流同样检查解压限制，超限时终止进程")
+            
+            python_only = ArchiveExtractor(target, backend='python')
+            assert python_only.external_tools == {}
+            print("✓ --backend python 不使用外部程序")
+        finally:
+            archive_extractor._external_tools = saved_tools
+
+def test_worker_counters():
+    """测试多线程解压后各线程计数器的合并结果，以及线程池关闭后计数器被清理"""
+    print("\n" + "=" * 60)
+    print("线程计数器合并测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for batch in range(3):
+            for index in range(20):
+                create_test_archive('zip', os.path.join(temp_dir, f'batch{batch}_{index:02d}.zip'), {
+                    f'out{batch}/{index:02d}/a.txt': '内容A' * index,
+                    f'out{batch}/{index:02d}/b.txt': '内容B',
+                })
+        
+        extractor = ArchiveExtractor(temp_dir, max_threads=4)
+        for batch in range(3):
+            archives = sorted(os.path.join(temp_dir, name) for name in os.listdir(temp_dir)
+                              if name.startswith(f'batch{batch}_'))
+            assert extractor.process_archive_batch(archives) == 20
+            # 每批的线程池关闭后只剩仍在运行的线程（当前线程）的计数器
+            assert all(thread.is_alive() for thread, _ in extractor._worker_counters)
+            assert len(extractor._worker_counters) <= 1
+        
+        print(f"统计信息: {extractor.stats}")
+        assert extractor.stats['archives_processed'] == 60
+        assert extractor.stats['files_extracted'] == 120
+        assert extractor.stats['archives_deleted'] == 60
+        assert extractor._pending_count('files_extracted') == 0
+        print("✓ 3批并发解压的计数合并正确，已结束线程的计数器被清理")
+
+def _copy_bomb_candidate(directory, py7zr):
+    """在目录中写入一个解压后 4MB 的 7z 文件"""
+    archive_path = os.path.join(directory, 'big.7z')
+    with py7zr.SevenZipFile(archive_path, 'w') as archive:
+        archive.writestr(b'\0' * (4 * 1024 * 1024), 'big.bin')
+    return archive_path
+
 if __name__ == "__main__":
     print("开始压缩文件解压工具测试...")
     
@@ -207,6 +1210,22 @@ if __name__ == "__main__":
         test_recursive_extraction()
         test_dry_run_mode()
         test_error_handling()
+        test_list_and_filter()
+        test_content_sniffing()
+        test_stream_formats()
+        test_resume_from_journal()
+        test_disk_space_admission()
+        test_bomb_guard()
+        test_pipeline_mode()
+        test_content_dedup()
+        test_output_layouts()
+        test_password_protected()
+        test_password_external_tool()
+        test_library_api()
+        test_lazy_imports()
+        test_batch_mode()
+        test_external_backend()
+        test_worker_counters()
         
         print("\n" + "=" * 60)
         print("所有测试完成！")
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+正则表达式文件清理工具测试脚本
+"""
+
+import os
+import re
+import io
+import json
+import random
+import stat
+import string
+import tempfile
+import time
+from unittest import mock
+from regex_cleanup import (RegexFileCleanup, PatternMatcher, backtracking_risk,
+                           restore_quarantine, purge_quarantine, QUARANTINE_JOURNAL, run_batch)
+
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cleanup_patterns_example.json")
+
+def create_tool(target_path, **kwargs):
+    """创建清理工具，日志写入目标目录之外的临时文件"""
+    log_file = os.path.join(tempfile.gettempdir(), "regex_cleanup_test.log")
+    return RegexFileCleanup(target_path, log_file=log_file, **kwargs)
+
+def random_names(count, seed=0):
+    """生成随机文件名（包含点、波浪线、美元符号等规则中常见的字符）"""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '._~$-'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 16))) for _ in range(count)]
+
+def test_combined_matcher():
+    """测试组合匹配器与逐个正则匹配的结果一致"""
+    print("\n" + "=" * 60)
+    print("组合匹配器测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        default_patterns = create_tool(temp_dir).patterns
+    with open(EXAMPLE_CONFIG, 'r', encoding='utf-8') as f:
+        example_patterns = [re.compile(pattern) for pattern in json.load(f)['patterns']]
+    # 带捕获组、全局内联标志、VERBOSE 注释等无法直接合并的写法
+    special_patterns = [re.compile(pattern) for pattern in
+                        (r'(ab)\1', r'(?i)^readme', r'^Build(?:Log)?$', r'x{3,}', r'(?x) a b  # 注释')]
+    
+    names = ['.DS_Store', 'Thumbs.db', 'THUMBS.DB', 'a.tmp', 'A.TMP', '~$报告.docx', 'a.~1', '._x',
+             '__pycache__', '.git', 'normal.txt', 'abab', 'README.md', 'Build', 'BuildLog', 'xxx', '']
+    names += random_names(20000)
+    
+    for label, patterns in (('默认规则', default_patterns), ('示例配置', example_patterns),
+                            ('全部规则', default_patterns + example_patterns + special_patterns)):
+        matcher = PatternMatcher(patterns)
+        for name in names:
+            expected = any(pattern.search(name) for pattern in patterns)
+            rule = matcher.match(name)
+            assert (rule is not None) == expected, (label, name)
+            if rule is not None:
+                assert rule.search(name), (label, name, rule.pattern)
+        print(f"✓ {label}: {len(patterns)} 条规则，{len(names)} 个文件名的匹配结果与逐个匹配一致")
+    
+    matcher = PatternMatcher(default_patterns)
+    assert matcher._exact_folded and matcher._suffixes_folded and matcher._prefixes_folded
+    print("✓ 字面量规则改为完整文件名/后缀/前缀表查找")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tool = create_tool(temp_dir)
+        assert tool.matching_rule('Thumbs.db') == r'^Thumbs\.db$'
+        assert tool.matching_rule('report.TMP') == r'.*\.tmp$'
+        assert tool.matching_rule('report.txt') is None
+    print("✓ matching_rule 报告匹配的规则")
+
+def test_directory_pruning():
+    """测试匹配的目录在扫描时被剪除，并整棵删除"""
+    print("\n" + "=" * 60)
+    print("目录剪除测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        project = os.path.join(temp_dir, "project")
+        git_objects = os.path.join(project, ".git", "objects", "ab")
+        cache_dir = os.path.join(project, "src", "__pycache__")
+        os.makedirs(git_objects)
+        os.makedirs(cache_dir)
+        for i in range(50):
+            with open(os.path.join(git_objects, f"object{i}.tmp"), 'w') as f:
+                f.write("x")
+        with open(os.path.join(cache_dir, "module.pyc"), 'w') as f:
+            f.write("x")
+        with open(os.path.join(project, "src", "main.py"), 'w') as f:
+            f.write("print()")
+        with open(os.path.join(project, "src", "build.log"), 'w') as f:
+            f.write("log")
+        # 只读文件（Windows 上 .git 中的对象文件通常是只读的）
+        os.chmod(os.path.join(git_objects, "object0.tmp"), stat.S_IREAD)
+        
+        tool = create_tool(project)
+        matches = tool.scan_directory()
+        assert sorted(matches['dirs']) == sorted([os.path.join(project, ".git"), cache_dir])
+        assert matches['files'] == [os.path.join(project, "src", "build.log")]
+        assert tool.stats['total_files_scanned'] == 2
+        print(f"✓ 匹配目录中的内容未被枚举（共扫描 {tool.stats['total_files_scanned']} 个文件）")
+        
+        tool.cleanup(matches)
+        assert not os.path.exists(os.path.join(project, ".git"))
+        assert not os.path.exists(cache_dir)
+        assert os.path.exists(os.path.join(project, "src", "main.py"))
+        assert tool.stats['dirs_removed'] == 2 and tool.stats['errors'] == 0
+        print("✓ 匹配目录整棵删除（包括只读文件）")
+        
+        # 目标目录本身匹配时不再扫描其中的内容
+        cache_root = os.path.join(temp_dir, "__pycache__")
+        os.makedirs(os.path.join(cache_root, "sub"))
+        tool = create_tool(cache_root, dry_run=True)
+        matches = tool.scan_directory()
+        assert matches == {'files': [], 'dirs': [cache_root], 'sizes': []}
+        assert tool.stats['total_files_scanned'] == 0
+        print("✓ 目标目录本身匹配时不枚举其内容")
+
+def test_typed_rules():
+    """测试配置文件中的类型化规则（后缀、文件名、通配符、路径、大小、时间）"""
+    print("\n" + "=" * 60)
+    print("类型化规则测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        target = os.path.join(temp_dir, "target")
+        old_time = time.time() - 40 * 86400
+        files = {
+            "build/out/main.o": 1, "src/main.o": 1,
+            "backup/old.bak": 1, "backup/new.bak": 1,
+            "dumps/big.DMP": 2 * 1024 * 1024, "dumps/small.dmp": 10,
+            "notes.TXT": 1, "Thumbs.db": 1, "report-2024.csv": 1, "report.csv": 1,
+        }
+        for relative_path, size in files.items():
+            file_path = os.path.join(target, *relative_path.split('/'))
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.truncate(size)
+        os.utime(os.path.join(target, "backup", "old.bak"), (old_time, old_time))
+        # 目录不受大小和时间条件影响
+        os.makedirs(os.path.join(target, "archive.bak"))
+        os.utime(os.path.join(target, "archive.bak"), (old_time, old_time))
+        
+        config_file = os.path.join(temp_dir, "rules.json")
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({"rules": [
+                {"suffix": ".txt", "ignore_case": True},
+                {"glob": "report-*.csv"},
+                {"glob": "*.bak", "older_than": "30d"},
+                {"path_regex": "(^|/)build/.*\\.o$", "description": "构建产物"},
+                {"suffix": [".dmp", ".hprof"], "ignore_case": True, "min_size": "1M"},
+                {"suffix": ".x", "unknown": 1},
+                {"name": "a", "min_size": "lots"},
+            ]}, f)
+        
+        tool = create_tool(target, config_file=config_file)
+        assert len(tool.rules) == 5
+        print("✓ 无效的规则被跳过，只有类型化规则时不使用默认模式")
+        assert len(tool.conditional_rules) == 3
+        assert [rule.needs_stat for rule in tool.conditional_rules] == [False, True, True]
+        print("✓ 只有文件名条件的规则并入组合匹配器，其余规则按代价排序")
+        
+        # 记录实际读取了文件信息的路径
+        stat_paths = []
+        lazy_stat = RegexFileCleanup.lazy_stat
+        
+        def counting_lazy_stat(entry):
+            get_stat = lazy_stat(entry)
+            
+            def wrapper():
+                stat_paths.append(entry.path)
+                return get_stat()
+            return wrapper
+        
+        with mock.patch.object(RegexFileCleanup, 'lazy_stat', staticmethod(counting_lazy_stat)):
+            matches = tool.scan_directory()
+        matched = sorted(os.path.relpath(path, target).replace(os.sep, '/') for path in matches['files'])
+        assert matched == ["backup/old.bak", "build/out/main.o", "dumps/big.DMP", "notes.TXT", "report-2024.csv"], matched
+        assert matches['dirs'] == []
+        # 只有匹配的文件（统计大小）和文件名通过检查的 .bak/.dmp 文件才读取文件信息，每个文件最多一次
+        stat_files = sorted({os.path.relpath(path, target).replace(os.sep, '/') for path in stat_paths})
+        assert stat_files == sorted(matched + ["backup/new.bak", "dumps/small.dmp"]), stat_files
+        assert dict(zip(matches['files'], matches['sizes']))[os.path.join(target, "dumps", "big.DMP")] == 2 * 1024 * 1024
+        print(f"✓ 匹配结果正确，只读取了 {len(stat_files)} 个文件的信息")
+        
+        assert tool.match_entry("main.o", os.path.join(target, "build", "main.o")) == "构建产物"
+        assert tool.matching_rule("report-1.csv") == '{"glob": "report-*.csv"}'
+        print("✓ 匹配结果报告规则描述")
+
+def test_parallel_deletion():
+    """测试按目录分批的并行删除"""
+    print("\n" + "=" * 60)
+    print("并行删除测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        total_size = 0
+        for d in range(8):
+            dir_path = os.path.join(temp_dir, f"dir{d}")
+            os.makedirs(dir_path)
+            for i in range(25):
+                with open(os.path.join(dir_path, f"file{i}.tmp"), 'wb') as f:
+                    f.write(b"x" * (d * 25 + i))
+                total_size += d * 25 + i
+            with open(os.path.join(dir_path, "keep.txt"), 'w') as f:
+                f.write("keep")
+        
+        tool = create_tool(temp_dir, delete_workers=4)
+        matches = tool.scan_directory()
+        assert len(matches['files']) == 200 and sum(matches['sizes']) == total_size
+        
+        # 扫描后被其他程序删除的文件记为错误，不影响同一目录中其他文件的删除
+        os.remove(os.path.join(temp_dir, "dir0", "file0.tmp"))
+        with mock.patch('regex_cleanup.os.path.getsize') as getsize:
+            tool.cleanup(matches)
+        assert not getsize.called
+        assert tool.stats['files_removed'] == 199 and tool.stats['errors'] == 1
+        assert tool.stats['space_saved'] == total_size
+        for d in range(8):
+            assert os.listdir(os.path.join(temp_dir, f"dir{d}")) == ["keep.txt"]
+        print(f"✓ 4 个线程删除 {tool.stats['files_removed']} 个文件，释放空间按扫描时的大小统计")
+
+def test_stream_mode():
+    """测试流式模式（边扫描边删除）和 JSONL 清理计划"""
+    print("\n" + "=" * 60)
+    print("流式模式测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for d in range(5):
+            dir_path = os.path.join(temp_dir, f"dir{d}")
+            os.makedirs(os.path.join(dir_path, "__pycache__"))
+            with open(os.path.join(dir_path, "__pycache__", "module.pyc"), 'w') as f:
+                f.write("x")
+            for i in range(300):
+                with open(os.path.join(dir_path, f"file{i}.tmp"), 'w') as f:
+                    f.write("xx")
+            with open(os.path.join(dir_path, "keep.txt"), 'w') as f:
+                f.write("keep")
+        
+        # 预览：输出清理计划，不删除任何文件
+        plan = io.StringIO()
+        tool = create_tool(temp_dir, dry_run=True, stream=True, plan=plan)
+        assert tool.run()
+        records = [json.loads(line) for line in plan.getvalue().splitlines()]
+        files = [record for record in records if record['type'] == 'file']
+        dirs = [record for record in records if record['type'] == 'dir']
+        assert len(files) == 1500 and len(dirs) == 5
+        assert all(record['size'] == 2 and record['rule'] == r'.*\.tmp$' for record in files)
+        assert not any(record['path'].startswith(dir_record['path'] + os.sep)
+                       for record in files for dir_record in dirs)
+        assert os.path.exists(os.path.join(temp_dir, "dir0", "file0.tmp"))
+        print(f"✓ 预览模式输出 {len(records)} 条清理计划记录")
+        
+        # 实际清理：每个目录超过一批的文件也能全部删除
+        tool = create_tool(temp_dir, stream=True, delete_workers=3)
+        assert tool.run()
+        assert tool.stats['files_removed'] == 1500 and tool.stats['dirs_removed'] == 5
+        assert tool.stats['space_saved'] == 3000
+        for d in range(5):
+            assert os.listdir(os.path.join(temp_dir, f"dir{d}")) == ["keep.txt"]
+        print("✓ 边扫描边删除，文件和目录全部删除")
+
+def test_max_depth():
+    """测试限制扫描深度，以及不递归模式不再为每一项单独 stat"""
+    print("\n" + "=" * 60)
+    print("扫描深度测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dir_path = temp_dir
+        for level in range(4):
+            with open(os.path.join(dir_path, f"level{level}.tmp"), 'w') as f:
+                f.write("x")
+            with open(os.path.join(dir_path, f"level{level}.txt"), 'w') as f:
+                f.write("x")
+            dir_path = os.path.join(dir_path, f"sub{level}")
+            os.makedirs(dir_path)
+        os.makedirs(os.path.join(temp_dir, "__pycache__"))
+        
+        for max_depth, expected_files in ((0, 1), (1, 2), (2, 3), (None, 4)):
+            tool = create_tool(temp_dir, max_depth=max_depth)
+            matches = tool.scan_directory()
+            assert len(matches['files']) == expected_files, (max_depth, matches)
+            assert matches['dirs'] == [os.path.join(temp_dir, "__pycache__")]
+        print("✓ --max-depth 限制进入的子目录层数，各层的子目录名仍参与匹配")
+        
+        with mock.patch('regex_cleanup.os.stat', wraps=os.stat) as stat_call, \
+                mock.patch('regex_cleanup.os.path.isfile', wraps=os.path.isfile) as isfile_call:
+            tool = create_tool(temp_dir, recursive=False)
+            matches = tool.scan_directory()
+        assert [os.path.basename(path) for path in matches['files']] == ["level0.tmp"]
+        assert matches['dirs'] == []
+        assert tool.stats['total_files_scanned'] == 2 and tool.stats['total_dirs_scanned'] == 1
+        assert not stat_call.called and not isfile_call.called
+        print("✓ 不递归模式使用目录项中的文件类型，不再逐项 stat")
+        
+        tool = create_tool(temp_dir, recursive=False)
+        assert tool.run()
+        assert os.path.isdir(os.path.join(temp_dir, "__pycache__"))
+        assert not os.path.exists(os.path.join(temp_dir, "level0.tmp"))
+        print("✓ 不递归模式只删除顶层文件，匹配的顶层目录保留")
+
+def test_rule_profile():
+    """测试规则统计、规则报告和回溯风险检查"""
+    print("\n" + "=" * 60)
+    print("规则统计测试")
+    print("=" * 60)
+    
+    for pattern in (r'(a+)+$', r'(\w*\s?)*\.txt$', r'(\w+\s?)+$', r'(a|a)*$', r'(a|aa)+$', r'(.*a)+$'):
+        assert backtracking_risk(re.compile(pattern)), pattern
+    for pattern in (r'.*\.tmp$', r'^(ab|cd)*$', r'(\d{2})+', r'x{1,3}y+'):
+        assert backtracking_risk(re.compile(pattern)) is None, pattern
+    # 重复部分之后有固定的分隔符（或分支互不相同）时不会产生灾难性回溯
+    for pattern in (r'(?:x+y)+$', r'((a*)b)*$', r'(\.\w+)+$', r'^(\d+\.)+\d+$', r'(?:[^/]+/)*[^/]+$',
+                    r'(ab|ac)*$', r'(a|ab)*$', r'(a++)+$'):
+        assert backtracking_risk(re.compile(pattern)) is None, pattern
+    with tempfile.TemporaryDirectory() as temp_dir:
+        assert not any(backtracking_risk(pattern) for pattern in create_tool(temp_dir).patterns)
+    with open(EXAMPLE_CONFIG, 'r', encoding='utf-8') as f:
+        assert not any(backtracking_risk(re.compile(pattern)) for pattern in json.load(f)['patterns'])
+    print("✓ 有歧义的重复被识别为回溯风险，以分隔符隔开的重复和默认规则没有风险")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i in range(10):
+            with open(os.path.join(temp_dir, f"file{i}.tmp"), 'wb') as f:
+                f.write(b"x" * 100)
+        with open(os.path.join(temp_dir, "notes.bak"), 'wb') as f:
+            f.write(b"x" * 7)
+        
+        config_file = os.path.join(temp_dir, "rules.json")
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({"patterns": [r'.*\.tmp$', r'(\w+\s?)+\.never$'],
+                       "rules": [{"suffix": ".bak", "description": "备份"}, {"name": "absent.txt"}]}, f)
+        
+        with mock.patch.object(RegexFileCleanup, 'log') as log:
+            tool = create_tool(temp_dir, config_file=config_file, dry_run=True, profile_rules=True)
+            assert tool.run()
+        messages = [call.args[0] for call in log.call_args_list]
+        assert any("可能很慢" in message and r'(\w+\s?)+\.never$' in message for message in messages)
+        assert any("规则报告" in message for message in messages)
+        
+        assert tool.rule_stats[r'.*\.tmp$']['matches'] == 10
+        assert tool.rule_stats[r'.*\.tmp$']['bytes'] == 1000
+        assert tool.rule_stats["备份"] == {'matches': 1, 'bytes': 7, 'time': tool.rule_stats["备份"]['time']}
+        assert tool.rule_stats['{"name": "absent.txt"}']['matches'] == 0
+        assert all(counters['time'] > 0 for counters in tool.rule_stats.values())
+        unmatched_index = messages.index("从未匹配的规则（2 条）:")
+        assert messages[unmatched_index + 1:unmatched_index + 3] == [
+            r"  (\w+\s?)+\.never$", '  {"name": "absent.txt"}']
+        print("✓ 每条规则的匹配次数、大小和耗时，以及从未匹配的规则")
+
+def test_quarantine():
+    """测试隔离模式、恢复和清除过期的隔离目录"""
+    print("\n" + "=" * 60)
+    print("隔离模式测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        target = os.path.join(temp_dir, "project")
+        quarantine = os.path.join(target, "quarantine")
+        os.makedirs(os.path.join(target, "src", "__pycache__"))
+        files = {"src/a.tmp": b"a" * 10, "src/keep.py": b"keep", "src/__pycache__/m.pyc": b"m", "b.log": b"bb"}
+        for relative_path, content in files.items():
+            with open(os.path.join(target, *relative_path.split('/')), 'wb') as f:
+                f.write(content)
+        
+        # 隔离目录位于目标文件夹中时不会被扫描和隔离
+        tool = create_tool(target, quarantine=quarantine, stream=True)
+        assert tool.run()
+        assert tool.stats['files_removed'] == 2 and tool.stats['dirs_removed'] == 1
+        assert tool.stats['bytes_quarantined'] == 12 and tool.stats['space_saved'] == 0
+        assert os.listdir(os.path.join(target, "src")) == ["keep.py"]
+        run_dirs = os.listdir(quarantine)
+        assert len(run_dirs) == 1 and run_dirs[0].endswith("_project")
+        run_dir = os.path.join(quarantine, run_dirs[0])
+        with open(os.path.join(run_dir, "files", "src", "a.tmp"), 'rb') as f:
+            assert f.read() == b"a" * 10
+        with open(os.path.join(run_dir, QUARANTINE_JOURNAL), 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert records[0]['target'] == target and len(records) == 4
+        print(f"✓ 匹配项移动到隔离目录 {run_dirs[0]}，元数据日志记录 {len(records) - 1} 项")
+        
+        # 原位置被占用的项跳过，保留隔离目录
+        with open(os.path.join(target, "b.log"), 'wb') as f:
+            f.write(b"new")
+        assert not restore_quarantine(run_dir)
+        assert os.path.exists(os.path.join(target, "src", "a.tmp"))
+        os.remove(os.path.join(target, "b.log"))
+        assert restore_quarantine(run_dir)
+        for relative_path, content in files.items():
+            with open(os.path.join(target, *relative_path.split('/')), 'rb') as f:
+                assert f.read() == content
+        assert not os.path.exists(run_dir)
+        print("✓ 恢复后文件回到原位置，隔离目录被删除（可重复执行）")
+        
+        tool = create_tool(target, quarantine=quarantine)
+        assert tool.run()
+        assert purge_quarantine(quarantine, 30 * 86400) == 0
+        assert purge_quarantine(quarantine, 0, dry_run=True) == 1 and len(os.listdir(quarantine)) == 1
+        assert purge_quarantine(quarantine, 0) == 1 and os.listdir(quarantine) == []
+        print("✓ 清除过期的隔离目录")
+
+def test_batch_mode():
+    """测试批量模式共用删除线程池，以及某个文件夹创建工具失败时释放名额并写入失败记录"""
+    print("\n" + "=" * 60)
+    print("批量模式测试")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        targets = []
+        for name in ("first", "second"):
+            target = os.path.join(temp_dir, name)
+            os.makedirs(target)
+            with open(os.path.join(target, "cache.tmp"), 'w') as f:
+                f.write("x")
+            targets.append(target)
+        broken = os.path.join(temp_dir, "broken")
+        original_init = RegexFileCleanup.__init__
+        executors = []
+        
+        def failing_init(self, target_path, *args, **kwargs):
+            if target_path == broken:
+                raise PermissionError(f"无法访问: {broken}")
+            executors.append(kwargs.get('executor'))
+            original_init(self, target_path, *args, **kwargs)
+        
+        results = io.StringIO()
+        log_file = os.path.join(tempfile.gettempdir(), "regex_cleanup_test.log")
+        with mock.patch.object(RegexFileCleanup, '__init__', failing_init):
+            success = run_batch([broken] + targets, results, jobs=1,
+                                patterns=[r".*\.tmp$"], log_file=log_file)
+        
+        records = {record['target']: record for record in map(json.loads, results.getvalue().splitlines())}
+        assert not success and len(records) == 3
+        assert not records[broken]['success'] and "无法访问" in records[broken]['error']
+        for target in targets:
+            assert records[target]['success'] and not os.path.exists(os.path.join(target, "cache.tmp"))
+        print("✓ 创建失败的文件夹写入失败记录，其余文件夹照常清理")
+        
+        assert len(executors) == 2 and executors[0] is not None and executors[0] is executors[1]
+        print("✓ 所有文件夹共用一个删除线程池")
+        
+        # 流式模式使用共用的线程池时，每个文件夹等待自己提交的删除任务完成后才写入结果记录
+        for target in targets:
+            for index in range(50):
+                with open(os.path.join(target, f"cache{index}.tmp"), 'w') as f:
+                    f.write("x")
+        results = io.StringIO()
+        assert run_batch(targets, results, jobs=2, patterns=[r".*\.tmp$"], log_file=log_file,
+                         stream=True, delete_workers=2)
+        for record in map(json.loads, results.getvalue().splitlines()):
+            assert record['stats']['files_removed'] == 50, record
+        assert not any(name.endswith(".tmp") for target in targets for name in os.listdir(target))
+        print("✓ 流式模式等待本文件夹的删除任务完成后再写入结果")
+
+if __name__ == "__main__":
+    print("开始正则表达式文件清理工具测试...")
+    
+    try:
+        test_combined_matcher()
+        test_directory_pruning()
+        test_typed_rules()
+        test_parallel_deletion()
+        test_stream_mode()
+        test_max_depth()
+        test_rule_profile()
+        test_quarantine()
+        test_batch_mode()
+        
+        print("\n" + "=" * 60)
+        print("所有测试完成！")
+        print("=" * 60)
+        
+    except Exception as e:
+        print(f"测试过程中发生错误: {e}")
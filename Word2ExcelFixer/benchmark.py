@@ -0,0 +1,143 @@
+"""
+性能测试：构造从 Word 复制的大表格，测量工作表处理和删除多余行的耗时
+同时用较小的表格与逐行 delete_rows 的结果对比，确认一次性删除的结果相同
+"""
+import sys
+import time
+from unittest import mock
+from openpyxl import Workbook
+from openpyxl.styles import Border, Side
+
+from word2excel_fixer import core
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+
+def build_sheet(rows: int, groups: int, cols: int = 6):
+    """
+    构造测试工作表：每个合并组的第一行锚定列有内容，组内每行其他列各有一段文字，
+    组的最后一行有下边框；每 10 组有一个跨两列的合并单元格
+
+    Args:
+        rows: 总行数
+        groups: 合并组数
+        cols: 列数
+
+    Returns:
+        (工作簿, 工作表)
+    """
+    wb = Workbook()
+    ws = wb.active
+    rows_per_group = max(2, rows // groups)
+    bottom = Border(bottom=Side(style='thin'))
+
+    for group in range(groups):
+        start_row = group * rows_per_group + 1
+        for offset in range(rows_per_group):
+            row_idx = start_row + offset
+            if offset == 0:
+                ws.cell(row=row_idx, column=1, value=f"分组{group}")
+            for col_idx in range(2, cols + 1):
+                ws.cell(row=row_idx, column=col_idx, value=f"第{group}组第{offset}行")
+            if offset == rows_per_group - 1:
+                for col_idx in range(1, cols + 1):
+                    ws.cell(row=row_idx, column=col_idx).border = bottom
+        if group % 10 == 0:
+            ws.merge_cells(start_row=start_row, start_column=cols + 1,
+                           end_row=start_row, end_column=cols + 2)
+            ws.cell(row=start_row, column=cols + 1, value="备注")
+
+    return wb, ws
+
+
+def check_vertical_merges():
+    """
+    回归检查：每组锚定列之外有一个纵向合并单元格，跨越会被删除的行（从 Word 复制的常见布局）
+
+    纵向合并区域被压缩为单个单元格时去掉，只平移不压缩的合并区域要能正常取消合并
+    """
+    wb = Workbook()
+    ws = wb.active
+    bottom = Border(bottom=Side(style='thin'))
+    for group in range(3):
+        start_row = group * 3 + 1
+        ws.cell(row=start_row, column=1, value=f"分组{group}")
+        ws.cell(row=start_row, column=3, value=f"合并{group}")
+        ws.merge_cells(start_row=start_row, start_column=3, end_row=start_row + 2, end_column=3)
+        ws.merge_cells(start_row=start_row, start_column=4, end_row=start_row, end_column=5)
+        for offset in range(3):
+            ws.cell(row=start_row + offset, column=2, value=f"第{group}组第{offset}行")
+        for col_idx in range(1, 6):
+            ws.cell(row=start_row + 2, column=col_idx).border = bottom
+
+    assert core._process_worksheet(ws, anchor_column=1) == (3, 6)
+    assert [ws.cell(row=row_idx, column=3).value for row_idx in range(1, 4)] == ["合并0", "合并1", "合并2"]
+    assert sorted(str(merged_range) for merged_range in ws.merged_cells.ranges) == ["D1:E1", "D2:E2", "D3:E3"]
+    for merged_range in list(ws.merged_cells.ranges):
+        ws.unmerge_cells(str(merged_range))
+    assert not ws.merged_cells.ranges
+    print("纵向合并单元格跨越被删除的行：结果正确")
+
+
+def legacy_delete_rows(ws, rows_to_delete) -> int:
+    """原来的删除方式：倒序逐行调用 delete_rows"""
+    for row_idx in sorted(rows_to_delete, reverse=True):
+        ws.delete_rows(row_idx)
+    return len(rows_to_delete)
+
+
+def measure(ws, delete_rows):
+    """
+    处理工作表，分别统计总耗时和删除多余行的耗时
+
+    Returns:
+        (合并组数, 删除行数, 总耗时, 删除耗时)
+    """
+    timings = {}
+
+    def timed_delete(ws, rows_to_delete):
+        started = time.perf_counter()
+        deleted = delete_rows(ws, rows_to_delete)
+        timings['delete'] = time.perf_counter() - started
+        return deleted
+
+    started = time.perf_counter()
+    with mock.patch.object(core, '_delete_rows_bulk', timed_delete):
+        groups, deleted = core._process_worksheet(ws, anchor_column=1)
+    return groups, deleted, time.perf_counter() - started, timings.get('delete', 0.0)
+
+
+def sheet_values(ws):
+    """工作表中所有单元格的值"""
+    return [[cell.value for cell in row] for row in ws.iter_rows()]
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    groups = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    compare_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    core.logger.setLevel("WARNING")
+
+    check_vertical_merges()
+
+    # 较小的表格：逐行删除与一次性删除对比
+    compare_groups = max(1, groups * compare_rows // rows)
+    _, legacy_ws = build_sheet(compare_rows, compare_groups)
+    _, bulk_ws = build_sheet(compare_rows, compare_groups)
+    legacy = measure(legacy_ws, legacy_delete_rows)
+    bulk = measure(bulk_ws, core._delete_rows_bulk)
+    assert sheet_values(legacy_ws) == sheet_values(bulk_ws), "一次性删除的结果与逐行删除不同"
+    print(f"\n{compare_rows} 行 / {compare_groups} 组（删除 {bulk[1]} 行）:")
+    print(f"  逐行 delete_rows: 删除 {legacy[3]:.2f} 秒，总计 {legacy[2]:.2f} 秒")
+    print(f"  一次性删除:       删除 {bulk[3]:.2f} 秒，总计 {bulk[2]:.2f} 秒")
+
+    # 完整规模
+    _, ws = build_sheet(rows, groups)
+    merged_before = len(ws.merged_cells.ranges)
+    merged_groups, deleted, total_time, delete_time = measure(ws, core._delete_rows_bulk)
+    assert ws.max_row == rows - deleted
+    assert len(ws.merged_cells.ranges) == merged_before
+    print(f"\n{rows} 行 / {groups} 组:")
+    print(f"  合并 {merged_groups} 组，删除 {deleted} 行")
+    print(f"  一次性删除: 删除 {delete_time:.2f} 秒，总计 {total_time:.2f} 秒\n")
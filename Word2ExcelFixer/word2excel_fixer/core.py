@@ -8,10 +8,10 @@ import sys
 import sys
 from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Border, Side
-from openpyxl.cell import MergedCell
+from openpyxl.cell import Cell, MergedCell
 from openpyxl.utils import get_column_letter
 from pathlib import Path
-from typing import Optional, List, Set, Tuple
+from typing import Optional, List, Set, Tuple, Dict
 import logging
 
 # 配置日志
@@ -59,21 +59,68 @@ def _has_bottom_border(cell) -> bool:
     return _has_full_border(cell, 'bottom')
 
 
-def _is_empty_row(ws, row_idx: int, max_col: int) -> bool:
+def _has_content(value) -> bool:
+    """检查单元格的值是否有内容（不是空值或只有空白字符）"""
+    return bool(value) and bool(str(value).strip())
+
+
+def _load_sheet_snapshot(ws, max_row: int, max_col: int) -> Tuple[List[list], Set[Tuple[int, int]], bytearray]:
     """
-    检查一行是否为空行（所有单元格都没有内容或只有空白字符）
+    一次性读取工作表，生成后续检测使用的数组快照
+
+    只遍历工作表中已存在的单元格，不会像 ws.cell 那样为空位置创建单元格。
+    下边框按样式中的边框编号缓存，同一种边框只检查一次
 
     Args:
         ws: 工作表对象
+        max_row: 最大行数
+        max_col: 最大列数
+
+    Returns:
+        (values, merged_cells, bottom_borders):
+        values[row][col] 为单元格的值（行列均从 1 开始，下标 0 不使用）；
+        merged_cells 为合并区域中只读单元格的坐标集合；
+        bottom_borders[row] 表示该行是否有单元格带下边框
+    """
+    values = [[None] * (max_col + 1) for _ in range(max_row + 1)]
+    merged_cells: Set[Tuple[int, int]] = set()
+    bottom_borders = bytearray(max_row + 1)
+    border_cache: Dict[int, bool] = {}
+
+    for (row_idx, col_idx), cell in ws._cells.items():
+        if row_idx > max_row or col_idx > max_col:
+            continue
+        if isinstance(cell, MergedCell):
+            merged_cells.add((row_idx, col_idx))
+        else:
+            values[row_idx][col_idx] = cell.value
+
+        # 没有设置过样式的单元格 _style 为 None，使用默认边框
+        border_id = cell._style.borderId if cell._style is not None else 0
+        has_bottom = border_cache.get(border_id)
+        if has_bottom is None:
+            has_bottom = border_cache[border_id] = _has_bottom_border(cell)
+        if has_bottom:
+            bottom_borders[row_idx] = 1
+
+    return values, merged_cells, bottom_borders
+
+
+def _is_empty_row(values: List[list], row_idx: int, max_col: int) -> bool:
+    """
+    检查一行是否为空行（所有单元格都没有内容或只有空白字符）
+
+    Args:
+        values: 工作表快照中的值数组
         row_idx: 行索引（从 1 开始）
         max_col: 最大列数
 
     Returns:
         bool: 是否为空行
     """
+    row_values = values[row_idx]
     for col_idx in range(1, max_col + 1):
-        cell = ws.cell(row=row_idx, column=col_idx)
-        if cell.value and str(cell.value).strip():
+        if _has_content(row_values[col_idx]):
             return False
     return True
 
@@ -215,7 +262,7 @@ def _merge_rows_content(ws, group: List[int], max_col: int) -> str:
     return merged_content
 
 
-def _identify_key_columns(ws, max_row: int, max_col: int) -> List[int]:
+def _identify_key_columns(values: List[list], max_row: int, max_col: int) -> List[int]:
     """
     识别主键列（包含分组标识的列）
 
@@ -225,7 +272,7 @@ def _identify_key_columns(ws, max_row: int, max_col: int) -> List[int]:
     - 该列的内容密度适中（不是太高也不是太低）
 
     Args:
-        ws: 工作表对象
+        values: 工作表快照中的值数组
         max_row: 最大行数
         max_col: 最大列数
 
@@ -240,18 +287,15 @@ def _identify_key_columns(ws, max_row: int, max_col: int) -> List[int]:
         group_starts = 0  # 分组开始的数量（有内容且后有空行的位置）
         consecutive_empty = 0  # 连续空行的数量
 
-        for row_idx in range(1, max_row + 1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            has_content = cell.value and str(cell.value).strip()
+        column = [_has_content(values[row_idx][col_idx]) for row_idx in range(1, max_row + 1)]
 
+        for row_idx, has_content in enumerate(column, start=1):
             if has_content:
                 non_empty_count += 1
 
                 # 检查是否是分组开始（当前有内容，且下一行是空）
-                if row_idx < max_row:
-                    next_cell = ws.cell(row=row_idx + 1, column=col_idx)
-                    if not next_cell.value or not str(next_cell.value).strip():
-                        group_starts += 1
+                if row_idx < max_row and not column[row_idx]:
+                    group_starts += 1
             else:
                 consecutive_empty += 1
 
@@ -289,7 +333,7 @@ def _identify_key_columns(ws, max_row: int, max_col: int) -> List[int]:
     if not result:
         for col_idx in range(1, max_col + 1):
             non_empty = sum(1 for r in range(1, max_row + 1)
-                          if ws.cell(row=r, column=col_idx).value)
+                          if values[r][col_idx])
             density = non_empty / max_row
             if 0.1 <= density <= 0.7:
                 result.append(col_idx)
@@ -303,27 +347,32 @@ def _identify_key_columns(ws, max_row: int, max_col: int) -> List[int]:
     return result
 
 
-def _find_merge_groups_by_key_column(ws, max_row: int, max_col: int, key_col: int) -> List[List[int]]:
+def _find_merge_groups_by_key_column(values: List[list], bottom_borders: bytearray,
+                                     max_row: int, key_col: int) -> List[List[int]]:
     """
     基于主键列找出所有需要合并的行组
 
     Args:
-        ws: 工作表对象
+        values: 工作表快照中的值数组
+        bottom_borders: 每行是否有单元格带下边框
         max_row: 最大行数
-        max_col: 最大列数
         key_col: 主键列索引
 
     Returns:
         合并组列表 [[start_row, end_row], ...]
     """
     merge_groups = []
+
+    # 锚定列超出表格范围时没有内容
+    if key_col >= len(values[0]):
+        return merge_groups
+
+    key_has_content = [_has_content(row_values[key_col]) for row_values in values]
     row_idx = 1
 
     while row_idx <= max_row:
-        key_cell = ws.cell(row=row_idx, column=key_col)
-
         # 找到有内容的主键行，作为合并组的开始
-        if not key_cell.value or not str(key_cell.value).strip():
+        if not key_has_content[row_idx]:
             row_idx += 1
             continue
 
@@ -333,21 +382,12 @@ def _find_merge_groups_by_key_column(ws, max_row: int, max_col: int, key_col: in
         # 向下查找这个合并组的结束
         # 结束条件：遇到下一个有主键内容的行，或者遇到表格末尾
         for next_row in range(row_idx + 1, max_row + 1):
-            next_key_cell = ws.cell(row=next_row, column=key_col)
-
             # 如果下一行有主键内容，说明是新组的开始
-            if next_key_cell.value and str(next_key_cell.value).strip():
+            if key_has_content[next_row]:
                 break
 
-            # 检查其他列是否有下边框（标识合并组的结束）
-            has_bottom_border = False
-            for col_idx in range(1, max_col + 1):
-                cell = ws.cell(row=next_row, column=col_idx)
-                if _has_bottom_border(cell):
-                    has_bottom_border = True
-                    break
-
-            if has_bottom_border:
+            # 检查该行是否有下边框（标识合并组的结束）
+            if bottom_borders[next_row]:
                 group_end = next_row
                 break
 
@@ -363,6 +403,78 @@ def _find_merge_groups_by_key_column(ws, max_row: int, max_col: int, key_col: in
     return merge_groups
 
 
+def _delete_rows_bulk(ws, rows_to_delete: Set[int]) -> int:
+    """
+    一次性删除多行：只遍历一次单元格，按新行号重建工作表的单元格字典
+
+    ws.delete_rows 每次调用都要移动下方的所有单元格，逐行删除数千行时耗时与行数的平方成正比。
+    单元格对象（值和样式）原样平移，合并区域和行属性（行高等）同时平移，
+    落在被删除行中的部分一并去掉
+
+    Args:
+        ws: 工作表对象
+        rows_to_delete: 需要删除的行号集合（从 1 开始）
+
+    Returns:
+        int: 删除的行数
+    """
+    max_row = ws.max_row
+    rows_to_delete = {row_idx for row_idx in rows_to_delete if 1 <= row_idx <= max_row}
+    if not rows_to_delete:
+        return 0
+
+    # 旧行号 -> 新行号，被删除的行为 0
+    new_rows = [0] * (max_row + 1)
+    shift = 0
+    for row_idx in range(1, max_row + 1):
+        if row_idx in rows_to_delete:
+            shift += 1
+        else:
+            new_rows[row_idx] = row_idx - shift
+
+    def new_row(row_idx: int) -> int:
+        return new_rows[row_idx] if row_idx <= max_row else row_idx - shift
+
+    # 单元格：保留的单元格改为新行号，被删除行中的单元格丢弃
+    cells = {}
+    for (row_idx, col_idx), cell in ws._cells.items():
+        target_row = new_row(row_idx)
+        if target_row:
+            cell.row = target_row
+            cells[(target_row, col_idx)] = cell
+    ws._cells = cells
+
+    # 合并区域：去掉被删除的行；首行被删除时左上角补一个普通单元格
+    # 合并区域按坐标计算哈希值，修改坐标前先从集合中取出，平移后重新组成集合
+    merged_ranges = []
+    for merged_range in ws.merged_cells.ranges:
+        kept_rows = [new_row(row_idx) for row_idx in range(merged_range.min_row, merged_range.max_row + 1)
+                     if new_row(row_idx)]
+        if not kept_rows:
+            continue
+        merged_range.min_row, merged_range.max_row = kept_rows[0], kept_rows[-1]
+        top_left = (merged_range.min_row, merged_range.min_col)
+        if isinstance(cells.get(top_left), MergedCell):
+            cells[top_left] = Cell(ws, row=top_left[0], column=top_left[1])
+        merged_range.start_cell = cells.get(top_left)
+        if merged_range.min_row != merged_range.max_row or merged_range.min_col != merged_range.max_col:
+            merged_ranges.append(merged_range)
+    ws.merged_cells.ranges = set(merged_ranges)
+
+    # 行属性（行高、隐藏、大纲级别等）
+    dimensions = {}
+    for row_idx, dimension in list(ws.row_dimensions.items()):
+        target_row = new_row(row_idx)
+        if target_row:
+            dimension.index = target_row
+            dimensions[target_row] = dimension
+    ws.row_dimensions.clear()
+    ws.row_dimensions.update(dimensions)
+
+    ws._current_row = ws.max_row if cells else 0
+    return len(rows_to_delete)
+
+
 def _process_worksheet(ws, anchor_column: Optional[int] = None) -> Tuple[int, int]:
     """
     处理单个工作表，执行合并操作
@@ -385,13 +497,16 @@ def _process_worksheet(ws, anchor_column: Optional[int] = None) -> Tuple[int, in
 
     logger.info(f"处理工作表 '{ws.title}': {max_row} 行 x {max_col} 列")
 
+    # 一次性读取单元格的值和边框，后续检测都在快照上进行
+    values, merged_cells, bottom_borders = _load_sheet_snapshot(ws, max_row, max_col)
+
     # 确定锚定列
     if anchor_column is not None:
         key_col = anchor_column
         logger.info(f"使用指定的锚定列: 列{key_col} ({get_column_letter(key_col)})")
     else:
         # 自动识别主键列
-        key_columns = _identify_key_columns(ws, max_row, max_col)
+        key_columns = _identify_key_columns(values, max_row, max_col)
         logger.debug(f"候选主键列: {key_columns}")
 
         if not key_columns:
@@ -401,7 +516,7 @@ def _process_worksheet(ws, anchor_column: Optional[int] = None) -> Tuple[int, in
         key_col = key_columns[0]
 
     # 基于锚定列找出合并组
-    merge_groups = _find_merge_groups_by_key_column(ws, max_row, max_col, key_col)
+    merge_groups = _find_merge_groups_by_key_column(values, bottom_borders, max_row, key_col)
 
     if not merge_groups:
         logger.info(f"工作表 '{ws.title}' 未发现需要合并的行")
@@ -409,8 +524,9 @@ def _process_worksheet(ws, anchor_column: Optional[int] = None) -> Tuple[int, in
 
     logger.info(f"发现 {len(merge_groups)} 组需要合并的行（基于列 {key_col}）")
 
-    # 记录需要删除的行
+    # 记录需要删除的行和修改过的单元格
     rows_to_delete: Set[int] = set()
+    changed_cells: Set[Tuple[int, int]] = set()
 
     # 处理每个合并组
     for group in merge_groups:
@@ -423,40 +539,40 @@ def _process_worksheet(ws, anchor_column: Optional[int] = None) -> Tuple[int, in
 
         # 合并所有列的内容
         for col_idx in range(1, max_col + 1):
+            # 已合并的单元格（只读）在快照中的值为 None，不会被收集
             contents = []
             for row_idx in range(start_row, end_row + 1):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                # 跳过已合并的单元格（只读）
-                if isinstance(cell, MergedCell):
-                    continue
-                if cell.value:
-                    contents.append(str(cell.value).strip())
+                value = values[row_idx][col_idx]
+                if value:
+                    contents.append(str(value).strip())
 
             if contents:
                 # 合并内容到第一行
-                target_cell = ws.cell(row=start_row, column=col_idx)
-                if not isinstance(target_cell, MergedCell):
-                    target_cell.value = '\n'.join(contents)
+                if (start_row, col_idx) not in merged_cells:
+                    merged_value = '\n'.join(contents)
+                    if values[start_row][col_idx] != merged_value:
+                        values[start_row][col_idx] = merged_value
+                        changed_cells.add((start_row, col_idx))
 
                 # 清空被合并的行（保留第一行）
                 for row_idx in range(start_row + 1, end_row + 1):
-                    cell = ws.cell(row=row_idx, column=col_idx)
-                    if not isinstance(cell, MergedCell):
-                        cell.value = None
+                    if values[row_idx][col_idx] is not None:
+                        values[row_idx][col_idx] = None
+                        changed_cells.add((row_idx, col_idx))
 
         # 标记需要删除的行（稍后统一处理）
         for row_idx in range(start_row + 1, end_row + 1):
             # 只有当整行都是空的时候才删除
-            if _is_empty_row(ws, row_idx, max_col):
+            if _is_empty_row(values, row_idx, max_col):
                 rows_to_delete.add(row_idx)
 
-    # 删除多余的行（倒序删除，避免行号变化）
-    deleted_rows = 0
-    if rows_to_delete:
-        # 排序后倒序删除
-        for row_idx in sorted(rows_to_delete, reverse=True):
-            ws.delete_rows(row_idx)
-            deleted_rows += 1
+    # 只写回修改过的单元格，将被删除的行不用写回
+    for row_idx, col_idx in changed_cells:
+        if row_idx not in rows_to_delete:
+            ws.cell(row=row_idx, column=col_idx).value = values[row_idx][col_idx]
+
+    # 一次性删除多余的行
+    deleted_rows = _delete_rows_bulk(ws, rows_to_delete)
 
     return len(merge_groups), deleted_rows
 